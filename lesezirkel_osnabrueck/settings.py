@@ -149,10 +149,22 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Output of `manage.py build_assets` (main/assets.py): minified CSS/JS bundles
+# per page and their critical CSS, served as static 'build/...' files.
+# Run it before collectstatic; without a build the source files are linked.
+ASSET_BUILD_DIR = BASE_DIR / 'static' / 'build'
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media files are stored once per content (main/storage.py): duplicates are
+# hard links to MEDIA_ROOT/.blobs/<sha256>, which must not be served directly.
+STORAGES = {
+    'default': {'BACKEND': 'main.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 # File Upload Settings
 # Maximum size for uploaded files (in bytes)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10 MB (default is 2.5 MB)
@@ -161,6 +173,117 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10 MB (default is 2.5 MB)
 # DATA_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50 MB
 # FILE_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50 MB
 
+# Resumable admin uploads (main/uploads.py): large files are sent in chunks
+# of CHUNKED_UPLOAD_CHUNK_SIZE, so no request comes near the limits above.
+# Partial files live outside MEDIA_ROOT and are removed after
+# CHUNKED_UPLOAD_EXPIRY seconds without progress.
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', str(BASE_DIR / 'tmp' / 'uploads'))
+CHUNKED_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # 5 MB
+CHUNKED_UPLOAD_MAX_SIZE = 1024 * 1024 * 1024  # 1 GB
+CHUNKED_UPLOAD_EXPIRY = 24 * 60 * 60
+
+# Image upload normalization (see main/image_utils.py)
+# Uploads are rotated by EXIF, stripped of metadata (GPS!), capped to
+# IMAGE_UPLOAD_MAX_SIDE pixels on the longest side and re-encoded.
+IMAGE_UPLOAD_MAX_SIDE = 2560
+IMAGE_UPLOAD_QUALITY = 82  # JPEG/WebP quality
+IMAGE_UPLOAD_LIMITS = {  # per model overrides
+    'Gallery': {'max_side': 2560},
+    'Event': {'max_side': 1920},
+    'News': {'max_side': 1920},
+    'Announcement': {'max_side': 1600},
+    'TeamMember': {'max_side': 800, 'quality': 85},
+}
+
+# Responsive image derivatives (see main/image_utils.py)
+# Generated on upload, backfill with: python manage.py generate_image_derivatives
+IMAGE_DERIVATIVE_WIDTHS = [320, 640, 1024, 1600]  # pixel widths, never upscaled
+IMAGE_DERIVATIVE_FORMATS = ['webp', 'jpeg']
+IMAGE_DERIVATIVE_QUALITY = 80
+
+# Background process pool for image processing etc. (see main/workers.py)
+# 0 = run jobs inline in the request (for hosts that do not allow forking)
+WORKER_POOL_SIZE = int(os.environ.get('WORKER_POOL_SIZE', 2))
+
+# Certificate search: failed lookups per IP before it is blocked for the window
+CERTIFICATE_SEARCH_MAX_FAILURES = 5
+CERTIFICATE_SEARCH_BLOCK_SECONDS = 15 * 60
+
+# Certificate download links are signed and expire after this many seconds
+CERTIFICATE_DOWNLOAD_MAX_AGE = 60 * 60
+# Internal nginx location for MEDIA_ROOT (see nginx.conf.example), e.g.
+# '/protected-media/'; the file is then sent by nginx via X-Accel-Redirect.
+# Empty = Django streams the file itself
+CERTIFICATE_ACCEL_REDIRECT_PREFIX = os.environ.get('CERTIFICATE_ACCEL_REDIRECT_PREFIX', '')
+
+# Spreadsheet to PDF conversion limits (main/document_utils.py); keeps the
+# memory and time of converting large workbooks bounded
+SPREADSHEET_MAX_SHEETS = 10
+SPREADSHEET_MAX_ROWS = 2000
+SPREADSHEET_MAX_COLUMNS = 30
+
+# Document -> PDF converter backends per file extension, tried in order
+# (main/conversion.py); the default for all others is ['reportlab'].
+# 'soffice' (LibreOffice headless) is skipped where it is not installed; the
+# legacy binary formats cannot be read by the built-in converter at all
+DOCUMENT_CONVERTER_BACKENDS = {
+    '.doc': ['soffice', 'reportlab'],
+    '.xls': ['soffice', 'reportlab'],
+    '.ppt': ['soffice', 'reportlab'],
+    '.rtf': ['soffice', 'reportlab'],
+}
+# A LibreOffice run is killed after SOFFICE_TIMEOUT seconds. Together with a
+# fallback run of the built-in converter (CONVERSION_TIMEOUT) it has to fit
+# into CONVERSION_TIME_BUDGET, which stays below the gunicorn timeout (30 s).
+SOFFICE_BINARY = os.environ.get('SOFFICE_BINARY', 'soffice')
+SOFFICE_MAX_PROCESSES = 2
+SOFFICE_TIMEOUT = 10
+
+# Sandbox of the built-in converter (main/conversion.py): a child process per
+# conversion with extra address space (bytes) and CPU seconds on top of the
+# forked worker, killed after CONVERSION_TIMEOUT seconds of wall-clock time
+CONVERSION_SANDBOX = True
+CONVERSION_MAX_PROCESSES = 2
+CONVERSION_MEMORY_LIMIT = 512 * 1024 * 1024
+CONVERSION_CPU_LIMIT = 20
+CONVERSION_TIMEOUT = 10
+
+# Seconds one conversion may take in total: waiting for a free slot plus the
+# runs of all backends tried. A download converts on first use, so this must
+# stay well below the gunicorn worker timeout (timeout = 30, gunicorn.conf.py),
+# else the worker is killed mid-request. A backend only waits for a slot while
+# its full run still fits; otherwise the original file is served unconverted.
+CONVERSION_TIME_BUDGET = 20
+
+# Extracted document text for the search index is cut off after this many characters
+DOCUMENT_TEXT_MAX_CHARS = 200000
+
+# Document previews (main/previews.py): thumbnail width in pixels; the first
+# page is rendered with pdftoppm (poppler-utils) if installed
+DOCUMENT_THUMBNAIL_WIDTH = 300
+PDF_RASTERIZER_BINARY = os.environ.get('PDF_RASTERIZER_BINARY', 'pdftoppm')
+
+# ZIP bundle download (/herunterladen/zip/): at most this many documents per archive
+DOCUMENT_BUNDLE_MAX_FILES = 100
+
+# request.META key with the real client IP behind a reverse proxy, e.g.
+# 'HTTP_X_REAL_IP' for nginx.conf.example; empty = REMOTE_ADDR
+CLIENT_IP_HEADER = os.environ.get('CLIENT_IP_HEADER', '')
+
+# 'counters' holds the model versions (main/versions.py) and the rate limiting
+# counters (main/ratelimit.py) apart from the other entries, so culling a full
+# cache never drops them. Its MAX_ENTRIES is far above the expected key count.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'counters': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'counters',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
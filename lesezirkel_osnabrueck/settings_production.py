@@ -85,8 +85,16 @@ STATIC_URL = '/static/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
-# WhiteNoise settings for static files
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise settings for static files: hashed names from the manifest
+# (collectstatic), served with far-future "immutable" caching
+STORAGES = {
+    **STORAGES,
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
+# Behind nginx every request comes from 127.0.0.1; the client address is in
+# the X-Real-IP header it sets (nginx.conf.example), used for rate limiting
+CLIENT_IP_HEADER = os.environ.get('CLIENT_IP_HEADER', 'HTTP_X_REAL_IP')
 
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
@@ -112,6 +120,41 @@ SESSION_COOKIE_AGE = 3600  # 1 saat
 SESSION_SAVE_EVERY_REQUEST = True  # Her istekte session'ı güncelle
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True  # Tarayıcı kapanınca session sona ersin
 
+# Compiled templates are kept in memory per process (cached loader, also the
+# implicit default without DEBUG - explicit here since production relies on it
+# together with the {% cache %} fragments keyed by main/versions.py)
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+
+# Shared cache for all worker processes (template fragments, derivative
+# lookups etc.), file based so it works on shared hosting without
+# memcached/redis. Past MAX_ENTRIES a third of the entries is culled at random,
+# so the limit is well above the expected number of keys. Model versions and
+# rate limiting counters live in 'counters' (see settings.py), which is never full.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'counters': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache_counters'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
 # Cache Control - Authenticated sayfaların cache'lenmesini engelle
 CACHE_MIDDLEWARE_SECONDS = 0
 CACHE_MIDDLEWARE_KEY_PREFIX = ''
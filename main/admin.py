@@ -17,6 +17,9 @@ except ImportError:
 
 from .models import Event, News, TeamMember, Gallery, Contact, EventRegistration, Document, Certificate, InvitationCode, Announcement
 from .forms import EventRegistrationAdminForm, EventAdminForm, NewsAdminForm, GalleryBulkUploadForm
+from .search import SearchIndexAdminMixin, SearchKeyAdminMixin
+from .uploads import ChunkedUploadFormMixin
+from .versions import bump_version
 
 # Base admin mixin for file upload help text
 class FileUploadHelpMixin:
@@ -58,16 +61,78 @@ class FileUploadHelpMixin:
         return form
 
 
+class ChunkedUploadAdminMixin:
+    """
+    Resumable chunked uploads (main/uploads.py) for the file fields in
+    chunked_upload_fields: admin/js/chunked_upload.js sends the file in chunks
+    to <model>/upload/ and submits the upload id instead of the file.
+    """
+    chunked_upload_fields = ()
+
+    @property
+    def media(self):
+        from django import forms
+        return super().media + forms.Media(js=['admin/js/chunked_upload.js'])
+
+    def get_urls(self):
+        from django.urls import path
+        info = self.opts.app_label, self.opts.model_name
+        custom_urls = [
+            path('upload/', self.admin_site.admin_view(self.chunked_upload_view), name='%s_%s_upload' % info),
+            path('upload/<uuid:upload_id>/', self.admin_site.admin_view(self.chunked_upload_view),
+                 name='%s_%s_upload_detail' % info),
+        ]
+        return custom_urls + super().get_urls()
+
+    def chunked_upload_view(self, request, upload_id=None):
+        from django.core.exceptions import PermissionDenied
+        from .uploads import create_upload, tus_response, upload_detail
+
+        if not (self.has_add_permission(request) or self.has_change_permission(request)):
+            raise PermissionDenied
+        if upload_id is not None:
+            return upload_detail(request, upload_id)
+        if request.method != 'POST':
+            return tus_response(405)
+        return create_upload(request)
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        from django.conf import settings
+        from django.urls import reverse
+
+        formfield = super().formfield_for_dbfield(db_field, request, **kwargs)
+        if formfield is not None and db_field.name in self.chunked_upload_fields:
+            formfield.widget.attrs.update({
+                'data-chunked-upload': reverse('admin:%s_%s_upload' % (self.opts.app_label, self.opts.model_name)),
+                'data-chunk-size': settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+            })
+        return formfield
+
+    def get_form(self, request, obj=None, **kwargs):
+        # Mixed into the base form: the form class built from it keeps the fields as adjusted later
+        kwargs.setdefault('form', type(self.form.__name__, (ChunkedUploadFormMixin, self.form), {
+            'chunked_upload_fields': self.chunked_upload_fields,
+            'upload_user': request.user,
+        }))
+        return super().get_form(request, obj, **kwargs)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if isinstance(form, ChunkedUploadFormMixin):
+            form.finish_chunked_uploads()
+
+
 @admin.register(Event)
-class EventAdmin(FileUploadHelpMixin, admin.ModelAdmin):
+class EventAdmin(SearchIndexAdminMixin, ChunkedUploadAdminMixin, FileUploadHelpMixin, admin.ModelAdmin):
     form = EventAdminForm  # Use custom form with German date format
     list_display = ['title', 'date', 'location', 'category', 'is_featured', 'is_public', 'registration_required', 'invitation_only', 'created_at']
     list_filter = ['category', 'is_featured', 'is_public', 'registration_required', 'invitation_only', 'date', 'created_at']
-    search_fields = ['title', 'description', 'location']
+    search_fields = ['title', 'location']  # description via the search index
     list_editable = ['category', 'is_featured', 'is_public', 'registration_required', 'invitation_only']
     date_hierarchy = 'date'
     ordering = ['-date']
-    actions = ['export_event_participant_list', 'export_event_participant_list_pdf']
+    actions = ['export_event_participant_list', 'export_event_participant_list_pdf', 'generate_event_certificates']
+    chunked_upload_fields = ('image',)
     
     class Media:
         js = ('admin/js/file_size_validator.js',)
@@ -108,15 +173,52 @@ class EventAdmin(FileUploadHelpMixin, admin.ModelAdmin):
     
     export_event_participant_list_pdf.short_description = "📄 Teilnehmerliste als PDF exportieren"
 
+    def generate_event_certificates(self, request, queryset):
+        """Create certificates for all confirmed participants and download them as ZIP"""
+        from django.contrib import messages
+        from django.http import FileResponse
+
+        if not REPORTLAB_AVAILABLE:
+            messages.error(request, "Zertifikate können nicht erstellt werden: ReportLab ist nicht installiert.")
+            return None
+
+        from .certificates import build_certificate_zip, generate_certificates
+
+        all_certificates = []
+        created_count = 0
+        for event in queryset.order_by('date'):
+            created, existing = generate_certificates(event)
+            created_count += len(created)
+            all_certificates.extend(existing + created)
+
+        if not all_certificates:
+            messages.warning(request, "Für die ausgewählten Veranstaltungen gibt es keine bestätigten Anmeldungen.")
+            return None
+
+        messages.success(
+            request,
+            f"{created_count} Zertifikat(e) erstellt, "
+            f"{len(all_certificates) - created_count} bereits vorhanden."
+        )
+        return FileResponse(
+            build_certificate_zip(all_certificates),
+            as_attachment=True,
+            filename='zertifikate.zip',
+            content_type='application/zip',
+        )
+
+    generate_event_certificates.short_description = "🎓 Zertifikate für bestätigte Teilnehmer erstellen"
+
 @admin.register(News)
-class NewsAdmin(FileUploadHelpMixin, admin.ModelAdmin):
+class NewsAdmin(SearchIndexAdminMixin, ChunkedUploadAdminMixin, FileUploadHelpMixin, admin.ModelAdmin):
     form = NewsAdminForm  # Use custom form with German date format
     list_display = ['title', 'published_date', 'is_featured', 'created_at']
     list_filter = ['is_featured', 'published_date', 'created_at']
-    search_fields = ['title', 'content']
+    search_fields = ['title']  # content via the search index
     list_editable = ['is_featured']
     date_hierarchy = 'published_date'
     ordering = ['-published_date']
+    chunked_upload_fields = ('image',)
     
     class Media:
         js = ('admin/js/file_size_validator.js',)
@@ -133,7 +235,7 @@ class TeamMemberAdmin(FileUploadHelpMixin, admin.ModelAdmin):
         js = ('admin/js/file_size_validator.js',)
 
 @admin.register(Gallery)
-class GalleryAdmin(FileUploadHelpMixin, admin.ModelAdmin):
+class GalleryAdmin(ChunkedUploadAdminMixin, FileUploadHelpMixin, admin.ModelAdmin):
     list_display = ['image_preview', 'title', 'event', 'created_at']
     list_display_links = ['image_preview', 'title']
     list_filter = ['event', 'created_at']
@@ -142,6 +244,7 @@ class GalleryAdmin(FileUploadHelpMixin, admin.ModelAdmin):
     ordering = ['-created_at']
     readonly_fields = ['image_preview_large']
     change_list_template = 'admin/main/gallery/change_list.html'
+    chunked_upload_fields = ('image',)
     
     class Media:
         js = ('admin/js/file_size_validator.js',)
@@ -182,27 +285,75 @@ class GalleryAdmin(FileUploadHelpMixin, admin.ModelAdmin):
     
     def get_urls(self):
         from django.urls import path
+        from django.views.decorators.csrf import csrf_exempt
         urls = super().get_urls()
         custom_urls = [
-            path('bulk-upload/', self.admin_site.admin_view(self.bulk_upload_view), name='gallery_bulk_upload'),
+            # csrf_exempt: the view swaps the upload handlers first and applies csrf_protect itself
+            path('bulk-upload/', self.admin_site.admin_view(csrf_exempt(self.bulk_upload_view)), name='gallery_bulk_upload'),
+            path('bulk-upload/<int:batch_id>/', self.admin_site.admin_view(self.bulk_upload_progress_view), name='gallery_bulk_upload_progress'),
+            path('bulk-upload/<int:batch_id>/status/', self.admin_site.admin_view(self.bulk_upload_status_view), name='gallery_bulk_upload_status'),
         ]
         return custom_urls + urls
     
     def bulk_upload_view(self, request):
         """Handle bulk image upload"""
+        from django.core.files.uploadhandler import TemporaryFileUploadHandler
+        from django.views.decorators.csrf import csrf_protect
+        
+        # Stream every uploaded file to a temporary file on disk instead of
+        # keeping up to FILE_UPLOAD_MAX_MEMORY_SIZE per photo in memory.
+        # Must happen before request.POST/FILES are accessed (hence csrf_exempt in get_urls).
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return csrf_protect(self._bulk_upload_view)(request)
+    
+    def _bulk_upload_view(self, request):
         from django.shortcuts import render, redirect
         from django.contrib import messages
+        from django.db import transaction
+        from PIL import Image
+        from .image_utils import process_uploaded_image
+        from django.conf import settings
+        from django.core.exceptions import ValidationError
+        from .models import EventAlbum, GalleryUploadBatch
+        from .uploads import AssembledUpload, completed_upload, discard
+        from . import workers
         import os
         
         if request.method == 'POST':
             form = GalleryBulkUploadForm(request.POST, request.FILES)
+            # Large batches come as ids of completed chunked uploads (admin/js/chunked_upload.js)
+            upload_ids = request.POST.getlist('images_upload')
+            if upload_ids:
+                form.fields['images'].required = False
             if form.is_valid():
                 files = request.FILES.getlist('images')
                 event = form.cleaned_data.get('event')
                 title_prefix = form.cleaned_data.get('title_prefix', '')
+                image_field = Gallery._meta.get_field('image')
+                
+                gallery_items = []
+                errors = []
+                chunked_uploads = []
+                for upload_id in upload_ids:
+                    try:
+                        upload = completed_upload(upload_id, request.user)
+                    except ValidationError as e:
+                        errors.append(f"{upload_id}: {e.messages[0]}")
+                        continue
+                    chunked_uploads.append((upload, AssembledUpload(upload)))
+                files += [file for _, file in chunked_uploads]
                 
-                success_count = 0
                 for uploaded_file in files:
+                    # Reject non-images early, a broken file must not abort the whole batch
+                    try:
+                        with Image.open(uploaded_file) as img:
+                            size = img.size
+                            img.verify()
+                        uploaded_file.seek(0)
+                    except Exception:
+                        errors.append(f"{uploaded_file.name}: Keine gültige Bilddatei")
+                        continue
+                    
                     # Generate title from filename if no prefix
                     filename = os.path.splitext(uploaded_file.name)[0]
                     if title_prefix:
@@ -211,28 +362,112 @@ class GalleryAdmin(FileUploadHelpMixin, admin.ModelAdmin):
                         # Clean up filename for title
                         title = filename.replace('_', ' ').replace('-', ' ').title()
                     
-                    Gallery.objects.create(
-                        title=title,
-                        image=uploaded_file,
+                    # Moves the temporary file into MEDIA_ROOT (no copy for FileSystemStorage)
+                    try:
+                        name = image_field.generate_filename(None, uploaded_file.name)
+                        name = image_field.storage.save(name, uploaded_file, max_length=image_field.max_length)
+                    except Exception as e:
+                        errors.append(f"{uploaded_file.name}: Speichern fehlgeschlagen ({e})")
+                        continue
+                    
+                    gallery_items.append(Gallery(title=title[:200], image=name, event=event,
+                                                 width=size[0], height=size[1]))
+                
+                for upload, file in chunked_uploads:
+                    file.close()
+                    discard(upload)
+                
+                with transaction.atomic():
+                    Gallery.objects.bulk_create(gallery_items, batch_size=100)
+                    # bulk_create sends no post_save, so update the album and version here
+                    if event and gallery_items:
+                        EventAlbum.refresh_for_event(event.pk)
+                    bump_version(Gallery)
+                    batch = GalleryUploadBatch.objects.create(
                         event=event,
+                        total=len(files) + len(upload_ids) - len(chunked_uploads),
+                        processed=len(errors),
+                        failed=len(errors),
+                        errors=''.join(f"{line}\n" for line in errors),
                     )
-                    success_count += 1
+                    if not gallery_items:
+                        batch.finished_at = batch.created_at
+                        batch.save(update_fields=['finished_at'])
+                    
+                    # Normalization and derivatives run in the worker pool after the response
+                    for item in gallery_items:
+                        transaction.on_commit(
+                            lambda name=item.image.name: workers.submit(
+                                process_uploaded_image, name, 'Gallery',
+                                callback=self._bulk_upload_callback(batch, name),
+                            )
+                        )
                 
-                messages.success(
-                    request,
-                    f'✅ {success_count} Bild(er) erfolgreich hochgeladen!'
-                )
-                return redirect('admin:main_gallery_changelist')
+                if gallery_items:
+                    messages.success(
+                        request,
+                        f'✅ {len(gallery_items)} Bild(er) erfolgreich hochgeladen! Die Bilder werden im Hintergrund optimiert.'
+                    )
+                if errors:
+                    messages.warning(
+                        request,
+                        f'⚠️ {len(errors)} Datei(en) konnten nicht hochgeladen werden.'
+                    )
+                return redirect('admin:gallery_bulk_upload_progress', batch_id=batch.pk)
         else:
             form = GalleryBulkUploadForm()
         
         context = {
             **self.admin_site.each_context(request),
             'form': form,
+            'chunk_size': settings.CHUNKED_UPLOAD_CHUNK_SIZE,
             'title': 'Bilder hochladen (Mehrfachauswahl)',
             'opts': self.model._meta,
         }
         return render(request, 'admin/main/gallery/bulk_upload.html', context)
+    
+    @staticmethod
+    def _bulk_upload_callback(batch, name):
+        """Record the result of one background job on the upload batch"""
+        import os
+        
+        def callback(result, error):
+            if result:
+                # Normalization may have rotated or downscaled the image
+                Gallery.objects.filter(image=name).update(width=result[0], height=result[1])
+                bump_version(Gallery)
+            batch.record_result(os.path.basename(name), str(error) if error else None)
+        return callback
+    
+    def bulk_upload_progress_view(self, request, batch_id):
+        """Progress page of a bulk upload"""
+        from django.shortcuts import render, get_object_or_404
+        from .models import GalleryUploadBatch
+        
+        batch = get_object_or_404(GalleryUploadBatch, pk=batch_id)
+        context = {
+            **self.admin_site.each_context(request),
+            'batch': batch,
+            'title': 'Bilder werden verarbeitet',
+            'opts': self.model._meta,
+        }
+        return render(request, 'admin/main/gallery/bulk_upload_progress.html', context)
+    
+    def bulk_upload_status_view(self, request, batch_id):
+        """JSON progress of a bulk upload, polled by the progress page"""
+        from django.http import JsonResponse
+        from django.shortcuts import get_object_or_404
+        from .models import GalleryUploadBatch
+        
+        batch = get_object_or_404(GalleryUploadBatch, pk=batch_id)
+        return JsonResponse({
+            'total': batch.total,
+            'processed': batch.processed,
+            'failed': batch.failed,
+            'percent': batch.progress_percent,
+            'finished': batch.is_finished,
+            'errors': batch.error_list,
+        })
 
 @admin.register(Contact)
 class ContactAdmin(admin.ModelAdmin):
@@ -340,11 +575,11 @@ class InvitationCodeAdmin(admin.ModelAdmin):
 
 
 @admin.register(EventRegistration)
-class EventRegistrationAdmin(admin.ModelAdmin):
+class EventRegistrationAdmin(SearchKeyAdminMixin, admin.ModelAdmin):
     form = EventRegistrationAdminForm  # Use custom form with validation
     list_display = ['full_name', 'email', 'event', 'invitation_code', 'is_confirmed', 'privacy_consent', 'newsletter_consent', 'photo_consent', 'created_at']
     list_filter = ['is_confirmed', 'privacy_consent', 'newsletter_consent', 'photo_consent', 'event', 'created_at']
-    search_fields = ['first_name', 'last_name', 'email', 'event__title', 'invitation_code__code']
+    search_fields = ['search_key']  # name, email, invitation code and event title, see SearchKeyAdminMixin
     list_editable = ['is_confirmed']
     readonly_fields = ['created_at']
     date_hierarchy = 'created_at'
@@ -872,14 +1107,15 @@ class EventRegistrationAdmin(admin.ModelAdmin):
 
 
 @admin.register(Document)
-class DocumentAdmin(FileUploadHelpMixin, admin.ModelAdmin):
+class DocumentAdmin(SearchIndexAdminMixin, ChunkedUploadAdminMixin, FileUploadHelpMixin, admin.ModelAdmin):
     list_display = ['title', 'category', 'file_extension', 'formatted_file_size', 'download_count', 'is_featured', 'is_public', 'created_at']
     list_filter = ['category', 'is_featured', 'is_public', 'created_at']
-    search_fields = ['title', 'description']
+    search_fields = ['title']  # description via the search index
     list_editable = ['category', 'is_featured', 'is_public']
     readonly_fields = ['file_size', 'download_count', 'created_at', 'updated_at']
     date_hierarchy = 'created_at'
     ordering = ['-created_at']
+    chunked_upload_fields = ('file',)
     
     class Media:
         js = ('admin/js/file_size_validator.js',)
@@ -907,10 +1143,10 @@ class DocumentAdmin(FileUploadHelpMixin, admin.ModelAdmin):
 
 
 @admin.register(Certificate)
-class CertificateAdmin(FileUploadHelpMixin, admin.ModelAdmin):
+class CertificateAdmin(SearchKeyAdminMixin, FileUploadHelpMixin, admin.ModelAdmin):
     list_display = ['participant_number', 'first_name', 'last_name', 'event_title', 'completion_date', 'created_at']
     list_filter = ['completion_date', 'event_title', 'created_at']
-    search_fields = ['first_name', 'last_name', 'participant_number', 'event_title']
+    search_fields = ['search_key']  # name, number and event title, see SearchKeyAdminMixin
     ordering = ['-completion_date', 'last_name', 'first_name']
     readonly_fields = ['created_at', 'updated_at']
     
@@ -922,7 +1158,7 @@ class CertificateAdmin(FileUploadHelpMixin, admin.ModelAdmin):
             'fields': ('first_name', 'last_name', 'participant_number')
         }),
         ('Veranstaltungsinformationen', {
-            'fields': ('event_title', 'completion_date')
+            'fields': ('event', 'event_title', 'completion_date')
         }),
         ('Zertifikat', {
             'fields': ('certificate_file',)
@@ -938,7 +1174,7 @@ class CertificateAdmin(FileUploadHelpMixin, admin.ModelAdmin):
 
 
 @admin.register(Announcement)
-class AnnouncementAdmin(FileUploadHelpMixin, admin.ModelAdmin):
+class AnnouncementAdmin(ChunkedUploadAdminMixin, FileUploadHelpMixin, admin.ModelAdmin):
     list_display = ['title', 'announcement_type', 'is_active', 'start_date', 'end_date', 'auto_close_seconds', 'is_currently_active_display']
     list_filter = ['is_active', 'announcement_type', 'start_date', 'end_date']
     search_fields = ['title', 'message']
@@ -946,6 +1182,7 @@ class AnnouncementAdmin(FileUploadHelpMixin, admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
     date_hierarchy = 'start_date'
     ordering = ['-start_date']
+    chunked_upload_fields = ('image', 'background_music')
     
     fieldsets = (
         ('Grundinformationen', {
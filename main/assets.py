@@ -0,0 +1,449 @@
+"""
+Build-time asset pipeline (``manage.py build_assets``).
+
+Every page loads one stylesheet and one script: static/css/style.css and
+static/js/main.js, followed by the page's own files if they exist, named
+after the page template - ``main/events.html`` uses
+``css/pages/events.css`` and ``js/pages/events.js``. The build minifies
+these into one bundle per page in ASSET_BUILD_DIR (static/build/, hashed by
+collectstatic like any other static file) and extracts the critical CSS of
+every page: the rules the markup above the fold needs (base layout and the
+page's first sections). The page inlines it and loads the full bundle
+without blocking rendering (templatetags/asset_tags.py).
+
+The minifiers only remove comments and whitespace; strings, regular
+expressions and line breaks in scripts are kept, so no Node toolchain is
+needed and automatic semicolon insertion still works.
+"""
+import functools
+import json
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template import engines
+from django.template.loader import get_template
+
+STYLESHEET = 'css/style.css'
+SCRIPT = 'js/main.js'
+PAGE_STYLESHEET = 'css/pages/{}.css'
+PAGE_SCRIPT = 'js/pages/{}.js'
+
+# ASSET_BUILD_DIR is served as static 'build/...'
+BUILD_PREFIX = 'build'
+MANIFEST_NAME = 'assets.json'
+# Bundle of pages without own files, and the manifest entry of unknown pages
+SITE_BUNDLE = 'site'
+DEFAULT_PAGE = 'default'
+
+# Sections of a page counted as above the fold
+FOLD_SECTIONS = 2
+
+BASE_TEMPLATE = 'base.html'
+EXTENDS_BASE = re.compile(r'{%\s*extends\s+["\']' + re.escape(BASE_TEMPLATE) + r'["\']\s*%}')
+
+
+def page_name(template_name):
+    """'main/events.html' -> 'events'"""
+    return os.path.splitext(os.path.basename(template_name))[0]
+
+
+def source_files(template_name):
+    """(stylesheets, scripts) of a page as static paths, in loading order"""
+    stylesheets = [STYLESHEET]
+    scripts = [SCRIPT]
+    if template_name:
+        name = page_name(template_name)
+        if finders.find(PAGE_STYLESHEET.format(name)):
+            stylesheets.append(PAGE_STYLESHEET.format(name))
+        if finders.find(PAGE_SCRIPT.format(name)):
+            scripts.append(PAGE_SCRIPT.format(name))
+    return stylesheets, scripts
+
+
+# Minification
+
+_CSS_STRINGS_AND_COMMENTS = re.compile(r'''("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')|/\*.*?\*/''', re.S)
+
+
+def minify_css(text):
+    strings = []
+
+    def protect(match):
+        if match.group(1):
+            strings.append(match.group(1))
+            return f'\x00{len(strings) - 1}\x00'
+        return ' '
+
+    text = _CSS_STRINGS_AND_COMMENTS.sub(protect, text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r' ?([{};,>~]) ?', r'\1', text)
+    # Not before ':' - 'a :hover' is not 'a:hover'
+    text = re.sub(r'([:(]) ', r'\1', text)
+    text = text.replace(' )', ')').replace(';}', '}')
+    text = re.sub('\x00(\\d+)\x00', lambda match: strings[int(match.group(1))], text)
+    return text.strip()
+
+
+# A '/' after these starts a regular expression, otherwise it is a division
+_JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_JS_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw',
+                      'instanceof', 'yield', 'await'}
+
+
+def _end_of_string(text, start):
+    """Index after the string or template literal starting at start"""
+    quote = text[start]
+    i = start + 1
+    while i < len(text):
+        char = text[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == quote:
+            return i + 1
+        if quote == '`' and text.startswith('${', i):
+            i = _end_of_substitution(text, i + 2)
+            continue
+        i += 1
+    return len(text)
+
+
+def _end_of_substitution(text, start):
+    """Index after the '}' closing a ${...} substitution"""
+    depth = 1
+    i = start
+    while i < len(text):
+        char = text[i]
+        if char in '\'"`':
+            i = _end_of_string(text, i)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(text)
+
+
+def _end_of_regex(text, start):
+    """Index after the regular expression literal starting at start, None if it is none"""
+    in_class = False
+    i = start + 1
+    while i < len(text):
+        char = text[i]
+        if char == '\n':
+            return None
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            while i < len(text) and (text[i].isalnum() or text[i] == '_'):
+                i += 1
+            return i
+        i += 1
+    return None
+
+
+def _regex_allowed(before):
+    before = before.rstrip()
+    if not before:
+        return True
+    last = before[-1]
+    if last in _JS_REGEX_PRECEDERS:
+        return True
+    if last.isalnum() or last in '_$':
+        return re.search(r'[\w$]+$', before).group() in _JS_REGEX_KEYWORDS
+    return False
+
+
+def minify_js(text):
+    out = []
+    code = []
+
+    def flush():
+        if code:
+            chunk = re.sub(r'[ \t]+', ' ', ''.join(code))
+            out.append(re.sub(r' ?\n\s*', '\n', chunk))
+            code.clear()
+
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char in '\'"`':
+            end = _end_of_string(text, i)
+            flush()
+            out.append(text[i:end])
+            i = end
+        elif text.startswith('//', i):
+            end = text.find('\n', i)
+            i = len(text) if end == -1 else end
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            end = len(text) if end == -1 else end + 2
+            code.append('\n' if '\n' in text[i:end] else ' ')
+            i = end
+        elif char == '/' and _regex_allowed(''.join(out[-1:] + code)):
+            end = _end_of_regex(text, i)
+            if end is None:
+                code.append(char)
+                i += 1
+            else:
+                flush()
+                out.append(text[i:end])
+                i = end
+        else:
+            code.append(char)
+            i += 1
+    flush()
+    return ''.join(out).strip()
+
+
+# Critical CSS
+
+def _matching_brace(text, start):
+    """Index of the '}' closing the '{' at start (strings are skipped)"""
+    depth = 0
+    i = start
+    while i < len(text):
+        char = text[i]
+        if char in '"\'':
+            i = _end_of_string(text, i)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(text)
+
+
+def parse_css(text):
+    """
+    Split minified CSS into rules (prelude, body): body is a list of rules
+    for @media/@supports, None for statements like @import, the declarations
+    otherwise.
+    """
+    rules = []
+    i = 0
+    while i < len(text):
+        brace = text.find('{', i)
+        if brace == -1:
+            break
+        *statements, prelude = text[i:brace].split(';')
+        rules.extend((statement.strip(), None) for statement in statements if statement.strip())
+        end = _matching_brace(text, brace)
+        body = text[brace + 1:end]
+        prelude = prelude.strip()
+        if prelude.startswith(('@media', '@supports')):
+            body = parse_css(body)
+        rules.append((prelude, body))
+        i = end + 1
+    return rules
+
+
+def serialize_css(rules):
+    parts = []
+    for prelude, body in rules:
+        if body is None:
+            parts.append(f'{prelude};')
+        elif isinstance(body, list):
+            parts.append(f'{prelude}{{{serialize_css(body)}}}')
+        else:
+            parts.append(f'{prelude}{{{body}}}')
+    return ''.join(parts)
+
+
+_TEMPLATE_SYNTAX = re.compile(r'{%.*?%}|{{.*?}}|{#.*?#}', re.S)
+_HTML_TAG = re.compile(r'<([a-zA-Z][\w-]*)([^>]*)>')
+_HTML_ATTRIBUTE = re.compile(r'\b(class|id)\s*=\s*["\']([^"\']*)["\']')
+
+
+def markup_tokens(markup):
+    """Element names ('tag:div'), classes ('.row') and ids ('#navbarNav') used in template markup"""
+    tokens = set()
+    for tag, attributes in _HTML_TAG.findall(_TEMPLATE_SYNTAX.sub(' ', markup)):
+        tokens.add(f'tag:{tag.lower()}')
+        for attribute, value in _HTML_ATTRIBUTE.findall(attributes):
+            prefix = '.' if attribute == 'class' else '#'
+            tokens.update(prefix + name for name in value.split())
+    return tokens
+
+
+def split_selectors(prelude):
+    """'a, :is(b, c)' -> ['a', ':is(b, c)']"""
+    selectors = []
+    depth = 0
+    current = ''
+    for char in prelude:
+        if char == ',' and depth == 0:
+            selectors.append(current.strip())
+            current = ''
+            continue
+        depth += (char == '(') - (char == ')')
+        current += char
+    selectors.append(current.strip())
+    return selectors
+
+
+def selector_matches(selector, tokens):
+    """True if all elements, classes and ids of selector occur in the markup"""
+    # Pseudo-classes/-elements with their arguments and attribute selectors do not narrow it down
+    simple = re.sub(r'::?[\w-]+(\([^)]*\))?|\[[^\]]*\]', ' ', selector)
+    for part in re.findall(r'[.#]?[\w-]+', simple):
+        token = part if part[0] in '.#' else f'tag:{part.lower()}'
+        if token not in tokens:
+            return False
+    return True
+
+
+def _critical_rules(rules, tokens):
+    kept = []
+    for prelude, body in rules:
+        if isinstance(body, list):
+            inner = _critical_rules(body, tokens)
+            if inner:
+                kept.append((prelude, inner))
+        elif prelude.startswith('@'):
+            # @keyframes are added if used, @font-face etc. come with the bundle
+            continue
+        elif any(selector_matches(selector, tokens) for selector in split_selectors(prelude)):
+            kept.append((prelude, body))
+    return kept
+
+
+def critical_css(css, markup):
+    """The rules of (minified) css that markup needs, with the @keyframes they use"""
+    rules = parse_css(css)
+    kept = serialize_css(_critical_rules(rules, markup_tokens(markup)))
+    animations = set()
+    for value in re.findall(r'animation(?:-name)?:([^;}]*)', kept):
+        animations.update(re.findall(r'[\w-]+', value))
+    keyframes = [(prelude, body) for prelude, body in rules
+                 if re.match(r'@(-webkit-)?keyframes ', prelude) and prelude.split()[-1] in animations]
+    return kept + serialize_css(keyframes)
+
+
+def above_the_fold(template_name):
+    """
+    Markup a page shows first: the base template down to the content block
+    and the page's content block down to the end of its FOLD_SECTIONS-th
+    section (the page header and what follows it).
+    """
+    source = get_template(template_name).template.source
+    base = ''
+    if EXTENDS_BASE.search(source):
+        base = get_template(BASE_TEMPLATE).template.source
+        base = base.split('{% block content %}')[0]
+        source = source.partition('{% block content %}')[2] or source
+    end = 0
+    for _ in range(FOLD_SECTIONS):
+        end = source.find('</section>', end)
+        if end == -1:
+            return base + source
+        end += len('</section>')
+    return base + source[:end]
+
+
+def page_templates():
+    """Names of all templates extending base.html in the template directories"""
+    names = set()
+    for directory in engines['django'].engine.dirs:
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if not filename.endswith('.html'):
+                    continue
+                path = os.path.join(root, filename)
+                with open(path, encoding='utf-8') as f:
+                    if EXTENDS_BASE.search(f.read()):
+                        names.add(os.path.relpath(path, directory).replace(os.sep, '/'))
+    return sorted(names)
+
+
+# Build
+
+def _read_static(path):
+    with open(finders.find(path), encoding='utf-8') as f:
+        return f.read()
+
+
+def build_assets(output_dir=None):
+    """
+    Write the bundles and the manifest into output_dir (ASSET_BUILD_DIR).
+    Returns {(kind, bundle name): (source bytes, minified bytes)} for reporting.
+    """
+    output_dir = str(output_dir or settings.ASSET_BUILD_DIR)
+    for kind in ('css', 'js'):
+        os.makedirs(os.path.join(output_dir, kind), exist_ok=True)
+        # Bundles of removed pages
+        for filename in os.listdir(os.path.join(output_dir, kind)):
+            os.remove(os.path.join(output_dir, kind, filename))
+
+    sizes = {}
+    stylesheets = {}
+
+    def bundle(kind, paths, minify, separator):
+        """Static path of the bundle of paths (page bundles are named after the page's own file)"""
+        name = page_name(paths[-1]) if len(paths) > 1 else SITE_BUNDLE
+        if (kind, name) not in sizes:
+            sources = [_read_static(path) for path in paths]
+            content = separator.join(minify(source) for source in sources)
+            with open(os.path.join(output_dir, kind, f'{name}.{kind}'), 'w', encoding='utf-8') as f:
+                f.write(content)
+            sizes[kind, name] = (sum(len(source.encode()) for source in sources), len(content.encode()))
+            if kind == 'css':
+                stylesheets[name] = content
+        return name
+
+    manifest = {'pages': {}}
+    for template_name in page_templates() + [None]:
+        css_files, js_files = source_files(template_name)
+        css = bundle('css', css_files, minify_css, '')
+        js = bundle('js', js_files, minify_js, ';\n')
+        markup = above_the_fold(template_name) if template_name else get_template(BASE_TEMPLATE).template.source
+        manifest['pages'][template_name or DEFAULT_PAGE] = {
+            'css': f'{BUILD_PREFIX}/css/{css}.css',
+            'js': f'{BUILD_PREFIX}/js/{js}.js',
+            'critical': critical_css(stylesheets[css], markup),
+        }
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, sort_keys=True)
+    load_manifest.cache_clear()
+    return sizes
+
+
+@functools.lru_cache(maxsize=None)
+def load_manifest():
+    """The build manifest, read once per process; None without a build"""
+    try:
+        with open(os.path.join(settings.ASSET_BUILD_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def page_assets(template_name):
+    """Built {'css', 'js', 'critical'} of a page, None in development or without a build"""
+    manifest = None if settings.DEBUG else load_manifest()
+    if not manifest:
+        return None
+    return manifest['pages'].get(template_name) or manifest['pages'][DEFAULT_PAGE]
+
+
+@receiver(setting_changed)
+def _reset_manifest(setting, **kwargs):
+    if setting == 'ASSET_BUILD_DIR':
+        load_manifest.cache_clear()
@@ -0,0 +1,223 @@
+"""
+Bulk certificate generation for the confirmed participants of an event.
+
+Participant numbers are assigned per event (LZ-<year>-<event>-<nr>), the
+PDFs are rendered with ReportLab in the worker pool (main/workers.py), the
+Certificate rows are written with one bulk_create and all certificates of the
+event are returned as a ZIP archive.
+"""
+import os
+import re
+import zipfile
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import cm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from . import workers
+from .models import Certificate
+from .search import make_search_key
+from .versions import bump_version
+
+PARTICIPANT_NUMBER_PREFIX = 'LZ'
+ORGANIZATION_NAME = 'Lesezirkel der Friedensstadt Osnabrück e.V.'
+PRIMARY_COLOR = colors.HexColor('#1f4e79')
+
+
+def participant_number_prefix(event):
+    return f"{PARTICIPANT_NUMBER_PREFIX}-{event.date:%Y}-{event.pk:04d}-"
+
+
+def allocate_participant_numbers(event, count):
+    """count new, consecutive participant numbers for the event"""
+    prefix = participant_number_prefix(event)
+    existing = Certificate.objects.filter(participant_number__startswith=prefix).values_list('participant_number', flat=True)
+    last = max((int(number[len(prefix):]) for number in existing if number[len(prefix):].isdigit()), default=0)
+    return [f"{prefix}{last + i:03d}" for i in range(1, count + 1)]
+
+
+def _fonts():
+    """(regular, bold) font names; CERTIFICATE_FONT(_BOLD) may point to TTF files for full Unicode"""
+    regular, bold = 'Helvetica', 'Helvetica-Bold'
+    for setting, name in (('CERTIFICATE_FONT', 'CertificateFont'), ('CERTIFICATE_FONT_BOLD', 'CertificateFontBold')):
+        path = getattr(settings, setting, '')
+        if path and os.path.exists(path):
+            if name not in pdfmetrics.getRegisteredFontNames():
+                pdfmetrics.registerFont(TTFont(name, path))
+            if setting == 'CERTIFICATE_FONT':
+                regular = name
+            else:
+                bold = name
+    return regular, bold
+
+
+def render_certificate_pdf(data):
+    """
+    Render one certificate (A4 landscape) and return the PDF bytes.
+    Runs in the worker pool: data is a plain dict, no database access.
+    """
+    regular, bold = _fonts()
+    buffer = BytesIO()
+    width, height = landscape(A4)
+    pdf = canvas.Canvas(buffer, pagesize=(width, height))
+    pdf.setTitle(f"Teilnahmebescheinigung {data['first_name']} {data['last_name']}")
+    pdf.setAuthor(ORGANIZATION_NAME)
+
+    # Frame
+    pdf.setStrokeColor(PRIMARY_COLOR)
+    pdf.setLineWidth(3)
+    pdf.rect(1.2 * cm, 1.2 * cm, width - 2.4 * cm, height - 2.4 * cm)
+    pdf.setLineWidth(0.8)
+    pdf.rect(1.5 * cm, 1.5 * cm, width - 3 * cm, height - 3 * cm)
+
+    logo = data.get('logo_path')
+    if logo and os.path.exists(logo):
+        pdf.drawImage(logo, width / 2 - 1.5 * cm, height - 5.2 * cm, 3 * cm, 3 * cm,
+                      preserveAspectRatio=True, mask='auto')
+
+    center = width / 2
+    pdf.setFillColor(colors.HexColor('#555555'))
+    pdf.setFont(regular, 13)
+    pdf.drawCentredString(center, height - 6 * cm, ORGANIZATION_NAME)
+
+    pdf.setFillColor(PRIMARY_COLOR)
+    pdf.setFont(bold, 34)
+    pdf.drawCentredString(center, height - 7.8 * cm, 'TEILNAHMEBESCHEINIGUNG')
+
+    pdf.setFillColor(colors.black)
+    pdf.setFont(regular, 14)
+    pdf.drawCentredString(center, height - 9.4 * cm, 'Hiermit wird bestätigt, dass')
+    pdf.setFont(bold, 26)
+    pdf.drawCentredString(center, height - 11 * cm, f"{data['first_name']} {data['last_name']}")
+    pdf.setFont(regular, 14)
+    pdf.drawCentredString(center, height - 12.4 * cm, 'an der Veranstaltung')
+    pdf.setFont(bold, 18)
+    pdf.drawCentredString(center, height - 13.6 * cm, data['event_title'])
+    pdf.setFont(regular, 14)
+    place = f" in {data['location']}" if data.get('location') else ''
+    pdf.drawCentredString(center, height - 14.8 * cm, f"am {data['date']}{place} teilgenommen hat.")
+
+    # Signature line and participant number
+    pdf.setLineWidth(0.5)
+    pdf.setStrokeColor(colors.black)
+    pdf.line(width - 10 * cm, 3.6 * cm, width - 3 * cm, 3.6 * cm)
+    pdf.setFont(regular, 10)
+    pdf.drawCentredString(width - 6.5 * cm, 3.1 * cm, 'Für den Vorstand')
+    pdf.drawString(3 * cm, 3.1 * cm, f"Osnabrück, {data['issued']}")
+    pdf.setFillColor(colors.HexColor('#777777'))
+    pdf.setFont(regular, 9)
+    pdf.drawString(3 * cm, 2.2 * cm, f"Teilnehmernummer: {data['participant_number']}")
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def certificate_filename(certificate):
+    """Archive/download name: Nachname_Vorname_<Nummer>.pdf"""
+    name = f"{certificate.last_name}_{certificate.first_name}_{certificate.participant_number}"
+    return re.sub(r'[^\w.-]+', '_', name) + '.pdf'
+
+
+def generate_certificates(event, completion_date=None):
+    """
+    Create the missing certificates of all confirmed registrations of an event.
+    Returns (created, existing): lists of Certificate objects.
+    """
+    completion_date = completion_date or timezone.localtime(event.date).date()
+    registrations = list(
+        event.registrations.filter(is_confirmed=True).order_by('last_name', 'first_name', 'pk')
+    )
+
+    # Participants who already have a certificate for this event are skipped. Certificates
+    # created before the event link existed are matched by title and date instead.
+    existing = {
+        make_search_key(certificate.last_name, certificate.first_name): certificate
+        for certificate in Certificate.objects.filter(
+            Q(event=event) | Q(event__isnull=True, event_title=event.title, completion_date=completion_date)
+        )
+    }
+    missing, found = [], []
+    for registration in registrations:
+        certificate = existing.get(make_search_key(registration.last_name, registration.first_name))
+        if certificate is None:
+            missing.append(registration)
+        elif certificate not in found:
+            found.append(certificate)
+    if not missing:
+        return [], found
+
+    numbers = allocate_participant_numbers(event, len(missing))
+    logo_path = os.path.join(settings.BASE_DIR, 'static', 'images', 'logo.jpeg')
+    issued = timezone.localdate().strftime('%d.%m.%Y')
+    jobs = [
+        {
+            'first_name': registration.first_name,
+            'last_name': registration.last_name,
+            'participant_number': number,
+            'event_title': event.title,
+            'location': event.location,
+            'date': completion_date.strftime('%d.%m.%Y'),
+            'issued': issued,
+            'logo_path': logo_path,
+        }
+        for registration, number in zip(missing, numbers)
+    ]
+    pdfs = workers.map_jobs(render_certificate_pdf, jobs, chunksize=10)
+
+    file_field = Certificate._meta.get_field('certificate_file')
+    certificates = []
+    try:
+        for job, pdf in zip(jobs, pdfs):
+            certificate = Certificate(
+                first_name=job['first_name'],
+                last_name=job['last_name'],
+                participant_number=job['participant_number'],
+                event=event,
+                event_title=event.title,
+                completion_date=completion_date,
+            )
+            name = file_field.generate_filename(certificate, certificate_filename(certificate))
+            certificate.certificate_file.name = file_field.storage.save(name, ContentFile(pdf))
+            # bulk_create skips save(), which normally fills the search key
+            certificate.search_key = certificate.build_search_key()
+            certificate._pdf = pdf
+            certificates.append(certificate)
+
+        with transaction.atomic():
+            Certificate.objects.bulk_create(certificates, batch_size=200)
+        bump_version(Certificate)
+    except Exception:
+        for certificate in certificates:
+            file_field.storage.delete(certificate.certificate_file.name)
+        raise
+
+    return certificates, found
+
+
+def build_certificate_zip(certificates):
+    """ZIP archive (file object, positioned at 0) with the PDFs of the certificates"""
+    archive = SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+    # PDFs are compressed already, storing them is much faster than deflating again
+    with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for certificate in certificates:
+            data = getattr(certificate, '_pdf', None)
+            if data is None:
+                try:
+                    with certificate.certificate_file.open('rb') as f:
+                        data = f.read()
+                except (FileNotFoundError, ValueError):
+                    continue
+            zf.writestr(certificate_filename(certificate), data)
+    archive.seek(0)
+    return archive
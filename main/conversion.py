@@ -0,0 +1,339 @@
+"""
+Document to PDF conversion with pluggable backends and a store of converted PDFs.
+
+Backends are tried in the order configured per file extension
+(DOCUMENT_CONVERTER_BACKENDS); backends that are not available on this host
+(e.g. LibreOffice not installed) are skipped. The first PDF produced is kept
+as converted/<sha256 of the source>.pdf, so every file is converted only once.
+
+The built-in converter parses untrusted uploads, so it runs in a sandbox
+process with memory/CPU limits and a wall-clock timeout (CONVERSION_*
+settings). Waiting for free slots and running all backends tried for one file
+share a deadline (CONVERSION_TIME_BUDGET), which keeps a conversion during a
+download within the gunicorn worker timeout. A file that cannot be converted
+gets the error PDF stored under its hash, so it is not attempted again on
+every download.
+"""
+import functools
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKENDS = ['reportlab']
+CONVERTED_PDF_DIR = 'converted'
+
+_backends = {}
+
+
+class ConversionError(Exception):
+    """A backend could not convert the file"""
+
+
+class ConversionBusy(ConversionError):
+    """No conversion slot became free in time - try again later"""
+
+
+def register_backend(name):
+    """Class decorator: make a backend available under name for DOCUMENT_CONVERTER_BACKENDS"""
+    def decorator(cls):
+        _backends[name] = cls()
+        return cls
+    return decorator
+
+
+def get_backend(name):
+    try:
+        return _backends[name]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown document converter backend '{name}'")
+
+
+def backends_for(extension):
+    """Available backends for a file extension ('.docx'), in configured order"""
+    configured = getattr(settings, 'DOCUMENT_CONVERTER_BACKENDS', {})
+    names = configured.get(extension.lower(), DEFAULT_BACKENDS)
+    return [backend for backend in map(get_backend, names) if backend.is_available()]
+
+
+def _limit_resources(memory_limit, cpu_limit):
+    """Applied in the sandbox process; the memory limit comes on top of what it already maps"""
+    import resource
+
+    if memory_limit:
+        limit = _address_space_size() + memory_limit
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_limit:
+        # SIGXCPU at the soft limit, SIGKILL at the hard limit
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
+
+
+def _address_space_size():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmSize:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _sandbox_main(connection, fn, args, memory_limit, cpu_limit):
+    try:
+        _limit_resources(memory_limit, cpu_limit)
+        connection.send((True, fn(*args)))
+    except BaseException as e:
+        connection.send((False, f'{type(e).__name__}: {e}'))
+    finally:
+        connection.close()
+
+
+def conversion_deadline():
+    """time.monotonic() by which a conversion started now must be done"""
+    return time.monotonic() + getattr(settings, 'CONVERSION_TIME_BUDGET', 20)
+
+
+def acquire_slot(slots, run_timeout, deadline, busy_message):
+    """Wait for a slot only as long as a full run of run_timeout seconds still fits before the deadline"""
+    wait = deadline - time.monotonic() - run_timeout
+    if wait < 0 or not slots.acquire(timeout=wait):
+        raise ConversionBusy(busy_message)
+
+
+_sandbox_slots = None
+_sandbox_lock = threading.Lock()
+
+
+def _get_sandbox_slots():
+    global _sandbox_slots
+    with _sandbox_lock:
+        if _sandbox_slots is None:
+            _sandbox_slots = threading.BoundedSemaphore(getattr(settings, 'CONVERSION_MAX_PROCESSES', 2))
+        return _sandbox_slots
+
+
+def run_sandboxed(fn, *args, deadline=None):
+    """
+    fn(*args) in a fresh child process with CONVERSION_MEMORY_LIMIT (bytes) and
+    CONVERSION_CPU_LIMIT (seconds), killed after CONVERSION_TIMEOUT seconds.
+    At most CONVERSION_MAX_PROCESSES run at a time; raises ConversionBusy if no
+    slot is free while a full run still fits before the deadline (default:
+    conversion_deadline()). Raises ConversionError.
+
+    A fresh process per job (not a long-lived pool) because the CPU limit
+    counts the whole lifetime of a process.
+    """
+    if not getattr(settings, 'CONVERSION_SANDBOX', True):
+        return fn(*args)
+
+    timeout = getattr(settings, 'CONVERSION_TIMEOUT', 10)
+    slots = _get_sandbox_slots()
+    acquire_slot(slots, timeout, deadline or conversion_deadline(), 'All conversion processes are busy')
+    try:
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_sandbox_main,
+            args=(sender, fn, args,
+                  getattr(settings, 'CONVERSION_MEMORY_LIMIT', 512 * 1024 * 1024),
+                  getattr(settings, 'CONVERSION_CPU_LIMIT', 20)),
+            daemon=True,
+        )
+        process.start()
+        sender.close()
+        try:
+            if not receiver.poll(timeout):
+                raise ConversionError(f'Conversion timed out after {timeout} s')
+            ok, result = receiver.recv()
+        except EOFError:
+            # Killed by a resource limit before it could report
+            process.join(1)
+            raise ConversionError(f'Conversion process died (exit code {process.exitcode})')
+        finally:
+            if process.is_alive():
+                process.kill()
+            process.join()
+            receiver.close()
+    finally:
+        slots.release()
+
+    if not ok:
+        raise ConversionError(result)
+    return result
+
+
+def _convert_with_reportlab(path, filename):
+    from .document_utils import DocumentConverter
+    return DocumentConverter.convert_to_pdf(path, filename).getvalue()
+
+
+@register_backend('reportlab')
+class ReportLabBackend:
+    """Built-in pure-Python conversion (main/document_utils.py), sandboxed"""
+
+    def is_available(self):
+        return True
+
+    def convert(self, path, filename, deadline):
+        return run_sandboxed(_convert_with_reportlab, path, filename, deadline=deadline)
+
+
+@register_backend('soffice')
+class SofficeBackend:
+    """
+    LibreOffice in headless mode. At most SOFFICE_MAX_PROCESSES conversions
+    run at a time; each is killed after SOFFICE_TIMEOUT seconds and only
+    started if that still fits before the deadline of convert_file().
+    """
+
+    def __init__(self):
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def binary(self):
+        return shutil.which(getattr(settings, 'SOFFICE_BINARY', 'soffice'))
+
+    def is_available(self):
+        return self.binary() is not None
+
+    def _get_slots(self):
+        with self._lock:
+            if self._slots is None:
+                self._slots = threading.BoundedSemaphore(getattr(settings, 'SOFFICE_MAX_PROCESSES', 2))
+            return self._slots
+
+    def convert(self, path, filename, deadline):
+        timeout = getattr(settings, 'SOFFICE_TIMEOUT', 10)
+        slots = self._get_slots()
+        acquire_slot(slots, timeout, deadline, 'LibreOffice is busy')
+        try:
+            return self._run(path, filename, timeout)
+        finally:
+            slots.release()
+
+    def _run(self, path, filename, timeout):
+        with tempfile.TemporaryDirectory(prefix='soffice-') as workdir:
+            source = os.path.join(workdir, 'source' + os.path.splitext(filename)[1].lower())
+            shutil.copyfile(path, source)
+            command = [
+                self.binary(), '--headless', '--norestore', '--nologo',
+                # A profile per run: instances sharing one block each other
+                f'-env:UserInstallation=file://{workdir}/profile',
+                '--convert-to', 'pdf', '--outdir', workdir, source,
+            ]
+            # Own session, so the whole process group can be killed on timeout
+            process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                       start_new_session=True)
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+                raise ConversionError(f'LibreOffice timed out after {timeout} s')
+
+            output = os.path.join(workdir, 'source.pdf')
+            if process.returncode != 0 or not os.path.exists(output):
+                raise ConversionError(f'LibreOffice failed (exit code {process.returncode})')
+            with open(output, 'rb') as f:
+                return f.read()
+
+
+def file_sha256(file):
+    """Hex SHA-256 of a (field) file, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    if getattr(file, '_committed', False):
+        file.close()
+    return digest.hexdigest()
+
+
+def convert_file(path, filename):
+    """PDF bytes of the file, from the first configured backend that succeeds"""
+    extension = os.path.splitext(filename)[1].lower()
+    deadline = conversion_deadline()
+    errors = []
+    busy = False
+    for backend in backends_for(extension):
+        try:
+            return backend.convert(path, filename, deadline)
+        except ConversionError as e:
+            logger.warning('%s could not convert %s: %s', type(backend).__name__, filename, e)
+            errors.append(str(e))
+            busy = busy or isinstance(e, ConversionBusy)
+    message = '; '.join(errors) or f'No converter available for {extension}'
+    # A busy backend might have succeeded: the failure is not final then
+    raise (ConversionBusy if busy else ConversionError)(message)
+
+
+@functools.lru_cache(maxsize=None)
+def error_pdf():
+    """PDF delivered instead of a document that cannot be converted (built once per process)"""
+    from .document_utils import DocumentConverter
+    return DocumentConverter._create_error_pdf(
+        "This document could not be converted to PDF. Please contact us to receive the original file."
+    ).getvalue()
+
+
+def converted_pdf_name(document):
+    return f'{CONVERTED_PDF_DIR}/{document.file_hash}.pdf'
+
+
+def cached_pdf_name(document):
+    """Storage name of the PDF version of document.file if it exists already, else None"""
+    if document.file_extension == '.pdf':
+        return document.file.name
+    if document.file_hash:
+        name = converted_pdf_name(document)
+        if document.file.storage.exists(name):
+            return name
+    return None
+
+
+def get_converted_pdf(document):
+    """Storage name of the PDF version of document.file, converted on first use"""
+    if document.file_extension == '.pdf':
+        return document.file.name
+
+    if not document.file_hash:
+        document.file_hash = file_sha256(document.file)
+        type(document).objects.filter(pk=document.pk).update(file_hash=document.file_hash)
+        bump_version(type(document))
+
+    storage = document.file.storage
+    name = converted_pdf_name(document)
+    if storage.exists(name):
+        return name
+
+    try:
+        pdf = convert_file(document.file.path, os.path.basename(document.file.name))
+    except ConversionBusy:
+        raise
+    except ConversionError as e:
+        logger.error('Document %s could not be converted: %s', document.pk, e)
+        pdf = error_pdf()
+    return save_converted_pdf(storage, name, pdf)
+
+
+def save_converted_pdf(storage, name, pdf):
+    """Store a converted PDF under name, unless a concurrent conversion did already"""
+    saved = storage.save(name, ContentFile(pdf))
+    if saved != name:
+        # Converted by a concurrent request in the meantime
+        storage.delete(saved)
+    return name
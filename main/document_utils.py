@@ -1,18 +1,49 @@
 import os
 import tempfile
 from io import BytesIO
+from xml.sax.saxutils import escape
+from django.conf import settings
 from django.http import HttpResponse
 from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, A4, landscape
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, LongTable, TableStyle
 from reportlab.lib.units import inch
 from docx import Document as DocxDocument
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml.ns import qn
+from docx.table import Table as DocxTable
+from docx.text.paragraph import Paragraph as DocxParagraph
 from openpyxl import load_workbook
 from pptx import Presentation
 import PyPDF2
 
 
+# Word paragraph styles mapped to ReportLab sample styles
+DOCX_HEADING_STYLES = {
+    'Title': 'Title',
+    'Subtitle': 'Heading2',
+    'Heading 1': 'Heading1',
+    'Heading 2': 'Heading2',
+    'Heading 3': 'Heading3',
+    'Heading 4': 'Heading4',
+    'Heading 5': 'Heading5',
+    'Heading 6': 'Heading6',
+}
+
+# Consecutive body paragraphs are merged into one flowable (instead of a
+# Paragraph plus Spacer each). Keep it small: a flowable that is split across
+# pages is wrapped again for every page
+DOCX_PARAGRAPH_BATCH_SIZE = 5
+
+# Spreadsheets: rows per LongTable and maximum characters per cell. Row,
+# column and sheet limits are the SPREADSHEET_MAX_* settings
+SPREADSHEET_TABLE_CHUNK_ROWS = 200
+SPREADSHEET_CELL_MAX_CHARS = 100
+
+
 class DocumentConverter:
     """Utility class for converting various document formats to PDF"""
     
@@ -47,7 +78,7 @@ class DocumentConverter:
     
     @staticmethod
     def _convert_docx_to_pdf(file_path):
-        """Convert DOCX to PDF"""
+        """Convert DOCX to PDF: paragraphs, headings, tables and images in document order"""
         try:
             doc = DocxDocument(file_path)
             buffer = BytesIO()
@@ -55,14 +86,48 @@ class DocumentConverter:
             # Create PDF document
             pdf_doc = SimpleDocTemplate(buffer, pagesize=A4)
             styles = getSampleStyleSheet()
+            body_style = ParagraphStyle('DocxBody', parent=styles['Normal'], spaceAfter=8)
+            cell_style = ParagraphStyle('DocxCell', parent=styles['Normal'], fontSize=9, leading=11)
             story = []
+            batch = []
+            # paragraph.style looks the style up in styles.xml on every access,
+            # which dominates the conversion time of long documents
+            style_names = {style.style_id: style.name for style in doc.styles}
+            default_style = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+            style_names[None] = default_style.name if default_style is not None else ''
             
-            # Add document content
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    p = Paragraph(paragraph.text, styles['Normal'])
-                    story.append(p)
-                    story.append(Spacer(1, 12))
+            def flush():
+                if batch:
+                    story.append(Paragraph('<br/><br/>'.join(batch), body_style))
+                    batch.clear()
+            
+            for block in DocumentConverter._iter_docx_blocks(doc):
+                if isinstance(block, DocxTable):
+                    flush()
+                    table = DocumentConverter._docx_table(block, cell_style, pdf_doc.width)
+                    if table is not None:
+                        story.append(table)
+                        story.append(Spacer(1, 12))
+                    continue
+                
+                images = DocumentConverter._docx_images(doc, block, pdf_doc.width, pdf_doc.height)
+                markup = DocumentConverter._docx_markup(block)
+                if images:
+                    flush()
+                if markup:
+                    word_style = style_names.get(block._p.style, '')
+                    style_name = DOCX_HEADING_STYLES.get(word_style)
+                    if style_name:
+                        flush()
+                        story.append(Paragraph(markup, styles[style_name]))
+                    else:
+                        if word_style.startswith('List'):
+                            markup = '&bull; ' + markup
+                        batch.append(markup)
+                        if len(batch) >= DOCX_PARAGRAPH_BATCH_SIZE:
+                            flush()
+                story.extend(images)
+            flush()
             
             pdf_doc.build(story)
             buffer.seek(0)
@@ -71,33 +136,115 @@ class DocumentConverter:
         except Exception as e:
             return DocumentConverter._create_error_pdf(f"DOCX Conversion Error: {str(e)}")
     
+    @staticmethod
+    def _iter_docx_blocks(doc):
+        """Paragraphs and tables of the document body in their original order"""
+        for child in doc.element.body.iterchildren():
+            if child.tag == qn('w:p'):
+                yield DocxParagraph(child, doc)
+            elif child.tag == qn('w:tbl'):
+                yield DocxTable(child, doc)
+    
+    @staticmethod
+    def _docx_markup(paragraph):
+        """ReportLab paragraph markup with bold/italic/underline of the runs"""
+        parts = []
+        for run in paragraph.runs:
+            text = escape(run.text)
+            if not text:
+                continue
+            if run.bold:
+                text = f'<b>{text}</b>'
+            if run.italic:
+                text = f'<i>{text}</i>'
+            if run.underline:
+                text = f'<u>{text}</u>'
+            parts.append(text)
+        markup = ''.join(parts)
+        return markup if markup.strip() else ''
+    
+    @staticmethod
+    def _docx_images(doc, paragraph, max_width, max_height):
+        """Inline images of a paragraph as ReportLab Image flowables (scaled to the frame)"""
+        images = []
+        for blip in paragraph._p.iter(qn('a:blip')):
+            part = doc.part.related_parts.get(blip.get(qn('r:embed')))
+            if part is None:
+                continue
+            try:
+                data = BytesIO(part.blob)
+                width, height = ImageReader(data).getSize()
+            except Exception:
+                # Formats ReportLab cannot draw (EMF/WMF) are left out
+                continue
+            scale = min(1, max_width / width, max_height / 2 / height)
+            data.seek(0)
+            images.append(Image(data, width * scale, height * scale))
+        return images
+    
+    @staticmethod
+    def _docx_table(table, cell_style, available_width):
+        """Word table as ReportLab Table; merged cells are only filled once"""
+        seen = set()
+        rows = []
+        for row in table.rows:
+            cells = []
+            for cell in row.cells:
+                if cell._tc in seen:
+                    cells.append('')
+                    continue
+                seen.add(cell._tc)
+                text = '<br/>'.join(escape(p.text) for p in cell.paragraphs if p.text.strip())
+                cells.append(Paragraph(text, cell_style) if text else '')
+            rows.append(cells)
+        if not rows:
+            return None
+        
+        column_count = max(len(cells) for cells in rows)
+        if not column_count:
+            return None
+        for cells in rows:
+            cells.extend([''] * (column_count - len(cells)))
+        
+        pdf_table = Table(rows, colWidths=[available_width / column_count] * column_count, repeatRows=1)
+        pdf_table.setStyle(TableStyle([
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#eeeeee')),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]))
+        return pdf_table
+    
     @staticmethod
     def _convert_excel_to_pdf(file_path):
-        """Convert Excel to PDF"""
+        """
+        Convert Excel to PDF. The workbook is streamed (read-only mode) and
+        every sheet is rendered as a series of tables; rows, columns and
+        sheets beyond the configured limits are left out with a notice.
+        """
+        max_sheets = getattr(settings, 'SPREADSHEET_MAX_SHEETS', 10)
+        max_rows = getattr(settings, 'SPREADSHEET_MAX_ROWS', 2000)
+        max_columns = getattr(settings, 'SPREADSHEET_MAX_COLUMNS', 30)
+        wb = None
         try:
-            wb = load_workbook(file_path)
+            wb = load_workbook(file_path, read_only=True, data_only=True)
             buffer = BytesIO()
             
-            pdf_doc = SimpleDocTemplate(buffer, pagesize=A4)
+            pdf_doc = SimpleDocTemplate(buffer, pagesize=landscape(A4),
+                                        leftMargin=36, rightMargin=36, topMargin=36, bottomMargin=36)
             styles = getSampleStyleSheet()
             story = []
             
-            for sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
+            for sheet_number, ws in enumerate(wb.worksheets):
+                if sheet_number >= max_sheets:
+                    story.append(Paragraph(
+                        f"{len(wb.worksheets) - max_sheets} more sheet(s) not shown (limit: {max_sheets} sheets).",
+                        styles['Italic']))
+                    break
                 
                 # Add sheet title
-                title = Paragraph(f"Sheet: {sheet_name}", styles['Heading1'])
-                story.append(title)
+                story.append(Paragraph(f"Sheet: {escape(ws.title)}", styles['Heading1']))
                 story.append(Spacer(1, 12))
-                
-                # Add sheet data
-                for row in ws.iter_rows(values_only=True):
-                    row_text = " | ".join([str(cell) if cell is not None else "" for cell in row])
-                    if row_text.strip():
-                        p = Paragraph(row_text, styles['Normal'])
-                        story.append(p)
-                        story.append(Spacer(1, 6))
-                
+                story.extend(DocumentConverter._sheet_tables(ws, styles, pdf_doc.width, max_rows, max_columns))
                 story.append(Spacer(1, 24))
             
             pdf_doc.build(story)
@@ -106,6 +253,71 @@ class DocumentConverter:
             
         except Exception as e:
             return DocumentConverter._create_error_pdf(f"Excel Conversion Error: {str(e)}")
+        finally:
+            if wb is not None:
+                # Read-only workbooks keep the file open
+                wb.close()
+    
+    @staticmethod
+    def _sheet_tables(ws, styles, available_width, max_rows, max_columns):
+        """Flowables for one worksheet: LongTables of SPREADSHEET_TABLE_CHUNK_ROWS rows plus notices"""
+        rows = []
+        column_count = 0
+        truncated_rows = truncated_columns = False
+        for values in ws.iter_rows(values_only=True):
+            cells = ['' if value is None else str(value)[:SPREADSHEET_CELL_MAX_CHARS] for value in values]
+            while cells and not cells[-1].strip():
+                cells.pop()
+            if not cells:
+                continue
+            if len(rows) >= max_rows:
+                truncated_rows = True
+                break
+            if len(cells) > max_columns:
+                cells = cells[:max_columns]
+                truncated_columns = True
+            column_count = max(column_count, len(cells))
+            rows.append(cells)
+        
+        if not rows:
+            return [Paragraph("(empty sheet)", styles['Italic'])]
+        
+        for cells in rows:
+            cells.extend([''] * (column_count - len(cells)))
+        
+        # Column widths proportional to the content length (capped), scaled to the page
+        sample = rows[:SPREADSHEET_TABLE_CHUNK_ROWS]
+        lengths = [min(max(len(row[i]) for row in sample), 40) + 2 for i in range(column_count)]
+        col_widths = [available_width * length / sum(lengths) for length in lengths]
+        
+        table_style = TableStyle([
+            ('FONT', (0, 0), (-1, -1), 'Helvetica', 7),
+            ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 7),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#eeeeee')),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ])
+        
+        # One table per chunk keeps the layout work per flowable small;
+        # the first row is treated as header and repeated on every chunk
+        header, body = rows[0], rows[1:]
+        flowables = []
+        for start in range(0, max(len(body), 1), SPREADSHEET_TABLE_CHUNK_ROWS):
+            chunk = [header] + body[start:start + SPREADSHEET_TABLE_CHUNK_ROWS]
+            table = LongTable(chunk, colWidths=col_widths, repeatRows=1)
+            table.setStyle(table_style)
+            flowables.append(table)
+        
+        notices = []
+        if truncated_rows:
+            notices.append(f"Only the first {max_rows} rows are shown.")
+        if truncated_columns:
+            notices.append(f"Only the first {max_columns} columns are shown.")
+        if notices:
+            flowables.append(Spacer(1, 6))
+            flowables.append(Paragraph(' '.join(notices) + " Please download the original file for the complete data.",
+                                       styles['Italic']))
+        return flowables
     
     @staticmethod
     def _convert_pptx_to_pdf(file_path):
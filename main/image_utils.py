@@ -1,5 +1,365 @@
-"""(Reverted) Image processing disabled. This stub remains for safe imports."""
+"""
+Image processing helpers for Lesezirkel Osnabrück.
 
-def process_portrait(*args, **kwargs):  # noqa: D401
-    """No-op after revert."""
-    return
+Uploads are normalized before they are stored (EXIF rotation, metadata
+stripped, longest side capped, re-encoded). Afterwards resized WebP/JPEG
+derivatives are generated so that pages can serve a ``srcset`` instead of
+the multi-megabyte original. Derivatives are stored next to the original
+file, e.g. ``gallery/foto.jpg`` gets ``gallery/foto_640w.webp`` and
+``gallery/foto_640w.jpg``.
+"""
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import models
+
+from PIL import Image, ImageOps, features
+
+from .versions import get_version, is_versioned
+
+logger = logging.getLogger(__name__)
+
+# Defaults, can be overridden in settings.py
+DEFAULT_DERIVATIVE_WIDTHS = [320, 640, 1024, 1600]
+DEFAULT_DERIVATIVE_FORMATS = ['webp', 'jpeg']
+DEFAULT_DERIVATIVE_QUALITY = 80
+
+# Upload normalization defaults (IMAGE_UPLOAD_* in settings.py)
+DEFAULT_UPLOAD_MAX_SIDE = 2560
+DEFAULT_UPLOAD_QUALITY = 82
+
+# Lookups of existing derivatives are cached per image and model version
+DERIVATIVES_CACHE_TIMEOUT = 86400
+
+# EXIF tag id of the orientation field
+ORIENTATION_TAG = 0x0112
+
+# Formats kept as they are on upload, with their encoder options
+SAVE_OPTIONS = {
+    'JPEG': {'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'method': 4},
+}
+
+FORMAT_FILE_EXTENSIONS = {
+    'JPEG': ['.jpg', '.jpeg'],
+    'PNG': ['.png'],
+    'WEBP': ['.webp'],
+}
+
+FORMAT_EXTENSIONS = {
+    'webp': '.webp',
+    'jpeg': '.jpg',
+}
+
+FORMAT_MIME_TYPES = {
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+}
+
+
+def get_derivative_widths():
+    return sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', DEFAULT_DERIVATIVE_WIDTHS))
+
+
+def get_derivative_formats():
+    """Configured derivative formats, without WebP if Pillow was built without it"""
+    formats = getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', DEFAULT_DERIVATIVE_FORMATS)
+    return [fmt for fmt in formats if fmt != 'webp' or features.check('webp')]
+
+
+def get_derivative_quality():
+    return getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', DEFAULT_DERIVATIVE_QUALITY)
+
+
+def get_image_fields(model):
+    """Return all ImageFields of a model"""
+    return [field for field in model._meta.get_fields() if isinstance(field, models.ImageField)]
+
+
+def derivative_name(name, width, fmt):
+    """Storage name of a derivative, e.g. ('gallery/foto.jpg', 640, 'webp') -> 'gallery/foto_640w.webp'"""
+    base, _ = os.path.splitext(name)
+    return f"{base}_{width}w{FORMAT_EXTENSIONS[fmt]}"
+
+
+def is_derivative_name(name):
+    """Check whether a storage name looks like a generated derivative"""
+    base, ext = os.path.splitext(name)
+    if ext.lower() not in FORMAT_EXTENSIONS.values():
+        return False
+    head, sep, tail = base.rpartition('_')
+    return bool(sep and head) and tail.endswith('w') and tail[:-1].isdigit()
+
+
+def _to_rgb(img):
+    """Flatten transparency on a white background for JPEG output"""
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def _encode(img, fmt, quality):
+    buffer = BytesIO()
+    if fmt == 'webp':
+        img.save(buffer, 'WEBP', quality=quality, method=4)
+    else:
+        _to_rgb(img).save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def generate_derivatives(fieldfile, force=False):
+    """
+    Create all missing derivatives for an image FieldFile.
+    Widths larger than the original are skipped (no upscaling).
+    Returns the list of storage names that were written.
+    """
+    if not fieldfile or not fieldfile.name:
+        return []
+    return generate_derivatives_for_name(fieldfile.storage, fieldfile.name, force=force)
+
+
+def generate_derivatives_for_name(storage, name, force=False):
+    """Same as generate_derivatives(), for a plain storage name"""
+    widths = get_derivative_widths()
+    formats = get_derivative_formats()
+    quality = get_derivative_quality()
+
+    targets = [
+        (width, fmt, derivative_name(name, width, fmt))
+        for width in widths
+        for fmt in formats
+    ]
+    if not force:
+        targets = [t for t in targets if not storage.exists(t[2])]
+    if not targets:
+        return []
+
+    created = []
+    try:
+        with storage.open(name, 'rb') as f:
+            with Image.open(f) as original:
+                original.load()
+                img = ImageOps.exif_transpose(original)
+    except (OSError, ValueError) as e:
+        logger.warning('Could not open image %s for derivatives: %s', name, e)
+        return []
+
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'P') else 'RGB')
+
+    resized = {}
+    for width, fmt, target in targets:
+        if width >= img.width:
+            continue
+        if width not in resized:
+            height = max(1, round(img.height * width / img.width))
+            resized[width] = img.resize((width, height), Image.LANCZOS)
+
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, ContentFile(_encode(resized[width], fmt, quality)))
+        created.append(target)
+
+    return created
+
+
+def get_upload_limits(model_name):
+    """
+    Normalization limits for uploads of a model, from IMAGE_UPLOAD_LIMITS
+    with IMAGE_UPLOAD_MAX_SIDE / IMAGE_UPLOAD_QUALITY as defaults.
+    """
+    limits = {
+        'max_side': getattr(settings, 'IMAGE_UPLOAD_MAX_SIDE', DEFAULT_UPLOAD_MAX_SIDE),
+        'quality': getattr(settings, 'IMAGE_UPLOAD_QUALITY', DEFAULT_UPLOAD_QUALITY),
+    }
+    limits.update(getattr(settings, 'IMAGE_UPLOAD_LIMITS', {}).get(model_name, {}))
+    return limits
+
+
+def normalize_image(fileobj, max_side, quality, keep_format=False):
+    """
+    Auto-rotate by EXIF, strip metadata (EXIF/GPS, comments), cap the longest
+    side and re-encode. Returns (bytes, format) or None if the image should be
+    kept as it is (animated GIFs, unreadable files, nothing to gain).
+    With keep_format=True the original format is never changed.
+    """
+    fileobj.seek(0)
+    original_size = len(fileobj.read())
+    fileobj.seek(0)
+
+    with Image.open(fileobj) as original:
+        source_format = 'JPEG' if original.format == 'MPO' else original.format
+        if source_format == 'GIF' or getattr(original, 'is_animated', False):
+            return None
+
+        has_metadata = bool(original.getexif()) or any(
+            key in original.info for key in ('exif', 'comment', 'xmp', 'XML:com.adobe.xmp')
+        )
+        original.load()
+        # A CMYK profile would be wrong after the conversion to RGB
+        icc_profile = original.info.get('icc_profile') if original.mode != 'CMYK' else None
+        img = ImageOps.exif_transpose(original)
+
+    needs_resize = max(img.size) > max_side
+    if needs_resize:
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    if source_format in SAVE_OPTIONS or keep_format:
+        target_format = source_format
+    elif img.mode in ('RGBA', 'LA') or 'transparency' in img.info:
+        target_format = 'PNG'
+    else:
+        target_format = 'JPEG'
+
+    options = dict(SAVE_OPTIONS.get(target_format, {}))
+    if target_format in ('JPEG', 'WEBP'):
+        options['quality'] = quality
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+
+    if target_format == 'JPEG':
+        img = _to_rgb(img)
+    elif target_format == 'PNG' and img.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+        img = img.convert('RGBA')
+
+    buffer = BytesIO()
+    img.save(buffer, target_format, **options)
+    data = buffer.getvalue()
+
+    # Re-encoding an already small, clean image can make it bigger
+    unchanged = not needs_resize and not has_metadata and target_format == source_format
+    if unchanged and len(data) >= original_size:
+        return None
+    return data, target_format
+
+
+def normalize_fieldfile(fieldfile, model_name):
+    """
+    Normalize a freshly uploaded (not yet committed) image in place, before
+    it is written to storage. Returns True if the upload was replaced.
+    """
+    limits = get_upload_limits(model_name)
+    result = normalize_image(fieldfile.file, limits['max_side'], limits['quality'])
+    fieldfile.file.seek(0)
+    if result is None:
+        return False
+
+    data, target_format = result
+    base, ext = os.path.splitext(fieldfile.name)
+    if ext.lower() not in FORMAT_FILE_EXTENSIONS[target_format]:
+        ext = FORMAT_FILE_EXTENSIONS[target_format][0]
+    name = f"{base}{ext}"
+
+    fieldfile.file = ContentFile(data, name=os.path.basename(name))
+    fieldfile.name = name
+    return True
+
+
+def normalize_stored_image(storage, name, model_name):
+    """Normalize an image that is already in storage, keeping its name and format"""
+    limits = get_upload_limits(model_name)
+    with storage.open(name, 'rb') as f:
+        result = normalize_image(f, limits['max_side'], limits['quality'], keep_format=True)
+    if result is None:
+        return False
+
+    storage.delete(name)
+    storage.save(name, ContentFile(result[0]))
+    return True
+
+
+def process_uploaded_image(name, model_name='Gallery'):
+    """
+    Background job for freshly uploaded images: normalize the original
+    (orientation, metadata, size) and create all derivatives.
+    Runs in the worker pool, so no database access.
+    Returns the final (width, height) of the original.
+    """
+    from django.core.files.storage import default_storage
+
+    with default_storage.open(name, 'rb') as f:
+        with Image.open(f) as img:
+            img.verify()
+
+    normalize_stored_image(default_storage, name, model_name)
+    generate_derivatives_for_name(default_storage, name, force=True)
+
+    with default_storage.open(name, 'rb') as f:
+        with Image.open(f) as img:
+            return img.size
+
+
+def get_derivatives(fieldfile):
+    """
+    Return the existing derivatives of an image as
+    {'webp': [(width, url), ...], 'jpeg': [(width, url), ...]}
+
+    Cached under the version of the image's model (main/versions.py), which
+    is bumped after derivatives are (re)generated, instead of asking the
+    storage for every width and format on each render.
+    """
+    if not fieldfile or not fieldfile.name:
+        return {}
+
+    model = type(fieldfile.instance)
+    if not is_versioned(model):
+        return _find_derivatives(fieldfile.storage, fieldfile.name)
+
+    widths, formats = get_derivative_widths(), get_derivative_formats()
+    digest = hashlib.md5(f'{fieldfile.name}:{widths}:{formats}'.encode(), usedforsecurity=False).hexdigest()
+    key = f'image-derivatives:{get_version(model)}:{digest}'
+    result = cache.get(key)
+    if result is None:
+        result = _find_derivatives(fieldfile.storage, fieldfile.name)
+        cache.set(key, result, DERIVATIVES_CACHE_TIMEOUT)
+    return result
+
+
+def _find_derivatives(storage, name):
+    result = {}
+    for fmt in get_derivative_formats():
+        entries = []
+        for width in get_derivative_widths():
+            derivative = derivative_name(name, width, fmt)
+            if storage.exists(derivative):
+                entries.append((width, storage.url(derivative)))
+        if entries:
+            result[fmt] = entries
+    return result
+
+
+def format_srcset(entries):
+    """srcset attribute value of [(width, url), ...]"""
+    return ', '.join(f"{url} {width}w" for width, url in entries)
+
+
+def pick_derivative(entries, min_width):
+    """URL of the smallest derivative at least min_width wide (else the largest one)"""
+    for width, url in entries:
+        if width >= min_width:
+            return url
+    return entries[-1][1] if entries else None
+
+
+def delete_derivatives(fieldfile):
+    """Remove all derivatives of an image (the original is left untouched)"""
+    if not fieldfile or not fieldfile.name:
+        return
+
+    storage = fieldfile.storage
+    for width in get_derivative_widths():
+        for fmt in FORMAT_EXTENSIONS:
+            name = derivative_name(fieldfile.name, width, fmt)
+            if storage.exists(name):
+                storage.delete(name)
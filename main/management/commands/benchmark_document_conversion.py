@@ -0,0 +1,145 @@
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from PIL import Image as PILImage
+
+from main.document_utils import DocumentConverter
+
+LOREM = (
+    'Der Lesezirkel trifft sich jeden ersten Donnerstag im Monat, um über Bücher, '
+    'Gedichte und Geschichten aus Osnabrück und der Welt zu sprechen. '
+)
+
+
+def _sample_image():
+    buffer = BytesIO()
+    PILImage.new('RGB', (800, 500), (31, 78, 121)).save(buffer, 'PNG')
+    buffer.seek(0)
+    return buffer
+
+
+def build_docx_corpus(directory):
+    """Write the sample DOCX files used for the benchmark, returns their paths"""
+    from docx import Document as DocxDocument
+    from docx.shared import Inches
+
+    samples = {}
+
+    doc = DocxDocument()
+    doc.add_heading('Einladung zur Mitgliederversammlung', 0)
+    for _ in range(5):
+        doc.add_paragraph(LOREM * 3)
+    samples['brief.docx'] = doc
+
+    doc = DocxDocument()
+    doc.add_heading('Jahresbericht', 0)
+    for chapter in range(1, 21):
+        doc.add_heading(f'Kapitel {chapter}', 1)
+        for number in range(100):
+            paragraph = doc.add_paragraph(LOREM)
+            paragraph.add_run(f'Absatz {number}.').bold = True
+    samples['bericht_lang.docx'] = doc
+
+    doc = DocxDocument()
+    doc.add_heading('Veranstaltungsübersicht', 1)
+    for _ in range(10):
+        table = doc.add_table(rows=1, cols=5)
+        for cell, title in zip(table.rows[0].cells, ['Datum', 'Titel', 'Ort', 'Plätze', 'Anmerkung']):
+            cell.text = title
+        for row_number in range(40):
+            cells = table.add_row().cells
+            for column, cell in enumerate(cells):
+                cell.text = f'Zeile {row_number} / Spalte {column}'
+        doc.add_paragraph(LOREM)
+    samples['tabellen.docx'] = doc
+
+    doc = DocxDocument()
+    doc.add_heading('Fotodokumentation', 1)
+    for number in range(10):
+        doc.add_paragraph(f'Bild {number + 1}: {LOREM}')
+        doc.add_picture(_sample_image(), width=Inches(5))
+    samples['bilder.docx'] = doc
+
+    paths = []
+    for name, doc in samples.items():
+        path = os.path.join(directory, name)
+        doc.save(path)
+        paths.append(path)
+    return paths
+
+
+def build_xlsx_corpus(directory):
+    """Write the sample XLSX files used for the benchmark, returns their paths"""
+    from openpyxl import Workbook
+
+    paths = []
+    for name, sheets, rows in (('mitglieder.xlsx', 1, 200), ('kassenbuch_gross.xlsx', 3, 20000)):
+        wb = Workbook(write_only=True)
+        for sheet in range(sheets):
+            ws = wb.create_sheet(f'Jahr {2022 + sheet}')
+            ws.append(['Nr.', 'Datum', 'Name', 'Betrag', 'Verwendungszweck'])
+            for number in range(rows):
+                ws.append([number, f'{number % 28 + 1:02d}.05.2024', f'Mitglied {number}',
+                           number * 1.5, 'Mitgliedsbeitrag Lesezirkel'])
+        path = os.path.join(directory, name)
+        wb.save(path)
+        paths.append(path)
+    return paths
+
+
+class Command(BaseCommand):
+    help = 'Measure the PDF conversion time of a document corpus (generated DOCX/XLSX samples by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corpus',
+            help='Directory with documents to convert instead of the generated samples',
+        )
+        parser.add_argument(
+            '--keep',
+            help='Write the generated samples to this directory and keep them',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Conversions per file; the best time is reported (default: 3)',
+        )
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        temp_dir = None
+        if options['corpus']:
+            directory = options['corpus']
+            paths = sorted(
+                os.path.join(directory, name) for name in os.listdir(directory)
+                if os.path.isfile(os.path.join(directory, name))
+            )
+        else:
+            directory = options['keep'] or tempfile.mkdtemp()
+            temp_dir = None if options['keep'] else directory
+            os.makedirs(directory, exist_ok=True)
+            paths = build_docx_corpus(directory) + build_xlsx_corpus(directory)
+
+        try:
+            total = 0.0
+            for path in paths:
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    pdf = DocumentConverter.convert_to_pdf(path, os.path.basename(path))
+                    timings.append(time.perf_counter() - start)
+                best = min(timings)
+                total += best
+                self.stdout.write(
+                    f'{os.path.basename(path):30} {os.path.getsize(path) / 1024:8.0f} KB '
+                    f'-> {len(pdf.getvalue()) / 1024:8.0f} KB PDF  {best * 1000:8.1f} ms'
+                )
+            self.stdout.write(self.style.SUCCESS(f'Gesamt: {len(paths)} Datei(en), {total * 1000:.1f} ms'))
+        finally:
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
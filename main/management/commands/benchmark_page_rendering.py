@@ -0,0 +1,104 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from main import views
+from main.models import Event, News, TeamMember
+from main.versions import bump_version
+
+# Models shown in the cached fragments of these pages
+FRAGMENT_MODELS = (Event, News, TeamMember)
+
+PAGES = (
+    ('home', views.home),
+    ('events', views.events),
+    ('about', views.about),
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+def create_sample_data(count):
+    """Events, news and team members (image names only, no files) for the benchmark"""
+    now = timezone.now()
+    for number in range(count):
+        Event.objects.create(
+            title=f'Lesung {number}', description='Lesung mit anschließender Diskussion ' * 10,
+            location='Osnabrück', date=now + timedelta(days=number % 28, hours=number % 5),
+            image=f'benchmark/event_{number}.jpg', category='kulturelle',
+        )
+        News.objects.create(title=f'Nachricht {number}', content='Bericht ' * 50, image=f'benchmark/news_{number}.jpg')
+        TeamMember.objects.create(name=f'Mitglied {number}', position='Vorstand', bio='Engagiert seit 2010. ' * 5,
+                                  email=f'mitglied{number}@example.com', image=f'benchmark/team_{number}.jpg')
+
+
+class Command(BaseCommand):
+    help = 'Measure the render time of the cached pages with and without their template fragments cached'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Renders per page and mode; the median is reported (default: 20)',
+        )
+        parser.add_argument(
+            '--sample',
+            type=int,
+            default=0,
+            help='Create this many events, news and team members first (rolled back afterwards)',
+        )
+
+    def render(self, view, path):
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            view(request)
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries)
+
+    def measure(self, view, path, cold, repeat):
+        timings = []
+        query_counts = []
+        for _ in range(repeat):
+            if cold:
+                # New versions: every fragment is rendered again
+                for model in FRAGMENT_MODELS:
+                    bump_version(model)
+            elapsed, query_count = self.render(view, path)
+            timings.append(elapsed)
+            query_counts.append(query_count)
+        return statistics.median(timings), max(query_counts)
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        try:
+            with transaction.atomic():
+                create_sample_data(options['sample'])
+                self.stdout.write(f'{"Seite":10} {"ohne Cache":>20} {"mit Fragment-Cache":>26}')
+                for name, view in PAGES:
+                    path = reverse(name)
+                    cold, cold_queries = self.measure(view, path, True, repeat)
+                    # Fill the fragment cache once, then measure
+                    self.render(view, path)
+                    warm, warm_queries = self.measure(view, path, False, repeat)
+                    self.stdout.write(
+                        f'{name:10} {cold * 1000:8.1f} ms {cold_queries:3} Abfr. '
+                        f'{warm * 1000:12.1f} ms {warm_queries:3} Abfr.  x{cold / warm:.1f}'
+                    )
+                if options['sample']:
+                    raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(self.style.SUCCESS('Fertig.'))
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.assets import build_assets
+
+
+class Command(BaseCommand):
+    help = 'Minify and bundle the CSS/JS of every page and extract its critical CSS (see main/assets.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Output directory (default: ASSET_BUILD_DIR)',
+        )
+
+    def handle(self, *args, **options):
+        output = options['output'] or settings.ASSET_BUILD_DIR
+        sizes = build_assets(output)
+        for (kind, name), (source, minified) in sorted(sizes.items()):
+            self.stdout.write(f'  {kind}/{name}.{kind}: {source / 1024:.1f} KB -> {minified / 1024:.1f} KB')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(sizes)} Bundle(s) nach {output} geschrieben. Danach collectstatic ausführen.'
+        ))
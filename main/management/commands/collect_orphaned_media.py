@@ -0,0 +1,43 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from main.media_gc import delete_orphan, find_orphans
+
+
+class Command(BaseCommand):
+    help = 'Delete media files no database row refers to any more (see main/media_gc.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the orphaned files, delete nothing',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=float,
+            default=24,
+            help='Only files older than this many hours (default: 24), uploads in progress are kept',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        count = 0
+        size = 0
+        for name, file_size in find_orphans(default_storage, min_age=options['min_age'] * 3600):
+            if dry_run or options['verbosity'] > 1:
+                self.stdout.write(f'  {name}')
+            if not dry_run:
+                try:
+                    delete_orphan(default_storage, name)
+                except OSError as e:
+                    self.stderr.write(f'  Fehler bei {name}: {e}')
+                    continue
+            count += 1
+            size += file_size
+
+        megabytes = size / (1024 * 1024)
+        if dry_run:
+            self.stdout.write(f'{count} verwaiste Datei(en), {megabytes:.1f} MB (nichts gelöscht).')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{count} verwaiste Datei(en) gelöscht, {megabytes:.1f} MB freigegeben.'))
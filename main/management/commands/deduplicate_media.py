@@ -0,0 +1,56 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from main.storage import BLOB_DIR
+
+
+class Command(BaseCommand):
+    help = 'Link files uploaded before the content-addressed storage to their blobs (backfill), freeing duplicates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the files that are not deduplicated yet',
+        )
+
+    def handle(self, *args, **options):
+        if not hasattr(default_storage, 'link_existing'):
+            raise CommandError('The default storage is not main.storage.ContentAddressedStorage (see STORAGES).')
+
+        root = default_storage.location
+        files = linked = duplicates = freed = 0
+        for directory, dirnames, filenames in os.walk(root):
+            if directory == root and BLOB_DIR in dirnames:
+                dirnames.remove(BLOB_DIR)
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                stat = os.lstat(path)
+                if not os.path.isfile(path) or os.path.islink(path) or stat.st_nlink > 1:
+                    # Not a regular file, or linked already
+                    continue
+                files += 1
+                if options['dry_run']:
+                    continue
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                try:
+                    _, duplicate = default_storage.link_existing(name)
+                except OSError as e:
+                    self.stderr.write(f'  Fehler bei {name}: {e}')
+                    continue
+                linked += 1
+                if duplicate:
+                    duplicates += 1
+                    freed += stat.st_size
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'  {name}: Duplikat')
+
+        if options['dry_run']:
+            self.stdout.write(f'{files} Datei(en) noch nicht dedupliziert.')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Fertig: {linked} Datei(en) verknüpft, davon {duplicates} Duplikat(e), '
+            f'{freed / (1024 * 1024):.1f} MB freigegeben.'
+        ))
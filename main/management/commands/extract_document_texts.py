@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from main.models import Document
+from main.text_extraction import schedule_text_extraction
+
+
+class Command(BaseCommand):
+    help = 'Extract the text of all documents for the search index (backfill)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Extract again even if the text of the current file is already stored',
+        )
+
+    def handle(self, *args, **options):
+        documents = Document.objects.exclude(file='').exclude(file_hash='')
+        if not options['force']:
+            documents = documents.filter(
+                Q(extracted_text__isnull=True) | ~Q(extracted_text__file_hash=F('file_hash'))
+            )
+
+        count = 0
+        for document in documents.iterator(chunk_size=200):
+            schedule_text_extraction(document)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'{count} Dokument(e) zur Textextraktion eingereiht.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from main.models import Document, DocumentPreview
+from main.previews import schedule_preview
+
+
+class Command(BaseCommand):
+    help = 'Compute page count and thumbnail of all documents without a preview (backfill)'
+
+    def handle(self, *args, **options):
+        existing = DocumentPreview.objects.values('file_hash')
+        documents = Document.objects.exclude(file='').exclude(file_hash='').exclude(file_hash__in=existing)
+
+        scheduled = set()
+        for document in documents.iterator(chunk_size=200):
+            # Documents with the same file share one preview
+            if document.file_hash in scheduled:
+                continue
+            schedule_preview(document)
+            scheduled.add(document.file_hash)
+        self.stdout.write(self.style.SUCCESS(f'{len(scheduled)} Vorschau(en) eingereiht.'))
@@ -0,0 +1,56 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from main.image_utils import generate_derivatives, get_image_fields
+from main.versions import bump_version
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive WebP/JPEG derivatives for all existing images (backfill)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            dest='models',
+            help='Only process this model (e.g. Gallery). Can be given multiple times.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate derivatives even if they already exist',
+        )
+
+    def handle(self, *args, **options):
+        selected = {name.lower() for name in (options['models'] or [])}
+        force = options['force']
+        total_images = 0
+        total_files = 0
+
+        for model in apps.get_app_config('main').get_models():
+            if selected and model.__name__.lower() not in selected:
+                continue
+
+            for field in get_image_fields(model):
+                queryset = model.objects.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+                count = 0
+                for instance in queryset.only('pk', field.name).iterator(chunk_size=200):
+                    fieldfile = getattr(instance, field.name)
+                    try:
+                        created = generate_derivatives(fieldfile, force=force)
+                    except Exception as e:
+                        self.stderr.write(f'  Fehler bei {model.__name__} #{instance.pk} ({fieldfile.name}): {e}')
+                        continue
+                    count += 1
+                    total_files += len(created)
+                    if options['verbosity'] > 1 and created:
+                        self.stdout.write(f'  {fieldfile.name}: {len(created)} Derivate')
+
+                total_images += count
+                self.stdout.write(f'{model.__name__}.{field.name}: {count} Bild(er) verarbeitet')
+                # Cached derivative lookups (get_derivatives) are keyed by the model version
+                bump_version(model)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Fertig: {total_images} Bild(er) geprüft, {total_files} Derivat(e) erstellt.'
+        ))
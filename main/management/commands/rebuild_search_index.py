@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from main.search import SEARCH_MODELS, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the site search index (events, news, documents)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            dest='models',
+            choices=sorted(SEARCH_MODELS),
+            help='Only rebuild this model. Can be given multiple times.',
+        )
+
+    def handle(self, *args, **options):
+        counts = rebuild_index(options['models'])
+
+        for key, count in counts.items():
+            self.stdout.write(f'{key}: {count} Objekt(e) indexiert')
+        self.stdout.write(self.style.SUCCESS('Fertig: Suchindex neu aufgebaut.'))
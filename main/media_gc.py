@@ -0,0 +1,157 @@
+"""
+Garbage collection of media files no database row refers to any more.
+
+Files stay in MEDIA_ROOT when a row is deleted or its file replaced. The
+collector streams all FileField/ImageField values of main.models from the
+database into a temporary on-disk index (SQLite), then walks MEDIA_ROOT and
+checks every file against it - memory use does not grow with the number of
+files or rows.
+
+Besides the field values themselves, these are kept:
+  - image derivatives (image_utils.is_derivative_name) of a kept original,
+  - converted PDFs (converted/<hash>.pdf) of an existing document file,
+  - files younger than the grace period (uploads whose row is not saved yet).
+Blobs of the content-addressed storage (main/storage.py) that no name links
+to any more are collected as well.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.apps import apps
+from django.db import models
+
+from .conversion import converted_pdf_name
+from .image_utils import is_derivative_name
+from .storage import BLOB_DIR
+
+CHUNK_SIZE = 2000
+
+
+class ReferenceIndex:
+    """Set of referenced storage names (and their bases) in a temporary SQLite file"""
+
+    def __init__(self):
+        self._directory = tempfile.mkdtemp(prefix='media-gc-')
+        self._db = sqlite3.connect(os.path.join(self._directory, 'references.sqlite3'))
+        self._db.execute('CREATE TABLE names (name TEXT PRIMARY KEY) WITHOUT ROWID')
+        self._db.execute('CREATE TABLE bases (base TEXT PRIMARY KEY) WITHOUT ROWID')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._db.close()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def add(self, names):
+        """Add names in batches; the base (name without extension) is kept for derivatives"""
+        count = 0
+        batch = []
+        for name in names:
+            batch.append(name)
+            if len(batch) >= CHUNK_SIZE:
+                count += self._insert(batch)
+                batch = []
+        return count + self._insert(batch)
+
+    def _insert(self, batch):
+        self._db.executemany('INSERT OR IGNORE INTO names VALUES (?)', ((name,) for name in batch))
+        self._db.executemany('INSERT OR IGNORE INTO bases VALUES (?)',
+                             ((os.path.splitext(name)[0],) for name in batch))
+        self._db.commit()
+        return len(batch)
+
+    def __contains__(self, name):
+        return self._db.execute('SELECT 1 FROM names WHERE name = ?', (name,)).fetchone() is not None
+
+    def has_base(self, base):
+        return self._db.execute('SELECT 1 FROM bases WHERE base = ?', (base,)).fetchone() is not None
+
+
+def file_fields(storage):
+    """(model, field) for all file fields of main.models stored in storage"""
+    for model in apps.get_app_config('main').get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField) and getattr(field.storage, 'location', None) == storage.location:
+                yield model, field
+
+
+def iter_references(storage):
+    """All storage names referenced by the database, streamed"""
+    from .models import Document
+
+    for model, field in file_fields(storage):
+        queryset = model._default_manager.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+        yield from queryset.values_list(field.name, flat=True).iterator(chunk_size=CHUNK_SIZE)
+
+    hashes = Document.objects.exclude(file_hash='').values_list('file_hash', flat=True)
+    for file_hash in hashes.iterator(chunk_size=CHUNK_SIZE):
+        yield converted_pdf_name(Document(file_hash=file_hash))
+
+
+def iter_files(root):
+    """
+    (storage name, stat) of all regular files below root, outside the blob
+    store. Hidden files and directories (.gitkeep, .htaccess, ...) are not
+    uploads and are skipped.
+    """
+    for directory, dirnames, filenames in os.walk(root):
+        if directory == root and BLOB_DIR in dirnames:
+            dirnames.remove(BLOB_DIR)
+        dirnames[:] = [dirname for dirname in dirnames if not dirname.startswith('.')]
+        for filename in filenames:
+            if filename.startswith('.'):
+                continue
+            path = os.path.join(directory, filename)
+            stat = os.lstat(path)
+            if os.path.isfile(path) and not os.path.islink(path):
+                yield os.path.relpath(path, root).replace(os.sep, '/'), stat
+
+
+def is_referenced(index, name):
+    if name in index:
+        return True
+    if is_derivative_name(name):
+        # 'gallery/foto_640w.webp' belongs to 'gallery/foto.<ext>'
+        base = os.path.splitext(name)[0].rpartition('_')[0]
+        return index.has_base(base)
+    return False
+
+
+def find_orphans(storage, min_age=24 * 60 * 60):
+    """
+    Yield (storage name, size) of unreferenced files older than min_age
+    seconds. Names of orphaned blobs start with the blob directory.
+    """
+    root = storage.location
+    deadline = time.time() - min_age
+    with ReferenceIndex() as index:
+        index.add(iter_references(storage))
+        for name, stat in iter_files(root):
+            if stat.st_mtime <= deadline and not is_referenced(index, name):
+                yield name, stat.st_size
+
+    blob_root = os.path.join(root, BLOB_DIR)
+    for directory, _, filenames in os.walk(blob_root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            stat = os.lstat(path)
+            # A blob without names (only its own link), or a left-over partial write
+            if stat.st_mtime <= deadline and (stat.st_nlink == 1 or filename.endswith('.part')):
+                yield os.path.relpath(path, root).replace(os.sep, '/'), stat.st_size
+
+
+def delete_orphan(storage, name):
+    if name.startswith(f'{BLOB_DIR}/'):
+        try:
+            os.remove(storage.path(name))
+        except FileNotFoundError:
+            pass
+    else:
+        storage.delete(name)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_announcement_alter_invitationcode_code_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GalleryUploadBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Anzahl Bilder')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Verarbeitet')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Fehlgeschlagen')),
+                ('errors', models.TextField(blank=True, help_text='Eine Zeile pro fehlerhafter Datei', verbose_name='Fehlermeldungen')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Abgeschlossen am')),
+                ('event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='main.event', verbose_name='Veranstaltung')),
+            ],
+            options={
+                'verbose_name': 'Galerie-Upload',
+                'verbose_name_plural': 'Galerie-Uploads',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
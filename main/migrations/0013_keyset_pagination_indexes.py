@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_galleryuploadbatch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['is_public', '-is_featured', '-created_at', '-id'], name='document_public_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gallery',
+            index=models.Index(fields=['-created_at', '-id'], name='gallery_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['-published_date', '-id'], name='news_published_keyset_idx'),
+        ),
+    ]
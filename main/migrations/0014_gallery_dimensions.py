@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:02
+
+from django.core.files.images import get_image_dimensions
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def fill_dimensions(apps, schema_editor):
+    """Read the size of existing gallery images once, instead of on every model load"""
+    Gallery = apps.get_model('main', 'Gallery')
+    # values_list: instantiating the model would read the image already
+    for pk, name in Gallery.objects.values_list('pk', 'image').iterator(chunk_size=200):
+        try:
+            with default_storage.open(name, 'rb') as f:
+                width, height = get_image_dimensions(f)
+        except Exception:
+            continue
+        if width and height:
+            Gallery.objects.filter(pk=pk).update(width=width, height=height)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gallery',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Höhe'),
+        ),
+        migrations.AddField(
+            model_name='gallery',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Breite'),
+        ),
+        migrations.AlterField(
+            model_name='gallery',
+            name='image',
+            field=models.ImageField(height_field='height', upload_to='gallery/', verbose_name='Bild', width_field='width'),
+        ),
+        migrations.RunPython(fill_dimensions, migrations.RunPython.noop),
+    ]
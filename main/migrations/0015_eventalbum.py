@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_albums(apps, schema_editor):
+    """Create the albums of all events that already have photos"""
+    Gallery = apps.get_model('main', 'Gallery')
+    EventAlbum = apps.get_model('main', 'EventAlbum')
+    stats = (
+        Gallery.objects.filter(event__isnull=False)
+        .values('event_id')
+        .annotate(
+            photo_count=models.Count('pk'),
+            first_photo_at=models.Min('created_at'),
+            last_photo_at=models.Max('created_at'),
+        )
+        .order_by()
+    )
+    albums = []
+    for row in stats:
+        cover_id = (Gallery.objects.filter(event_id=row['event_id'])
+                    .order_by('created_at', 'pk').values_list('pk', flat=True).first())
+        albums.append(EventAlbum(cover_id=cover_id, **row))
+    EventAlbum.objects.bulk_create(albums, batch_size=200)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_gallery_dimensions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventAlbum',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='album', serialize=False, to='main.event', verbose_name='Veranstaltung')),
+                ('photo_count', models.PositiveIntegerField(default=0, verbose_name='Anzahl Fotos')),
+                ('first_photo_at', models.DateTimeField(blank=True, null=True, verbose_name='Erstes Foto')),
+                ('last_photo_at', models.DateTimeField(blank=True, null=True, verbose_name='Letztes Foto')),
+                ('cover', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main.gallery', verbose_name='Titelbild')),
+            ],
+            options={
+                'verbose_name': 'Fotoalbum',
+                'verbose_name_plural': 'Fotoalben',
+                'ordering': ['-last_photo_at'],
+                'indexes': [models.Index(fields=['-last_photo_at'], name='album_last_photo_idx')],
+            },
+        ),
+        migrations.RunPython(build_albums, migrations.RunPython.noop),
+    ]
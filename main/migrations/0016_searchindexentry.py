@@ -0,0 +1,113 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:08
+
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import migrations, models
+
+# Frozen copy of the analyzer in main/search.py as of this migration, so later
+# changes to the live code do not change what it writes
+SEARCH_MODELS = {
+    'event': {'model': 'Event', 'fields': {'title': 5, 'location': 2, 'description': 1}},
+    'news': {'model': 'News', 'fields': {'title': 5, 'content': 1}},
+    'document': {'model': 'Document', 'fields': {'title': 5, 'description': 1}},
+}
+
+MAX_TERM_LENGTH = 64
+MIN_TERM_LENGTH = 2
+
+GERMAN_STOPWORDS = frozenset("""
+    aber alle als also am an auch auf aus bei bin bis da damit dann das dass
+    dem den der des die dies diese dir doch du durch ein eine einem einen einer
+    eines er es fur hat hatte ich ihr im in ist ja kann mit nach nicht noch
+    nur ob oder ohne sich sie sind so uber um und uns unter vom von vor war
+    wie wir wird zu zum zur
+""".split())
+
+TOKEN_RE = re.compile(r'\w+')
+UMLAUT_DIGRAPH_RE = re.compile(r'([aou])e')
+
+
+def fold(text):
+    text = text.lower().replace('ß', 'ss')
+    decomposed = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return UMLAUT_DIGRAPH_RE.sub(lambda m: m.group(1), text)
+
+
+def stem(word):
+    if word.startswith('ge') and len(word) >= 6:
+        word = word[2:]
+    word = word.replace('sch', '$').replace('ei', '%').replace('ie', '&')
+    word = re.sub(r'(.)\1', r'\1*', word)
+
+    while len(word) > 3:
+        if len(word) > 5:
+            if word.endswith(('em', 'er', 'nd')):
+                word = word[:-2]
+                continue
+        if word[-1] in 'tesn':
+            word = word[:-1]
+            continue
+        break
+
+    word = re.sub(r'(.)\*', r'\1\1', word)
+    return word.replace('&', 'ie').replace('%', 'ei').replace('$', 'sch')
+
+
+def analyze(text):
+    terms = []
+    for token in TOKEN_RE.findall(fold(text or '')):
+        if len(token) < MIN_TERM_LENGTH or token in GERMAN_STOPWORDS:
+            continue
+        terms.append(stem(token)[:MAX_TERM_LENGTH])
+    return terms
+
+
+def term_weights(key, obj):
+    weights = Counter()
+    for field, weight in SEARCH_MODELS[key]['fields'].items():
+        for term in analyze(getattr(obj, field, '')):
+            weights[term] += weight
+    return weights
+
+
+def build_index(apps, schema_editor):
+    """Index all existing events, news and documents"""
+    SearchIndexEntry = apps.get_model('main', 'SearchIndexEntry')
+    for key, config in SEARCH_MODELS.items():
+        model = apps.get_model('main', config['model'])
+        entries = [
+            SearchIndexEntry(model=key, object_id=obj.pk, term=term, weight=weight)
+            for obj in model.objects.iterator(chunk_size=200)
+            for term, weight in term_weights(key, obj).items()
+        ]
+        SearchIndexEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_eventalbum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20, verbose_name='Modell')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Objekt-ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Suchbegriff')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Gewicht')),
+            ],
+            options={
+                'verbose_name': 'Suchindex-Eintrag',
+                'verbose_name_plural': 'Suchindex',
+                'indexes': [models.Index(fields=['term', 'model'], name='search_term_idx')],
+                'constraints': [models.UniqueConstraint(fields=('model', 'object_id', 'term'), name='search_entry_unique')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
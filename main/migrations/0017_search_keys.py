@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:11
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Frozen copy of main.search.make_search_key as of this migration, so later
+# changes to the live normalization do not change what it writes
+TOKEN_RE = re.compile(r'\w+')
+UMLAUT_DIGRAPH_RE = re.compile(r'([aou])e')
+SPECIAL_LETTERS = str.maketrans({'ß': 'ss', 'ı': 'i', 'ł': 'l', 'ø': 'o', 'đ': 'd', 'æ': 'ae', 'œ': 'oe'})
+SEARCH_KEY_LENGTH = 255
+
+
+def fold(text):
+    text = text.lower().translate(SPECIAL_LETTERS)
+    decomposed = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return UMLAUT_DIGRAPH_RE.sub(lambda m: m.group(1), text)
+
+
+def make_search_key(*values):
+    text = fold(' '.join(value for value in values if value))
+    return ' '.join(TOKEN_RE.findall(text))[:SEARCH_KEY_LENGTH]
+
+
+def fill_search_keys(apps, schema_editor):
+    EventRegistration = apps.get_model('main', 'EventRegistration')
+    Certificate = apps.get_model('main', 'Certificate')
+
+    registrations = EventRegistration.objects.select_related('invitation_code')
+    for registration in registrations.iterator(chunk_size=500):
+        code = registration.invitation_code.code if registration.invitation_code_id else ''
+        registration.search_key = make_search_key(
+            registration.last_name, registration.first_name, registration.email, code
+        )
+        registration.save(update_fields=['search_key'])
+
+    for certificate in Certificate.objects.iterator(chunk_size=500):
+        certificate.search_key = make_search_key(
+            certificate.last_name, certificate.first_name,
+            certificate.participant_number, certificate.event_title,
+        )
+        certificate.save(update_fields=['search_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_searchindexentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='search_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='eventregistration',
+            name='search_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_search_keys, migrations.RunPython.noop),
+    ]
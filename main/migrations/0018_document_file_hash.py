@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:33
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def file_sha256(file):
+    """Frozen copy of main.conversion.file_sha256 as of this migration"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.close()
+    return digest.hexdigest()
+
+
+def fill_file_hashes(apps, schema_editor):
+    Document = apps.get_model('main', 'Document')
+    for document in Document.objects.exclude(file='').only('pk', 'file').iterator(chunk_size=200):
+        try:
+            file_hash = file_sha256(document.file)
+        except (FileNotFoundError, ValueError):
+            continue
+        Document.objects.filter(pk=document.pk).update(file_hash=file_hash)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0017_search_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='file_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(fill_file_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_document_file_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentText',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='extracted_text', serialize=False, to='main.document', verbose_name='Dokument')),
+                ('file_hash', models.CharField(max_length=64)),
+                ('text', models.TextField(blank=True)),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Dokumenttext',
+                'verbose_name_plural': 'Dokumenttexte',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0019_documenttext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentPreview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(max_length=64, unique=True)),
+                ('page_count', models.PositiveIntegerField(blank=True, null=True, verbose_name='Seitenzahl')),
+                ('thumbnail', models.FileField(blank=True, upload_to='previews/', verbose_name='Vorschaubild')),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Dokumentvorschau',
+                'verbose_name_plural': 'Dokumentvorschauen',
+            },
+        ),
+    ]
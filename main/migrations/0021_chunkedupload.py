@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:54
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0020_documentpreview'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Dateiname')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Größe (Bytes)')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Empfangen (Bytes)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Teil-Upload',
+                'verbose_name_plural': 'Teil-Uploads',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0021_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='event',
+            field=models.ForeignKey(blank=True, help_text='Leer bei Zertifikaten, die vor der Zuordnung erstellt wurden', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='certificates', to='main.event', verbose_name='Veranstaltung'),
+        ),
+    ]
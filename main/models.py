@@ -1,7 +1,13 @@
+from django.conf import settings
+from django.core import signing
 from django.db import models
 from django.utils import timezone
 from django.urls import reverse
 import os
+import uuid
+
+from .conversion import file_sha256
+from .search import make_search_key
 
 # Event category / color choices mapped to calendar legend colors
 EVENT_CATEGORY_CHOICES = [
@@ -47,6 +53,17 @@ class Event(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        previous_title = None
+        if self.pk:
+            previous_title = Event.objects.filter(pk=self.pk).values_list('title', flat=True).first()
+        super().save(*args, **kwargs)
+
+        # The title is part of the registrations' search keys
+        if previous_title is not None and previous_title != self.title:
+            for registration in self.registrations.select_related('invitation_code'):
+                registration.save(update_fields=['search_key'])
+
     def get_absolute_url(self):
         return reverse('event_detail', kwargs={'pk': self.pk})
 
@@ -64,6 +81,10 @@ class News(models.Model):
         ordering = ['-published_date']
         verbose_name = "Nachricht"
         verbose_name_plural = "Nachrichten"
+        indexes = [
+            # Keyset pagination (views.NEWS_ORDERING)
+            models.Index(fields=['-published_date', '-id'], name='news_published_keyset_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -93,7 +114,9 @@ class Gallery(models.Model):
     """Gallery model"""
     title = models.CharField(max_length=200, verbose_name="Titel")
     description = models.TextField(blank=True, verbose_name="Beschreibung")
-    image = models.ImageField(upload_to='gallery/', verbose_name="Bild")
+    image = models.ImageField(upload_to='gallery/', width_field='width', height_field='height', verbose_name="Bild")
+    width = models.PositiveIntegerField(blank=True, null=True, editable=False, verbose_name="Breite")
+    height = models.PositiveIntegerField(blank=True, null=True, editable=False, verbose_name="Höhe")
     event = models.ForeignKey(Event, on_delete=models.CASCADE, blank=True, null=True, verbose_name="Veranstaltung")
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -101,10 +124,141 @@ class Gallery(models.Model):
         ordering = ['-created_at']
         verbose_name = "Galerie"
         verbose_name_plural = "Galerie"
+        indexes = [
+            # Keyset pagination (views.GALLERY_ORDERING)
+            models.Index(fields=['-created_at', '-id'], name='gallery_created_keyset_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+
+class GalleryUploadBatch(models.Model):
+    """Progress of a gallery bulk upload whose images are processed in the background"""
+    event = models.ForeignKey(Event, on_delete=models.SET_NULL, blank=True, null=True, verbose_name="Veranstaltung")
+    total = models.PositiveIntegerField(default=0, verbose_name="Anzahl Bilder")
+    processed = models.PositiveIntegerField(default=0, verbose_name="Verarbeitet")
+    failed = models.PositiveIntegerField(default=0, verbose_name="Fehlgeschlagen")
+    errors = models.TextField(blank=True, verbose_name="Fehlermeldungen", help_text="Eine Zeile pro fehlerhafter Datei")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name="Abgeschlossen am")
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Galerie-Upload"
+        verbose_name_plural = "Galerie-Uploads"
+
+    def __str__(self):
+        return f"Upload {self.pk} ({self.processed}/{self.total})"
+
+    @property
+    def is_finished(self):
+        return self.processed >= self.total
+
+    @property
+    def progress_percent(self):
+        if not self.total:
+            return 100
+        return int(self.processed * 100 / self.total)
+
+    @property
+    def error_list(self):
+        return [line for line in self.errors.splitlines() if line.strip()]
+
+    def record_result(self, filename, error=None):
+        """Count one processed image (thread-safe per batch row)"""
+        from django.db import transaction
+
+        with transaction.atomic():
+            batch = GalleryUploadBatch.objects.select_for_update().get(pk=self.pk)
+            batch.processed += 1
+            if error:
+                batch.failed += 1
+                batch.errors = f"{batch.errors}{filename}: {error}\n"
+            if batch.is_finished and not batch.finished_at:
+                batch.finished_at = timezone.now()
+            batch.save(update_fields=['processed', 'failed', 'errors', 'finished_at'])
+        return batch
+
+
+class ChunkedUpload(models.Model):
+    """
+    Resumable admin upload (tus-like, main/uploads.py). The file is sent in
+    chunks that are appended at the recorded offset to a file in
+    CHUNKED_UPLOAD_DIR; once complete it is attached to a model file field.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    filename = models.CharField(max_length=255, verbose_name="Dateiname")
+    size = models.PositiveBigIntegerField(verbose_name="Größe (Bytes)")
+    offset = models.PositiveBigIntegerField(default=0, verbose_name="Empfangen (Bytes)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Teil-Upload"
+        verbose_name_plural = "Teil-Uploads"
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+
+    @property
+    def path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{self.pk.hex}.part')
+
+
+class EventAlbum(models.Model):
+    """
+    Photo album of an event. Precomputed from Gallery by signals
+    (main/signals.py), so the album index needs no grouping over Gallery.
+    """
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name='album', verbose_name="Veranstaltung")
+    photo_count = models.PositiveIntegerField(default=0, verbose_name="Anzahl Fotos")
+    cover = models.ForeignKey(Gallery, on_delete=models.SET_NULL, blank=True, null=True, related_name='+', verbose_name="Titelbild")
+    first_photo_at = models.DateTimeField(blank=True, null=True, verbose_name="Erstes Foto")
+    last_photo_at = models.DateTimeField(blank=True, null=True, verbose_name="Letztes Foto")
+
+    class Meta:
+        ordering = ['-last_photo_at']
+        verbose_name = "Fotoalbum"
+        verbose_name_plural = "Fotoalben"
+        indexes = [
+            models.Index(fields=['-last_photo_at'], name='album_last_photo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event.title} ({self.photo_count} Fotos)"
+
+    def get_absolute_url(self):
+        return reverse('album_detail', kwargs={'event_id': self.event_id})
+
+    @classmethod
+    def refresh_for_event(cls, event_id):
+        """Recompute the album of one event, removing it when no photos are left"""
+        if not event_id:
+            return None
+
+        photos = Gallery.objects.filter(event_id=event_id)
+        stats = photos.aggregate(
+            photo_count=models.Count('pk'),
+            first_photo_at=models.Min('created_at'),
+            last_photo_at=models.Max('created_at'),
+        )
+        if not stats['photo_count']:
+            cls.objects.filter(event_id=event_id).delete()
+            return None
+
+        # Cover: the first photo uploaded to the event
+        cover_id = photos.order_by('created_at', 'pk').values_list('pk', flat=True).first()
+        album, _ = cls.objects.update_or_create(event_id=event_id, defaults={**stats, 'cover_id': cover_id})
+        return album
+
+
 class Contact(models.Model):
     """Contact model"""
     name = models.CharField(max_length=100, verbose_name="Name")
@@ -143,6 +297,8 @@ class EventRegistration(models.Model):
                                        help_text="Falls mit Einladungscode angemeldet")
     created_at = models.DateTimeField(auto_now_add=True)
     is_confirmed = models.BooleanField(default=False, verbose_name="Bestätigt")
+    # Normalized name, email and invitation code for the admin search (main/search.py)
+    search_key = models.CharField(max_length=255, blank=True, editable=False, db_index=True)
     
     class Meta:
         ordering = ['-created_at']
@@ -153,6 +309,17 @@ class EventRegistration(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.event.title}"
     
+    def save(self, *args, **kwargs):
+        self.search_key = self.build_search_key()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_key'}
+        super().save(*args, **kwargs)
+    
+    def build_search_key(self):
+        code = self.invitation_code.code if self.invitation_code_id else ''
+        return make_search_key(self.last_name, self.first_name, self.email, code, self.event.title)
+    
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -219,7 +386,15 @@ class InvitationCode(models.Model):
         # Always convert to uppercase before saving
         if self.code:
             self.code = self.code.upper().strip()
+        previous_code = None
+        if self.pk:
+            previous_code = InvitationCode.objects.filter(pk=self.pk).values_list('code', flat=True).first()
         super().save(*args, **kwargs)
+        
+        # The code is part of the registrations' search keys
+        if previous_code and previous_code != self.code:
+            for registration in self.registrations.all():
+                registration.save(update_fields=['search_key'])
     
     def is_valid(self):
         """Check if invitation code is still valid"""
@@ -271,6 +446,8 @@ class Document(models.Model):
     is_public = models.BooleanField(default=True, verbose_name="Öffentlich zugänglich")
     download_count = models.PositiveIntegerField(default=0, verbose_name="Anzahl Downloads")
     file_size = models.PositiveIntegerField(blank=True, null=True, verbose_name="Dateigröße (Bytes)")
+    # SHA-256 of the file; converted PDFs are stored under this key (main/conversion.py)
+    file_hash = models.CharField(max_length=64, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -278,6 +455,10 @@ class Document(models.Model):
         ordering = ['-created_at']
         verbose_name = "Dokument"
         verbose_name_plural = "Dokumente"
+        indexes = [
+            # Keyset pagination of /herunterladen/ (views.DOCUMENT_ORDERING)
+            models.Index(fields=['is_public', '-is_featured', '-created_at', '-id'], name='document_public_keyset_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -285,6 +466,10 @@ class Document(models.Model):
     def save(self, *args, **kwargs):
         if self.file:
             self.file_size = self.file.size
+            update_fields = kwargs.get('update_fields')
+            # Only hash new uploads (or rows from before the hash existed)
+            if (not self.file._committed or not self.file_hash) and (update_fields is None or 'file' in update_fields):
+                self.file_hash = file_sha256(self.file)
         super().save(*args, **kwargs)
 
     @property
@@ -306,9 +491,54 @@ class Document(models.Model):
             size /= 1024.0
         return f"{size:.1f} TB"
 
+    def get_absolute_url(self):
+        return reverse('document_detail', kwargs={'pk': self.pk})
+
     def get_download_url(self):
         return reverse('document_download', kwargs={'pk': self.pk})
 
+    @property
+    def content_text(self):
+        """Extracted file contents for the search index ('' until extracted)"""
+        try:
+            return self.extracted_text.text
+        except DocumentText.DoesNotExist:
+            return ''
+
+
+class DocumentPreview(models.Model):
+    """Page count and first-page thumbnail per file content, shared by equal files (main/previews.py)"""
+    file_hash = models.CharField(max_length=64, unique=True)
+    page_count = models.PositiveIntegerField(blank=True, null=True, verbose_name="Seitenzahl")
+    # FileField, not ImageField: no responsive derivatives for thumbnails
+    thumbnail = models.FileField(upload_to='previews/', blank=True, verbose_name="Vorschaubild")
+    width = models.PositiveIntegerField(blank=True, null=True)
+    height = models.PositiveIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Dokumentvorschau"
+        verbose_name_plural = "Dokumentvorschauen"
+
+    def __str__(self):
+        return self.file_hash
+
+
+class DocumentText(models.Model):
+    """Plain text of a document file, extracted once per file hash (main/text_extraction.py)"""
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, primary_key=True,
+                                    related_name='extracted_text', verbose_name="Dokument")
+    file_hash = models.CharField(max_length=64)
+    text = models.TextField(blank=True)
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Dokumenttext"
+        verbose_name_plural = "Dokumenttexte"
+
+    def __str__(self):
+        return str(self.document)
+
 
 class Certificate(models.Model):
     """Certificate model for downloadable participant certificates"""
@@ -320,6 +550,8 @@ class Certificate(models.Model):
         verbose_name="Teilnehmernummer",
         help_text="Eindeutige Nummer für den Teilnehmer"
     )
+    event = models.ForeignKey(Event, on_delete=models.SET_NULL, blank=True, null=True, related_name="certificates",
+                              verbose_name="Veranstaltung", help_text="Leer bei Zertifikaten, die vor der Zuordnung erstellt wurden")
     event_title = models.CharField(max_length=200, verbose_name="Veranstaltungstitel")
     completion_date = models.DateField(verbose_name="Abschlussdatum")
     certificate_file = models.FileField(
@@ -329,6 +561,8 @@ class Certificate(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Normalized name, number and event title for the admin search (main/search.py)
+    search_key = models.CharField(max_length=255, blank=True, editable=False, db_index=True)
 
     class Meta:
         verbose_name = "Zertifikat"
@@ -338,12 +572,27 @@ class Certificate(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.event_title} ({self.participant_number})"
 
+    def save(self, *args, **kwargs):
+        self.search_key = self.build_search_key()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_key'}
+        super().save(*args, **kwargs)
+
+    def build_search_key(self):
+        return make_search_key(self.last_name, self.first_name, self.participant_number, self.event_title)
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
 
+    # Signed download links: the token carries the pk, so ids cannot be enumerated
+    DOWNLOAD_SALT = 'main.certificate.download'
+
     def get_download_url(self):
-        return reverse('certificate_download', kwargs={'pk': self.pk})
+        """Signed URL, valid for CERTIFICATE_DOWNLOAD_MAX_AGE seconds"""
+        token = signing.dumps(self.pk, salt=self.DOWNLOAD_SALT)
+        return reverse('certificate_download', kwargs={'token': token})
 
 
 class Announcement(models.Model):
@@ -421,3 +670,24 @@ class Announcement(models.Model):
             self.is_active and 
             self.start_date <= now <= self.end_date
         )
+
+
+class SearchIndexEntry(models.Model):
+    """Inverted index of the site search: one row per (object, term), see main/search.py"""
+    model = models.CharField(max_length=20, verbose_name="Modell")
+    object_id = models.PositiveIntegerField(verbose_name="Objekt-ID")
+    term = models.CharField(max_length=64, verbose_name="Suchbegriff")
+    weight = models.PositiveIntegerField(default=1, verbose_name="Gewicht")
+
+    class Meta:
+        verbose_name = "Suchindex-Eintrag"
+        verbose_name_plural = "Suchindex"
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id', 'term'], name='search_entry_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['term', 'model'], name='search_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} → {self.model} {self.object_id}"
@@ -0,0 +1,120 @@
+"""
+Keyset (cursor) pagination.
+
+Django's Paginator needs a COUNT(*) plus an OFFSET query, which gets slower
+with every page. KeysetPaginator instead remembers the sort key of the last
+item of a page in an opaque cursor and fetches the next page with
+``WHERE (key) < (last key) ORDER BY key LIMIT n``, which an index can answer
+directly no matter how deep the page is.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator, iterable like a Django Page"""
+
+    def __init__(self, object_list, cursor=None, next_cursor=None):
+        self.object_list = object_list
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by a unique ordering, e.g.
+    KeysetPaginator(News.objects.all(), 9, ordering=('-published_date', '-pk'))
+
+    The last ordering field must be unique (normally 'pk' / '-pk').
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = list(ordering)
+        self.model = queryset.model
+
+    def _fields(self):
+        for key in self.ordering:
+            descending = key.startswith('-')
+            name = key.lstrip('-')
+            field = self.model._meta.pk if name == 'pk' else self.model._meta.get_field(name)
+            yield name, field, descending
+
+    def encode_cursor(self, obj):
+        values = []
+        for name, field, _ in self._fields():
+            value = getattr(obj, field.attname)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw)
+            fields = list(self._fields())
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise InvalidCursor(cursor)
+            return [field.to_python(value) for (_, field, _), value in zip(fields, values)]
+        except InvalidCursor:
+            raise
+        except (ValueError, TypeError, ValidationError) as e:
+            raise InvalidCursor(cursor) from e
+
+    def _after(self, values):
+        """Q object selecting all rows that sort after the given key values"""
+        fields = list(self._fields())
+        condition = Q()
+        for i, (name, _, descending) in enumerate(fields):
+            step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[i]})
+            for j in range(i):
+                step &= Q(**{fields[j][0]: values[j]})
+            condition |= step
+        return condition
+
+    def get_page(self, cursor=None):
+        """Return the page after cursor; an invalid cursor yields the first page"""
+        queryset = self.queryset.order_by(*self.ordering)
+        if cursor:
+            try:
+                queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+            except InvalidCursor:
+                cursor = None
+
+        items = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(items) > self.per_page:
+            items = items[:self.per_page]
+            next_cursor = self.encode_cursor(items[-1])
+        return KeysetPage(items, cursor=cursor, next_cursor=next_cursor)
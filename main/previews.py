@@ -0,0 +1,159 @@
+"""
+Precomputed document previews: page count and a first-page thumbnail.
+
+Computed once per file content (DocumentPreview is keyed by the file hash) in
+the background worker pool after a document has been saved. Office files are
+converted to PDF first; the PDF is kept in the converted-PDF store
+(main/conversion.py), so the first download does not convert again.
+
+The thumbnail is rendered with pdftoppm (poppler) when it is installed,
+otherwise the text of the first page is drawn onto a blank page.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import textwrap
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageDraw, ImageFont
+
+from . import workers
+from .conversion import convert_file, converted_pdf_name, run_sandboxed, save_converted_pdf
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_DIR = 'previews'
+DEFAULT_THUMBNAIL_WIDTH = 300
+A4_RATIO = 297 / 210
+
+
+def preview_name(file_hash):
+    return f'{PREVIEW_DIR}/{file_hash}.jpg'
+
+
+def _rasterize_with_pdftoppm(binary, pdf_path, width, timeout):
+    with tempfile.TemporaryDirectory(prefix='preview-') as workdir:
+        prefix = os.path.join(workdir, 'page')
+        subprocess.run(
+            [binary, '-f', '1', '-l', '1', '-singlefile', '-jpeg', '-scale-to-x', str(width),
+             '-scale-to-y', '-1', pdf_path, prefix],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout, check=True,
+        )
+        with Image.open(prefix + '.jpg') as img:
+            img.load()
+            return img.convert('RGB')
+
+
+def _text_page_image(text, width):
+    """Blank page with the first lines of text, when no rasterizer is installed"""
+    height = round(width * A4_RATIO)
+    img = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.load_default(size=max(8, width // 32))
+    except TypeError:
+        # Pillow < 10.1: bitmap font without sizes
+        font = ImageFont.load_default()
+
+    margin = width // 12
+    line_height = max(10, width // 24)
+    columns = max(20, (width - 2 * margin) // max(5, line_height // 2))
+    y = margin
+    for paragraph in (text or '').splitlines():
+        for line in textwrap.wrap(paragraph, columns) or ['']:
+            if y + line_height > height - margin:
+                break
+            draw.text((margin, y), line, fill=(60, 60, 60), font=font)
+            y += line_height
+    draw.rectangle([0, 0, width - 1, height - 1], outline=(200, 200, 200))
+    return img
+
+
+def read_pdf_preview(pdf_path, width):
+    """(page_count, JPEG bytes of the first page, (width, height)) - runs sandboxed"""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(pdf_path)
+    page_count = len(reader.pages)
+
+    binary = shutil.which(getattr(settings, 'PDF_RASTERIZER_BINARY', 'pdftoppm'))
+    img = None
+    if binary:
+        try:
+            img = _rasterize_with_pdftoppm(binary, pdf_path, width, getattr(settings, 'CONVERSION_TIMEOUT', 10))
+        except (subprocess.SubprocessError, OSError) as e:
+            logger.warning('pdftoppm failed for %s: %s', pdf_path, e)
+    if img is None:
+        first_page = reader.pages[0].extract_text() if page_count else ''
+        img = _text_page_image(first_page, width)
+
+    buffer = BytesIO()
+    img.save(buffer, 'JPEG', quality=80, optimize=True)
+    return page_count, buffer.getvalue(), img.size
+
+
+def compute_preview(source_path, filename, converted_name, width):
+    """
+    Worker job (no database access): PDF version of the file (converted and
+    stored as converted_name in the default storage if needed) and its
+    preview data.
+    """
+    from django.core.files.storage import default_storage
+
+    if os.path.splitext(filename)[1].lower() == '.pdf':
+        pdf_path = source_path
+    else:
+        if not default_storage.exists(converted_name):
+            save_converted_pdf(default_storage, converted_name, convert_file(source_path, filename))
+        pdf_path = default_storage.path(converted_name)
+    return run_sandboxed(read_pdf_preview, pdf_path, width)
+
+
+def schedule_preview(document):
+    """Compute the preview of document.file in the background and store it as DocumentPreview"""
+    from .models import DocumentPreview
+
+    file_hash = document.file_hash
+    storage = document.file.storage
+
+    def store(result, error):
+        if error is not None:
+            logger.error('Preview generation failed for document %s: %s', document.pk, error)
+            return
+        page_count, thumbnail, (width, height) = result
+        preview, created = DocumentPreview.objects.get_or_create(
+            file_hash=file_hash,
+            defaults={'page_count': page_count, 'width': width, 'height': height},
+        )
+        if created or not preview.thumbnail:
+            name = preview_name(file_hash)
+            if storage.exists(name):
+                storage.delete(name)
+            preview.thumbnail.name = storage.save(name, ContentFile(thumbnail))
+            preview.save(update_fields=['thumbnail'])
+
+    try:
+        source_path = document.file.path
+    except NotImplementedError:
+        return
+    workers.submit(
+        compute_preview, source_path, os.path.basename(document.file.name), converted_pdf_name(document),
+        getattr(settings, 'DOCUMENT_THUMBNAIL_WIDTH', DEFAULT_THUMBNAIL_WIDTH),
+        callback=store,
+    )
+
+
+def attach_previews(documents):
+    """Set document.preview (DocumentPreview or None) on all documents with one query"""
+    from .models import DocumentPreview
+
+    documents = list(documents)
+    hashes = {document.file_hash for document in documents if document.file_hash}
+    previews = {preview.file_hash: preview for preview in DocumentPreview.objects.filter(file_hash__in=hashes)}
+    for document in documents:
+        document.preview = previews.get(document.file_hash)
+    return documents
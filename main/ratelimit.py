@@ -0,0 +1,60 @@
+"""
+Per-client failure limiter backed by the Django cache.
+
+Used where a form can be used to guess identifiers (certificate search):
+after too many failed attempts from one IP address within the window,
+further attempts are refused before any database query is made.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+# Not culled with the other cache entries, which would unblock clients
+cache = ConnectionProxy(caches, 'counters')
+
+
+def get_client_ip(request):
+    """
+    IP address of the client. Behind a reverse proxy set CLIENT_IP_HEADER
+    (e.g. 'HTTP_X_REAL_IP'), otherwise all clients share the proxy address.
+    """
+    header = getattr(settings, 'CLIENT_IP_HEADER', '')
+    if header and request.META.get(header):
+        return request.META[header].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class FailureLimiter:
+    """
+    limiter = FailureLimiter('certificate_search', max_failures=5, window=900)
+    if limiter.is_blocked(request): ...
+    limiter.record_failure(request)
+    """
+
+    def __init__(self, scope, max_failures, window):
+        self.scope = scope
+        self.max_failures = max_failures
+        self.window = window
+
+    def _key(self, request):
+        return f'failures:{self.scope}:{get_client_ip(request)}'
+
+    def failures(self, request):
+        return cache.get(self._key(request), 0)
+
+    def is_blocked(self, request):
+        return self.failures(request) >= self.max_failures
+
+    def record_failure(self, request):
+        """Count a failed attempt; the window restarts with every failure"""
+        key = self._key(request)
+        cache.add(key, 0, self.window)
+        try:
+            failures = cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(key, 1, self.window)
+            return 1
+        # incr() of FileBasedCache/LocMemCache is get() + set() with the default timeout
+        cache.touch(key, self.window)
+        return failures
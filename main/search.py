@@ -0,0 +1,277 @@
+"""
+Site search over events, news and documents.
+
+Searchable text is split into normalized, stemmed terms and stored in the
+SearchIndexEntry table (an inverted index: term -> object), which is kept up
+to date by signals (main/signals.py). A query is answered by an indexed
+lookup of its terms instead of icontains scans over the TextFields, and works
+the same on SQLite, MySQL and PostgreSQL.
+"""
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+
+# Field weights per searchable model, a hit in the title ranks highest
+SEARCH_MODELS = {
+    'event': {
+        'model': 'Event',
+        'fields': {'title': 5, 'location': 2, 'description': 1},
+    },
+    'news': {
+        'model': 'News',
+        'fields': {'title': 5, 'content': 1},
+    },
+    'document': {
+        'model': 'Document',
+        # content_text: the extracted file contents (DocumentText)
+        'fields': {'title': 5, 'description': 2, 'content_text': 1},
+        'select_related': ['extracted_text'],
+        'public_filter': {'is_public': True},
+    },
+}
+
+MAX_TERM_LENGTH = 64
+MIN_TERM_LENGTH = 2
+SEARCH_KEY_LENGTH = 255
+
+GERMAN_STOPWORDS = frozenset("""
+    aber alle als also am an auch auf aus bei bin bis da damit dann das dass
+    dem den der des die dies diese dir doch du durch ein eine einem einen einer
+    eines er es fur hat hatte ich ihr im in ist ja kann mit nach nicht noch
+    nur ob oder ohne sich sie sind so uber um und uns unter vom von vor war
+    wie wir wird zu zum zur
+""".split())
+
+TOKEN_RE = re.compile(r'\w+')
+UMLAUT_DIGRAPH_RE = re.compile(r'([aou])e')
+# Letters without a Unicode decomposition into base letter + accent
+SPECIAL_LETTERS = str.maketrans({'ß': 'ss', 'ı': 'i', 'ł': 'l', 'ø': 'o', 'đ': 'd', 'æ': 'ae', 'œ': 'oe'})
+
+
+def fold(text):
+    """
+    Lowercase and fold umlauts/accents, including the ae/oe/ue spellings:
+    'Bücherstraße' and 'Buecherstrasse' both become 'bucherstrasse'.
+    """
+    text = text.lower().translate(SPECIAL_LETTERS)
+    decomposed = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return UMLAUT_DIGRAPH_RE.sub(lambda m: m.group(1), text)
+
+
+def stem(word):
+    """
+    German stemmer (CISTEM, Weissweiler & Fraser 2017) for folded,
+    lowercase words: 'lesungen' -> 'lesung', 'bucher' -> 'buch'.
+    """
+    if word.startswith('ge') and len(word) >= 6:
+        word = word[2:]
+    word = word.replace('sch', '$').replace('ei', '%').replace('ie', '&')
+    word = re.sub(r'(.)\1', r'\1*', word)
+
+    while len(word) > 3:
+        if len(word) > 5:
+            if word.endswith(('em', 'er', 'nd')):
+                word = word[:-2]
+                continue
+        if word[-1] in 'tesn':
+            word = word[:-1]
+            continue
+        break
+
+    word = re.sub(r'(.)\*', r'\1\1', word)
+    return word.replace('&', 'ie').replace('%', 'ei').replace('$', 'sch')
+
+
+def analyze(text):
+    """Split text into index terms (folded, stemmed, without stopwords)"""
+    terms = []
+    for token in TOKEN_RE.findall(fold(text or '')):
+        if len(token) < MIN_TERM_LENGTH or token in GERMAN_STOPWORDS:
+            continue
+        terms.append(stem(token)[:MAX_TERM_LENGTH])
+    return terms
+
+
+def make_search_key(*values):
+    """
+    Normalized search key of short fields (names, email, codes): folded
+    tokens separated by spaces, 'Müller', 'Anna' -> 'muller anna'.
+    """
+    text = fold(' '.join(value for value in values if value))
+    return ' '.join(TOKEN_RE.findall(text))[:SEARCH_KEY_LENGTH]
+
+
+def search_key_filter(query, field='search_key', scan=False):
+    """
+    Q matching rows whose search key has a token starting with every token
+    of the query. The first token must start the key, which the index on the
+    column answers; the other tokens are only checked on the matching rows.
+    scan=True also accepts the first token at any word start
+    (LIKE '% token%'), which needs a full table scan.
+
+    SQLite's LIKE is case-insensitive and cannot use the (binary) index, so
+    the prefix is compared as a range there. The range's upper bound is only
+    correct under a binary collation, which SQLite columns have by default;
+    other backends get startswith (PostgreSQL answers it from the
+    varchar_pattern_ops index Django adds to indexed CharFields).
+    """
+    tokens = TOKEN_RE.findall(fold(query))
+    if not tokens:
+        return None
+
+    def word_start(token):
+        return Q(**{f'{field}__startswith': token}) | Q(**{f'{field}__contains': f' {token}'})
+
+    first, *rest = tokens
+    if scan:
+        condition = word_start(first)
+    elif connection.vendor == 'sqlite':
+        condition = Q(**{f'{field}__gte': first, f'{field}__lt': f'{first}\uffff'})
+    else:
+        condition = Q(**{f'{field}__startswith': first})
+    for token in rest:
+        condition &= word_start(token)
+    return condition
+
+
+def get_search_key(model):
+    """Key of a model in SEARCH_MODELS, or None if it is not searchable"""
+    for key, config in SEARCH_MODELS.items():
+        if model._meta.app_label == 'main' and model.__name__ == config['model']:
+            return key
+    return None
+
+
+def get_search_model(key):
+    return apps.get_model('main', SEARCH_MODELS[key]['model'])
+
+
+def term_weights(key, obj):
+    """{term: weight} of an object, weight = field weight x occurrences"""
+    weights = Counter()
+    for field, weight in SEARCH_MODELS[key]['fields'].items():
+        for term in analyze(getattr(obj, field, '')):
+            weights[term] += weight
+    return weights
+
+
+def index_object(obj):
+    """(Re)index one object; returns the number of distinct terms"""
+    from .models import SearchIndexEntry
+
+    key = get_search_key(type(obj))
+    weights = term_weights(key, obj)
+
+    with transaction.atomic():
+        SearchIndexEntry.objects.filter(model=key, object_id=obj.pk).delete()
+        SearchIndexEntry.objects.bulk_create(
+            [SearchIndexEntry(model=key, object_id=obj.pk, term=term, weight=weight)
+             for term, weight in weights.items()],
+            batch_size=500,
+        )
+    return len(weights)
+
+
+def remove_object(obj):
+    from .models import SearchIndexEntry
+
+    SearchIndexEntry.objects.filter(model=get_search_key(type(obj)), object_id=obj.pk).delete()
+
+
+def rebuild_index(keys=None):
+    """Index all objects of the given models (default: all); returns {key: count}"""
+    from .models import SearchIndexEntry
+
+    counts = {}
+    for key in keys or SEARCH_MODELS:
+        SearchIndexEntry.objects.filter(model=key).delete()
+        counts[key] = 0
+        queryset = get_search_model(key).objects.select_related(*SEARCH_MODELS[key].get('select_related', []))
+        for obj in queryset.iterator(chunk_size=200):
+            index_object(obj)
+            counts[key] += 1
+    return counts
+
+
+def search_ids(query, keys=None, limit=None):
+    """
+    Ranked [(key, object_id, score), ...] of objects containing all terms of
+    the query. Score: sum of the field weights of all matching terms.
+    """
+    from .models import SearchIndexEntry
+
+    terms = set(analyze(query))
+    if not terms:
+        return []
+
+    entries = SearchIndexEntry.objects.filter(term__in=terms)
+    if keys:
+        entries = entries.filter(model__in=keys)
+    rows = (
+        entries.values('model', 'object_id')
+        .annotate(matched=Count('term'), score=Sum('weight'))
+        .filter(matched=len(terms))
+        .order_by('-score', '-object_id')
+    )
+    if limit:
+        rows = rows[:limit]
+    return [(row['model'], row['object_id'], row['score']) for row in rows]
+
+
+def search(query, keys=None, limit=50):
+    """Ranked [(key, obj, score), ...] of publicly visible objects"""
+    hits = search_ids(query, keys, limit)
+
+    ids_by_key = defaultdict(list)
+    for key, object_id, _ in hits:
+        ids_by_key[key].append(object_id)
+
+    objects = {}
+    for key, ids in ids_by_key.items():
+        queryset = get_search_model(key).objects.filter(**SEARCH_MODELS[key].get('public_filter', {}))
+        objects[key] = queryset.in_bulk(ids)
+
+    return [(key, objects[key][object_id], score)
+            for key, object_id, score in hits if object_id in objects[key]]
+
+
+class SearchIndexAdminMixin:
+    """
+    Admin search through the search index. search_fields should only list
+    short fields (titles, names); long texts are found via the index.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if not search_term:
+            return results, may_have_duplicates
+
+        key = get_search_key(self.model)
+        ids = [object_id for _, object_id, _ in search_ids(search_term, keys=[key])]
+        if ids:
+            # queryset still carries the list filters of the changelist
+            results |= queryset.filter(pk__in=ids)
+        return results, may_have_duplicates
+
+
+class SearchKeyAdminMixin:
+    """
+    Admin search over the precomputed search_key column instead of joined
+    LIKE scans. Keys starting with the search term are looked up through the
+    index; only if there are none, the whole column is scanned for the term
+    at any word start (first name, email, ...).
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        condition = search_key_filter(search_term)
+        if condition is None:
+            return queryset, False
+        results = queryset.filter(condition)
+        if not results.exists():
+            results = queryset.filter(search_key_filter(search_term, scan=True))
+        return results, False
@@ -1 +1,136 @@
-"""(Reverted) signals module intentionally left empty."""
+"""
+Signal handlers for the main app
+"""
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .image_utils import generate_derivatives, get_image_fields, normalize_fieldfile
+from .models import Document, DocumentPreview, DocumentText, EventAlbum, Gallery
+from .previews import schedule_preview
+from .search import SEARCH_MODELS, get_search_key, index_object, remove_object
+from .text_extraction import schedule_text_extraction
+from .versions import bump_version, is_versioned
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(pre_save)
+def normalize_uploaded_images(sender, instance, raw=False, **kwargs):
+    """Rotate, strip and downscale new uploads before they are written to storage"""
+    if raw or sender._meta.app_label != 'main':
+        return
+
+    for field in get_image_fields(sender):
+        fieldfile = getattr(instance, field.name)
+        # Only fresh uploads, files already in storage are committed
+        if not fieldfile or fieldfile._committed:
+            continue
+        try:
+            if normalize_fieldfile(fieldfile, sender.__name__):
+                # Keep width_field/height_field in sync with the downscaled image
+                field.update_dimension_fields(instance, force=True)
+        except Exception as e:
+            # Store the original rather than losing the upload
+            logger.warning('Image normalization failed for %s.%s (%s): %s',
+                           sender.__name__, field.name, fieldfile.name, str(e))
+
+
+@receiver(post_save)
+def create_image_derivatives(sender, instance, raw=False, **kwargs):
+    """Generate responsive image derivatives after an image has been uploaded"""
+    if raw or sender._meta.app_label != 'main':
+        return
+
+    for field in get_image_fields(sender):
+        fieldfile = getattr(instance, field.name)
+        if not fieldfile:
+            continue
+        try:
+            generate_derivatives(fieldfile)
+        except Exception as e:
+            # Never break saving because of a broken image
+            logger.error('Derivative generation failed for %s.%s (pk=%s): %s',
+                         sender.__name__, field.name, instance.pk, str(e))
+
+
+@receiver(pre_save, sender=Gallery)
+def remember_gallery_event(sender, instance, raw=False, **kwargs):
+    """Remember the previous event, a moved photo changes two albums"""
+    instance._previous_event_id = None
+    if not raw and instance.pk:
+        instance._previous_event_id = (
+            Gallery.objects.filter(pk=instance.pk).values_list('event_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Gallery)
+def update_album_on_save(sender, instance, raw=False, **kwargs):
+    # loaddata: the other photos may not be loaded yet, fixtures carry their own EventAlbum rows
+    if raw:
+        return
+    EventAlbum.refresh_for_event(instance.event_id)
+    previous = getattr(instance, '_previous_event_id', None)
+    if previous and previous != instance.event_id:
+        EventAlbum.refresh_for_event(previous)
+
+
+@receiver(post_delete, sender=Gallery)
+def update_album_on_delete(sender, instance, **kwargs):
+    EventAlbum.refresh_for_event(instance.event_id)
+
+
+@receiver(post_save)
+def update_search_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    key = get_search_key(sender)
+    # loaddata: related rows (extracted texts) may not be loaded yet, see "manage.py rebuild_search_index"
+    if raw or not key:
+        return
+    if update_fields is not None and not set(update_fields) & set(SEARCH_MODELS[key]['fields']):
+        # Only other fields were saved (e.g. the download counter)
+        return
+    index_object(instance)
+
+
+@receiver(post_delete)
+def remove_from_search_index(sender, instance, **kwargs):
+    if get_search_key(sender):
+        remove_object(instance)
+
+
+@receiver(post_save, sender=Document)
+def extract_document_text(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Extract the file contents for the search index when the file has changed"""
+    if raw or not instance.file or not instance.file_hash:
+        return
+    if update_fields is not None and 'file' not in update_fields:
+        # e.g. the download counter
+        return
+    if DocumentText.objects.filter(document=instance, file_hash=instance.file_hash).exists():
+        return
+    # The worker's callback looks the document up on its own connection
+    transaction.on_commit(lambda: schedule_text_extraction(instance))
+
+
+@receiver(post_save, sender=Document)
+def create_document_preview(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Page count and thumbnail, once per file content"""
+    if raw or not instance.file or not instance.file_hash:
+        return
+    if update_fields is not None and 'file' not in update_fields:
+        return
+    if DocumentPreview.objects.filter(file_hash=instance.file_hash).exists():
+        return
+    # Like the text extraction: the worker's callback must see the committed document
+    transaction.on_commit(lambda: schedule_preview(instance))
+
+
+@receiver([post_save, post_delete])
+def bump_model_version(sender, **kwargs):
+    """Caches keyed by the model's version are rebuilt (main/versions.py)"""
+    if is_versioned(sender):
+        bump_version(sender)
+        # Again after the commit: a request in between may have cached the old rows
+        transaction.on_commit(lambda: bump_version(sender))
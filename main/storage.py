@@ -0,0 +1,164 @@
+"""
+Content-addressed media storage.
+
+Every distinct file content is kept once, as MEDIA_ROOT/.blobs/<sha256[:2]>/<sha256>;
+the names the models store are hard links to these blobs. Names, URLs and
+everything derived from them (upload_to, image derivatives, converted PDFs)
+stay as with FileSystemStorage, but the same photo uploaded for an event, a
+news item and the gallery occupies the disk once.
+
+The link count of a blob is its reference count, kept by the filesystem:
+saving a duplicate adds a link, deleting a name removes one, and the blob
+goes with its last name. No database is involved, so the storage also works
+in the background worker processes (main/workers.py). Blobs left behind by
+concurrent deletes (link count 1) are removed by the media garbage collector.
+"""
+import errno
+import hashlib
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+BLOB_DIR = '.blobs'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that hard-links duplicate contents to one blob"""
+
+    @property
+    def blob_root(self):
+        return os.path.join(self.location, BLOB_DIR)
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_root, digest[:2], digest)
+
+    def _spool(self, content):
+        """Hash content into a temporary file next to the blobs: (temp_path, hex digest)"""
+        os.makedirs(self.blob_root, exist_ok=True)
+        digest = hashlib.sha256()
+        if hasattr(content, 'temporary_file_path'):
+            # Already on disk (large uploads): hash it and move it, no copy
+            for chunk in content.chunks():
+                digest.update(chunk)
+            fd, temp_path = tempfile.mkstemp(dir=self.blob_root, suffix='.part')
+            os.close(fd)
+            file_move_safe(content.temporary_file_path(), temp_path, allow_overwrite=True)
+        else:
+            fd, temp_path = tempfile.mkstemp(dir=self.blob_root, suffix='.part')
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    f.write(chunk)
+        if self.file_permissions_mode is not None:
+            os.chmod(temp_path, self.file_permissions_mode)
+        return temp_path, digest.hexdigest()
+
+    def _store_blob(self, temp_path, digest):
+        """Make sure the blob of digest exists (created from temp_path if new)"""
+        blob_path = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        try:
+            os.link(temp_path, blob_path)
+        except FileExistsError:
+            # Duplicate content
+            pass
+        return blob_path
+
+    def _save(self, name, content):
+        temp_path, digest = self._spool(content)
+        try:
+            try:
+                blob_path = self._store_blob(temp_path, digest)
+                while True:
+                    full_path = self.path(name)
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    try:
+                        os.link(blob_path, full_path)
+                        break
+                    except FileExistsError:
+                        # A file with this name exists, same rule as FileSystemStorage
+                        name = self.get_available_name(name)
+                    except FileNotFoundError:
+                        # The blob lost its last name concurrently and was removed
+                        blob_path = self._store_blob(temp_path, digest)
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                    raise
+                # No hard links possible here: a plain copy, without deduplication
+                with open(temp_path, 'rb') as f:
+                    return super()._save(name, File(f))
+        finally:
+            os.remove(temp_path)
+        return str(name).replace('\\', '/')
+
+    def delete(self, name):
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        path = self.path(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        digest = None
+        if stat.st_nlink == 2:
+            # Probably the last name of its blob (the blob is the other link)
+            digest = self._digest(path)
+        super().delete(name)
+        if digest:
+            blob_path = self.blob_path(digest)
+            try:
+                blob = os.stat(blob_path)
+            except FileNotFoundError:
+                return
+            if blob.st_ino == stat.st_ino and blob.st_nlink == 1:
+                os.remove(blob_path)
+
+    @staticmethod
+    def _digest(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def references(self, name):
+        """Number of names sharing the content of name (1 = not deduplicated)"""
+        try:
+            links = os.stat(self.path(name)).st_nlink
+        except FileNotFoundError:
+            return 0
+        return max(1, links - 1)
+
+    def content_key(self, name):
+        """Equal for names with the same stored content (hashable)"""
+        try:
+            stat = os.stat(self.path(name))
+        except OSError:
+            return name
+        return (stat.st_dev, stat.st_ino)
+
+    def link_existing(self, name):
+        """
+        Turn a file saved before this storage was used into a link to its blob.
+        Returns (digest, duplicate) - duplicate is True if the content was
+        stored already, i.e. disk space was freed.
+        """
+        path = self.path(name)
+        digest = self._digest(path)
+        blob_path = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        try:
+            os.link(path, blob_path)
+            return digest, False
+        except FileExistsError:
+            pass
+        if os.path.samefile(path, blob_path):
+            return digest, False
+        # Replace the file by a link to the blob, atomically
+        temp_path = f'{path}.{digest[:8]}.part'
+        os.link(blob_path, temp_path)
+        os.replace(temp_path, path)
+        return digest, True
@@ -0,0 +1,43 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from ..assets import page_assets, source_files
+from .calendar_tags import static_with_version
+
+register = template.Library()
+
+
+def _template_name(context):
+    # The page template, also while its base template is rendered
+    return getattr(context.template, 'name', None)
+
+
+@register.simple_tag(takes_context=True)
+def page_stylesheets(context):
+    """
+    Stylesheets of the page (see main/assets.py). After build_assets the
+    critical CSS is inlined and the bundle loads without blocking rendering,
+    without a build the source files are linked.
+    """
+    template_name = _template_name(context)
+    assets = page_assets(template_name)
+    if assets is None:
+        return format_html_join('\n', '<link rel="stylesheet" href="{}">',
+                                ((static_with_version(path),) for path in source_files(template_name)[0]))
+    url = static_with_version(assets['css'])
+    return format_html(
+        '<style>{}</style>\n'
+        '<link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '<noscript><link rel="stylesheet" href="{}"></noscript>',
+        mark_safe(assets['critical'].replace('</', '<\\/')), url, url,
+    )
+
+
+@register.simple_tag(takes_context=True)
+def page_scripts(context):
+    """Scripts of the page: the bundle after build_assets, the source files otherwise"""
+    template_name = _template_name(context)
+    assets = page_assets(template_name)
+    paths = [assets['js']] if assets else source_files(template_name)[1]
+    return format_html_join('\n', '<script src="{}"></script>', ((static_with_version(path),) for path in paths))
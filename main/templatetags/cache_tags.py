@@ -0,0 +1,16 @@
+from django import template
+
+from ..versions import versions_key
+
+register = template.Library()
+
+
+@register.simple_tag
+def model_version(*models):
+    """
+    Version counters of models for fragment cache keys (see main/versions.py):
+
+    {% model_version 'Event' 'News' as version %}
+    {% cache 86400 hero_gallery version %}...{% endcache %}
+    """
+    return versions_key(*models)
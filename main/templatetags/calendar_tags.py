@@ -1,8 +1,13 @@
 from django import template
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestFilesMixin, staticfiles_storage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.templatetags.static import static
 from django.conf import settings
+import functools
+import hashlib
 import os
-import time
 
 register = template.Library()
 
@@ -11,20 +16,36 @@ def get_item(dictionary, key):
     """Dictionary'den key ile değer almak için filter"""
     return dictionary.get(key)
 
+@functools.lru_cache(maxsize=None)
+def _versioned_static_url(path, mtime):
+    """URL with a content hash, computed once per file (and modification time)"""
+    full_path = finders.find(path)
+    if not full_path:
+        return static(path)
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(full_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return f"{static(path)}?v={digest.hexdigest()[:12]}"
+
+
+@receiver(setting_changed)
+def _reset_static_versions(setting, **kwargs):
+    if setting in ('DEBUG', 'STATIC_URL', 'STATICFILES_DIRS', 'STORAGES'):
+        _versioned_static_url.cache_clear()
+
+
 @register.simple_tag
 def static_with_version(path):
-    """Static dosya URL'sine version parametresi ekler"""
-    static_url = static(path)
-    
-    # Development modunda dosya değişiklik zamanını kullan
+    """
+    Static URL that changes only when the file does, so it can be cached forever.
+    With the manifest storage (production) it is the hashed name from
+    staticfiles.json, loaded once when the storage is created.
+    """
+    if isinstance(staticfiles_storage, ManifestFilesMixin):
+        return static(path)
     if settings.DEBUG:
-        try:
-            full_path = os.path.join(settings.BASE_DIR, 'static', path)
-            if os.path.exists(full_path):
-                mtime = int(os.path.getmtime(full_path))
-                return f"{static_url}?v={mtime}"
-        except:
-            pass
-    
-    # Fallback olarak timestamp kullan
-    return f"{static_url}?v={int(time.time())}"
\ No newline at end of file
+        # Picks up edits during development
+        full_path = finders.find(path)
+        return _versioned_static_url(path, os.path.getmtime(full_path) if full_path else None)
+    return _versioned_static_url(path, None)
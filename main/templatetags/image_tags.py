@@ -0,0 +1,47 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..image_utils import FORMAT_MIME_TYPES, format_srcset, get_derivatives
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_srcset(image, fmt='jpeg'):
+    """Return the srcset value of an image: {% image_srcset item.image 'webp' %}"""
+    return format_srcset(get_derivatives(image).get(fmt, []))
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', **attrs):
+    """
+    Render a <picture> element with WebP and JPEG srcsets.
+    Falls back to a plain <img> of the original if no derivatives exist yet.
+
+    {% responsive_image item.image alt=item.title sizes="(max-width: 768px) 50vw, 25vw" class="gallery-img" loading="lazy" %}
+    """
+    if not image:
+        return ''
+
+    derivatives = get_derivatives(image)
+    # None values are left out, e.g. width/height of images with unknown dimensions
+    extra_attrs = format_html_join('', ' {}="{}"', ((key.replace('_', '-'), value)
+                                                   for key, value in attrs.items() if value is not None))
+
+    if not derivatives:
+        return format_html('<img src="{}" alt="{}"{}>', image.url, alt, extra_attrs)
+
+    sources = format_html_join(
+        '',
+        '<source type="{}" srcset="{}" sizes="{}">',
+        ((FORMAT_MIME_TYPES[fmt], format_srcset(entries), sizes)
+         for fmt, entries in derivatives.items() if fmt != 'jpeg'),
+    )
+    img_srcset = format_srcset(derivatives.get('jpeg', []))
+    if img_srcset:
+        img = format_html('<img src="{}" srcset="{}" sizes="{}" alt="{}"{}>',
+                          image.url, img_srcset, sizes, alt, extra_attrs)
+    else:
+        img = format_html('<img src="{}" alt="{}"{}>', image.url, alt, extra_attrs)
+
+    return format_html('<picture>{}{}</picture>', sources, img)
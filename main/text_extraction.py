@@ -0,0 +1,130 @@
+"""
+Plain-text extraction of uploaded documents for the site search.
+
+The text is stored in the DocumentText side table together with the hash of
+the file it was extracted from, so a document is only read again when its
+file changes, never per query. Extraction parses the same untrusted files as
+the PDF conversion and therefore runs in the conversion sandbox
+(main/conversion.py), started from the background worker pool.
+"""
+import logging
+import os
+
+from django.conf import settings
+
+from . import workers
+from .conversion import run_sandboxed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CHARS = 200000
+
+
+def _pdf_text(path):
+    import PyPDF2
+
+    for page in PyPDF2.PdfReader(path).pages:
+        yield page.extract_text() or ''
+
+
+def _docx_text(path):
+    from docx import Document as DocxDocument
+
+    doc = DocxDocument(path)
+    for paragraph in doc.paragraphs:
+        yield paragraph.text
+    for table in doc.tables:
+        for row in table.rows:
+            yield ' '.join(cell.text for cell in row.cells)
+
+
+def _xlsx_text(path):
+    from openpyxl import load_workbook
+
+    max_sheets = getattr(settings, 'SPREADSHEET_MAX_SHEETS', 10)
+    max_rows = getattr(settings, 'SPREADSHEET_MAX_ROWS', 2000)
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets[:max_sheets]:
+            yield ws.title
+            for values in ws.iter_rows(max_row=max_rows, values_only=True):
+                yield ' '.join(str(value) for value in values if value is not None)
+    finally:
+        wb.close()
+
+
+def _pptx_text(path):
+    from pptx import Presentation
+
+    for slide in Presentation(path).slides:
+        for shape in slide.shapes:
+            if getattr(shape, 'has_text_frame', False):
+                yield shape.text_frame.text
+
+
+def _plain_text(path):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        yield f.read()
+
+
+EXTRACTORS = {
+    '.pdf': _pdf_text,
+    '.docx': _docx_text,
+    '.xlsx': _xlsx_text,
+    '.pptx': _pptx_text,
+    '.txt': _plain_text,
+}
+
+
+def extract_text(path, filename, max_chars=DEFAULT_MAX_CHARS):
+    """Text of a file (at most max_chars); '' for formats without extractor"""
+    extractor = EXTRACTORS.get(os.path.splitext(filename)[1].lower())
+    if extractor is None:
+        return ''
+
+    parts = []
+    length = 0
+    for part in extractor(path):
+        if not part.strip():
+            continue
+        parts.append(part)
+        length += len(part) + 1
+        if length >= max_chars:
+            break
+    return '\n'.join(parts)[:max_chars]
+
+
+def extract_text_sandboxed(path, filename, max_chars):
+    """Worker job: extract_text in a resource-limited child process"""
+    return run_sandboxed(extract_text, path, filename, max_chars)
+
+
+def schedule_text_extraction(document):
+    """Extract the text of document.file in the background, then store and index it"""
+    from .models import Document, DocumentText
+    from .search import index_object
+
+    document_id, file_hash = document.pk, document.file_hash
+
+    def store(text, error):
+        if error is not None:
+            # Stored empty anyway: the same file would fail again
+            logger.error('Text extraction failed for document %s: %s', document_id, error)
+            text = ''
+        document = Document.objects.filter(pk=document_id).first()
+        if document is None or document.file_hash != file_hash:
+            # Deleted or replaced in the meantime
+            return
+        DocumentText.objects.update_or_create(document=document, defaults={'file_hash': file_hash, 'text': text})
+        index_object(document)
+
+    try:
+        path = document.file.path
+    except NotImplementedError:
+        return
+    workers.submit(
+        extract_text_sandboxed, path, os.path.basename(document.file.name),
+        getattr(settings, 'DOCUMENT_TEXT_MAX_CHARS', DEFAULT_MAX_CHARS),
+        callback=store,
+    )
+
@@ -0,0 +1,218 @@
+"""
+Resumable chunked uploads for the admin (a subset of the tus 1.0 protocol).
+
+    POST   .../upload/          Upload-Length, Upload-Metadata -> 201, Location
+    HEAD   .../upload/<id>/     -> Upload-Offset (where to resume)
+    PATCH  .../upload/<id>/     Upload-Offset + chunk -> 204, new Upload-Offset
+    DELETE .../upload/<id>/     abort
+
+Chunks are streamed from the request into the partial file on disk, so
+memory use is bounded by the read buffer, not the file size. A completed
+upload is submitted with the admin form as '<field>_upload' (its id) instead
+of the file itself and attached to the file field like a regular upload: the
+storage moves the assembled file into MEDIA_ROOT instead of copying it.
+"""
+import base64
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+
+from .models import ChunkedUpload
+
+logger = logging.getLogger(__name__)
+
+TUS_VERSION = '1.0.0'
+READ_SIZE = 64 * 1024
+
+
+class AssembledUpload(UploadedFile):
+    """A completed ChunkedUpload as an uploaded file (moved, not copied, into storage)"""
+
+    def __init__(self, upload):
+        super().__init__(open(upload.path, 'rb'), name=upload.filename, size=upload.size)
+        self._path = upload.path
+
+    def temporary_file_path(self):
+        return self._path
+
+
+def tus_response(status, **headers):
+    response = HttpResponse(status=status)
+    response['Tus-Resumable'] = TUS_VERSION
+    response['Cache-Control'] = 'no-store'
+    for name, value in headers.items():
+        response[name.replace('_', '-')] = str(value)
+    return response
+
+
+def parse_metadata(header):
+    """'filename ZGF0ZWkucGRm,type ...' -> {'filename': 'datei.pdf', ...}"""
+    metadata = {}
+    for pair in filter(None, (part.strip() for part in header.split(','))):
+        key, _, value = pair.partition(' ')
+        try:
+            metadata[key] = base64.b64decode(value).decode('utf-8') if value else ''
+        except ValueError:
+            continue
+    return metadata
+
+
+def discard(upload):
+    """Delete an upload and its partial file"""
+    try:
+        os.remove(upload.path)
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def delete_expired_uploads():
+    """Remove uploads without progress for CHUNKED_UPLOAD_EXPIRY seconds"""
+    limit = timezone.now() - timedelta(seconds=settings.CHUNKED_UPLOAD_EXPIRY)
+    for upload in ChunkedUpload.objects.filter(updated_at__lt=limit):
+        discard(upload)
+
+
+def create_upload(request):
+    """POST: announce an upload of Upload-Length bytes"""
+    try:
+        size = int(request.headers['Upload-Length'])
+    except (KeyError, ValueError):
+        return tus_response(400)
+    if size < 0:
+        return tus_response(400)
+    if size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        return tus_response(413, Tus_Max_Size=settings.CHUNKED_UPLOAD_MAX_SIZE)
+
+    filename = os.path.basename(parse_metadata(request.headers.get('Upload-Metadata', '')).get('filename', ''))
+    if not filename:
+        return tus_response(400)
+
+    delete_expired_uploads()
+    upload = ChunkedUpload.objects.create(user=request.user, filename=filename[:255], size=size)
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    open(upload.path, 'wb').close()
+    return tus_response(201, Location=request.build_absolute_uri(f'{upload.pk}/'), Upload_Offset=0)
+
+
+def append_chunk(upload, stream, length):
+    """Write up to length bytes of stream at upload.offset; returns the bytes written"""
+    written = 0
+    with open(upload.path, 'r+b') as f:
+        f.seek(upload.offset)
+        # Leftovers of an interrupted chunk are overwritten from the offset
+        f.truncate()
+        while written < length:
+            data = stream.read(min(READ_SIZE, length - written))
+            if not data:
+                break
+            f.write(data)
+            written += len(data)
+    return written
+
+
+def upload_detail(request, upload_id):
+    """HEAD: current offset, PATCH: append a chunk, DELETE: abort"""
+    upload = ChunkedUpload.objects.filter(pk=upload_id, user=request.user).first()
+    if upload is None:
+        raise Http404("Upload nicht gefunden")
+
+    if request.method in ('HEAD', 'GET'):
+        return tus_response(200, Upload_Offset=upload.offset, Upload_Length=upload.size)
+
+    if request.method == 'DELETE':
+        discard(upload)
+        return tus_response(204)
+
+    if request.method != 'PATCH':
+        return tus_response(405)
+    if request.content_type != 'application/offset+octet-stream':
+        return tus_response(415)
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        length = int(request.headers.get('Content-Length') or 0)
+    except (KeyError, ValueError):
+        return tus_response(400)
+    if length > settings.CHUNKED_UPLOAD_CHUNK_SIZE or offset + length > upload.size:
+        return tus_response(413)
+
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if offset != upload.offset:
+            # The client has to ask for the offset (HEAD) and resume from there
+            return tus_response(409, Upload_Offset=upload.offset)
+        written = 0
+        try:
+            written = append_chunk(upload, request, length)
+        except OSError as e:
+            # Connection lost: keep what arrived, the client resumes from there
+            logger.warning('Chunked upload %s interrupted: %s', upload.pk, e)
+        finally:
+            upload.offset += written
+            upload.save(update_fields=['offset', 'updated_at'])
+    return tus_response(204, Upload_Offset=upload.offset)
+
+
+def completed_upload(upload_id, user):
+    """The completed ChunkedUpload with this id started by user; raises ValidationError"""
+    try:
+        upload = ChunkedUpload.objects.filter(pk=upload_id, user=user).first()
+    except ValidationError:
+        # Not a UUID
+        upload = None
+    if upload is None:
+        raise ValidationError("Der Upload wurde nicht gefunden. Bitte laden Sie die Datei erneut hoch.")
+    if not upload.is_complete or not os.path.exists(upload.path):
+        raise ValidationError("Der Upload ist unvollständig. Bitte laden Sie die Datei erneut hoch.")
+    return upload
+
+
+class ChunkedUploadFormMixin:
+    """
+    Admin form mixin: a file field in chunked_upload_fields can be filled
+    with '<field>_upload' = id of a completed ChunkedUpload of upload_user.
+    Call finish_chunked_uploads() after the instance has been saved.
+    """
+    chunked_upload_fields = ()
+    upload_user = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chunked_uploads = []
+        for name in self.chunked_upload_fields:
+            if name in self.fields and self.data.get(f'{name}_upload'):
+                self.fields[name].required = False
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for name in self.chunked_upload_fields:
+            upload_id = self.data.get(f'{name}_upload')
+            if name not in self.fields or not upload_id:
+                continue
+            try:
+                upload = completed_upload(upload_id, self.upload_user)
+            except ValidationError as e:
+                self.add_error(name, e)
+                continue
+            file = AssembledUpload(upload)
+            self.chunked_uploads.append((upload, file))
+            try:
+                # Field validation as for a regular upload (e.g. "is this an image")
+                cleaned_data[name] = self.fields[name].clean(file, self.get_initial_for_field(self.fields[name], name))
+            except ValidationError as e:
+                self.add_error(name, e)
+        return cleaned_data
+
+    def finish_chunked_uploads(self):
+        """Close and delete the uploads (the files have been moved into storage)"""
+        for upload, file in self.chunked_uploads:
+            file.close()
+            discard(upload)
+        self.chunked_uploads = []
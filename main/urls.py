@@ -9,13 +9,20 @@ urlpatterns = [
     path('veranstaltungen/', views.events, name='events'),
     path('veranstaltung/<int:pk>/', views.event_detail, name='event_detail'),
     path('nachrichten/', views.news, name='news'),
+    path('nachrichten/mehr/', views.news_chunk, name='news_chunk'),
     path('nachricht/<int:pk>/', views.news_detail, name='news_detail'),
     path('galerie/', views.gallery, name='gallery'),
+    path('galerie/mehr/', views.gallery_chunk, name='gallery_chunk'),
+    path('galerie/alben/', views.album_list, name='album_list'),
+    path('galerie/album/<int:event_id>/', views.album_detail, name='album_detail'),
     path('herunterladen/', views.herunterladen, name='herunterladen'),
+    path('herunterladen/mehr/', views.herunterladen_chunk, name='herunterladen_chunk'),
+    path('herunterladen/zip/', views.document_bundle, name='document_bundle'),
     path('dokument/<int:pk>/download/', views.document_download, name='document_download'),
     path('dokument/<int:pk>/', views.document_view, name='document_detail'),
+    path('suche/', views.search, name='search'),
     path('zertifikat-suche/', views.certificate_search, name='certificate_search'),
-    path('zertifikat/<int:pk>/download/', views.certificate_download, name='certificate_download'),
+    path('zertifikat/<str:token>/download/', views.certificate_download, name='certificate_download'),
     # Redirect old documents URL
     re_path(r'^dokumente/?$', RedirectView.as_view(pattern_name='herunterladen', permanent=True)),
     # Öffentlich sichtbare URL soll deutsch ("/kontakt/") olsun, name='contact' korunuyor.
@@ -0,0 +1,90 @@
+"""
+Model version counters for cache keys.
+
+Every model of the main app has a generation counter in the cache, bumped on
+post_save and post_delete (main/signals.py) - a cheap "has anything
+changed?" without MAX(updated_at) queries, also for models without an
+updated_at field. Caches put the counters of the models they depend on into
+their key, so a change is visible on the next request without invalidating
+anything explicitly:
+
+    {% model_version 'Event' 'News' as version %}
+    {% cache 86400 hero_gallery version %}...{% endcache %}
+
+    cache_key = f'news-feed:{versions_key(News)}'
+
+    @versioned_etag('News')
+    def news_chunk(request): ...
+
+A missing counter (empty cache, evicted key) starts at the current time in
+nanoseconds instead of 1, so it never repeats a value that older cache
+entries may still be stored under. The counters therefore need no database
+table, which also keeps them usable in the worker processes. They live in
+the 'counters' cache (settings.CACHES), shared by all processes and kept
+apart from the other entries, so culling a full cache does not drop them.
+
+QuerySet.update() and bulk_create() send no signals; code using them calls
+bump_version() itself.
+"""
+import time
+
+from django.apps import apps
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from django.views.decorators.http import etag
+
+# Not culled together with the fragments and lookups keyed by the versions
+cache = ConnectionProxy(caches, 'counters')
+
+KEY_PREFIX = 'model-version'
+APP_LABEL = 'main'
+
+# Derived rows rewritten in bulk with the objects they belong to
+UNVERSIONED_MODELS = {'main.searchindexentry'}
+
+
+def _key(model):
+    return f'{KEY_PREFIX}:{model._meta.label_lower}'
+
+
+def _get_model(model):
+    if isinstance(model, str):
+        # 'Event' or 'main.Event'
+        return apps.get_model(model if '.' in model else f'{APP_LABEL}.{model}')
+    return model
+
+
+def is_versioned(model):
+    return model._meta.app_label == APP_LABEL and model._meta.label_lower not in UNVERSIONED_MODELS
+
+
+def get_version(model):
+    """Current counter of a model (class, 'Event' or 'app_label.Model')"""
+    key = _key(_get_model(model))
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key, 0)
+    return version
+
+
+def bump_version(model):
+    key = _key(_get_model(model))
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Not in the cache (any more)
+        cache.set(key, time.time_ns(), None)
+    else:
+        # incr() of FileBasedCache/LocMemCache is get() + set() with the default timeout
+        cache.touch(key, None)
+
+
+def versions_key(*models):
+    """One key part for several models: '<v1>.<v2>'"""
+    return '.'.join(str(get_version(model)) for model in models)
+
+
+def versioned_etag(*models):
+    """View decorator: ETag from the versions of models, 304 while none of them changed"""
+    return etag(lambda request, *args, **kwargs: versions_key(*models))
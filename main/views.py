@@ -1,18 +1,42 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse, Http404
+from django.core import signing
+from django.http import FileResponse, JsonResponse, HttpResponse, Http404, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import content_disposition_header
 from django.utils.translation import gettext as _
 from django.utils import timezone
+from django.utils.text import Truncator
+from django.utils.functional import SimpleLazyObject
 from django.db import transaction
+from django.db.models import F
 from datetime import datetime, date
 import calendar
 import os
 import re
 from difflib import SequenceMatcher
-from .models import Event, News, TeamMember, Gallery, Contact, EventRegistration, Document, Certificate, InvitationCode, Announcement
+from urllib.parse import quote, urlencode
+from .models import Event, EventAlbum, News, TeamMember, Gallery, Contact, EventRegistration, Document, Certificate, InvitationCode, Announcement
 from .forms import ContactForm
-from .document_utils import DocumentConverter
+from .conversion import cached_pdf_name, get_converted_pdf
+from .image_utils import format_srcset, get_derivatives, pick_derivative
+from .pagination import KeysetPaginator
+from .previews import attach_previews
+from .ratelimit import FailureLimiter
+from .search import make_search_key, search as site_search, search_ids
+from .versions import versioned_etag
+from .zipstream import stream_zip, unique_name
+
+# Keyset orderings, the last key must be unique
+NEWS_ORDERING = ('-published_date', '-pk')
+GALLERY_ORDERING = ('-created_at', '-pk')
+ALBUM_ORDERING = ('-last_photo_at', '-pk')
+DOCUMENT_ORDERING = ('-is_featured', '-created_at', '-pk')
+
+# Grid cells are at most ~400px wide, 640px covers 1.5x screens
+GALLERY_THUMBNAIL_WIDTH = 640
 
 
 def fuzzy_name_match(name1, name2, threshold=0.85):
@@ -38,26 +62,43 @@ def fuzzy_name_match(name1, name2, threshold=0.85):
     
     return similarity >= threshold
 
-def home(request):
-    """Home page view"""
-    # Get upcoming events (not just featured ones) - all future events
-    from datetime import datetime
-    upcoming_events = Event.objects.filter(date__gte=timezone.now()).order_by('date')[:4]  # Next 4 events
-    featured_news = News.objects.filter(is_featured=True)[:3]
-    
-    # Get active announcement
-    active_announcement = Announcement.objects.filter(
-        is_active=True,
-        start_date__lte=timezone.now(),
-        end_date__gte=timezone.now()
-    ).first()
-    
+
+def paginate(request, queryset, per_page, ordering):
+    """
+    Keyset pagination via ?cursor=..., without COUNT(*)/OFFSET queries.
+    Old page-number URLs (?page=N) are still served by Django's Paginator,
+    so existing links and search engine results keep working.
+    """
+    page_number = request.GET.get('page')
+    if page_number:
+        return Paginator(queryset.order_by(*ordering), per_page).get_page(page_number)
+    return KeysetPaginator(queryset, per_page, ordering).get_page(request.GET.get('cursor'))
+
+
+def chunk_response(page, serialize):
+    """JSON response for infinite scrolling: items plus the cursor of the next chunk"""
+    return JsonResponse({
+        'items': [serialize(obj) for obj in page],
+        'next_cursor': page.next_cursor,
+        'has_next': page.has_next,
+    })
+
+def image_content_key(fieldfile):
+    """Key that is equal for the same image uploaded under different names"""
+    if not fieldfile:
+        return None
+    content_key = getattr(fieldfile.storage, 'content_key', None)
+    return content_key(fieldfile.name) if content_key else fieldfile.name
+
+
+def hero_gallery_items():
+    """Photos of the hero carousel on the home page"""
     # Build hero gallery images with priority:
     # 1. Event images (upcoming events with images) - future events first
     # 2. News images (Nachricht)
     # Total: 6 photos
     hero_gallery = []
-    used_image_paths = set()  # Track used images to prevent duplicates
+    used_images = set()  # Track used images to prevent duplicates (same content under other names, too)
     
     # 1. Add upcoming event images first (future events with images)
     events_with_images = Event.objects.filter(
@@ -66,15 +107,15 @@ def home(request):
     ).exclude(image='').order_by('date')[:6]
     
     for event in events_with_images:
-        image_path = event.image.name if event.image else None
-        if image_path and image_path not in used_image_paths:
+        image_key = image_content_key(event.image)
+        if image_key and image_key not in used_images:
             hero_gallery.append({
                 'image': event.image,
                 'title': event.title,
                 'type': 'event',
                 'id': event.pk
             })
-            used_image_paths.add(image_path)
+            used_images.add(image_key)
     
     # 2. Add news images if we need more (to reach 6 total)
     if len(hero_gallery) < 6:
@@ -83,15 +124,32 @@ def home(request):
         ).exclude(image='').order_by('-published_date')[:6 - len(hero_gallery)]
         
         for news in news_with_images:
-            image_path = news.image.name if news.image else None
-            if image_path and image_path not in used_image_paths:
+            image_key = image_content_key(news.image)
+            if image_key and image_key not in used_images:
                 hero_gallery.append({
                     'image': news.image,
                     'title': news.title,
                     'type': 'news',
                     'id': news.pk
                 })
-                used_image_paths.add(image_path)
+                used_images.add(image_key)
+
+    return hero_gallery
+
+
+def home(request):
+    """Home page view"""
+    # Get upcoming events (not just featured ones) - all future events
+    from datetime import datetime
+    upcoming_events = Event.objects.filter(date__gte=timezone.now()).order_by('date')[:4]  # Next 4 events
+    featured_news = News.objects.filter(is_featured=True)[:3]
+    
+    # Get active announcement
+    active_announcement = Announcement.objects.filter(
+        is_active=True,
+        start_date__lte=timezone.now(),
+        end_date__gte=timezone.now()
+    ).first()
     
     # Keep recent_gallery for backward compatibility (lower section)
     recent_gallery = Gallery.objects.all()[:6]
@@ -100,7 +158,8 @@ def home(request):
         'featured_events': upcoming_events,  # Keep same variable name for template compatibility
         'featured_news': featured_news,
         'recent_gallery': recent_gallery,
-        'hero_gallery': hero_gallery,  # New: prioritized gallery for hero section
+        # Prioritized gallery for hero section, only queried if its cached fragment is stale
+        'hero_gallery': SimpleLazyObject(hero_gallery_items),
         'active_announcement': active_announcement,
     }
     return render(request, 'main/home.html', context)
@@ -142,12 +201,17 @@ def events(request):
     ).order_by('date')
     
     # Group events by days
-    events_by_day = {}
-    for event in events_in_month:
-        day = event.date.day
-        if day not in events_by_day:
-            events_by_day[day] = []
-        events_by_day[day].append(event)
+    def group_by_day():
+        events_by_day = {}
+        for event in events_in_month:
+            day = event.date.day
+            if day not in events_by_day:
+                events_by_day[day] = []
+            events_by_day[day].append(event)
+        return events_by_day
+
+    # Only queried if the cached calendar fragments are stale
+    events_by_day = SimpleLazyObject(group_by_day)
     
     # Month names (German)
     month_names = [
@@ -363,16 +427,13 @@ def event_detail(request, pk):
         'related_events': related_events,
         'current_registrations': current_registrations,
         'is_past_event': is_past_event,  # Pass to template
+        'album': EventAlbum.objects.filter(event=event).first(),
     }
     return render(request, 'main/event_detail.html', context)
 
 def news(request):
     """News page view"""
-    news_list = News.objects.all()
-    paginator = Paginator(news_list, 9)  # 9 news per page
-    
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, News.objects.all(), 9, NEWS_ORDERING)  # 9 news per page
     
     context = {
         'page_obj': page_obj,
@@ -380,6 +441,24 @@ def news(request):
     }
     return render(request, 'main/news.html', context)
 
+
+def serialize_news(news_item):
+    return {
+        'id': news_item.pk,
+        'title': news_item.title,
+        'excerpt': Truncator(news_item.content).words(30),
+        'published_date': news_item.published_date.isoformat(),
+        'image': news_item.image.url if news_item.image else None,
+        'url': news_item.get_absolute_url(),
+    }
+
+
+@versioned_etag('News')
+def news_chunk(request):
+    """JSON chunk of news for infinite scrolling (?cursor=...)"""
+    page = KeysetPaginator(News.objects.all(), 9, NEWS_ORDERING).get_page(request.GET.get('cursor'))
+    return chunk_response(page, serialize_news)
+
 def news_detail(request, pk):
     """News detail page view"""
     news_item = get_object_or_404(News, pk=pk)
@@ -393,11 +472,7 @@ def news_detail(request, pk):
 
 def gallery(request):
     """Gallery page view"""
-    gallery_items = Gallery.objects.all()
-    paginator = Paginator(gallery_items, 12)  # 12 images per page
-    
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, Gallery.objects.all(), 12, GALLERY_ORDERING)  # 12 images per page
     
     context = {
         'page_obj': page_obj,
@@ -405,6 +480,88 @@ def gallery(request):
     }
     return render(request, 'main/gallery.html', context)
 
+
+def serialize_gallery_item(item):
+    derivatives = get_derivatives(item.image)
+    jpeg = derivatives.get('jpeg', [])
+    return {
+        'id': item.pk,
+        'title': item.title,
+        'image': item.image.url,
+        'thumbnail': pick_derivative(jpeg, GALLERY_THUMBNAIL_WIDTH) or item.image.url,
+        'srcset': {fmt: format_srcset(entries) for fmt, entries in derivatives.items()},
+        'width': item.width,
+        'height': item.height,
+        'event': {'id': item.event_id, 'title': item.event.title} if item.event_id else None,
+    }
+
+
+@versioned_etag('Gallery', 'Event')
+def gallery_chunk(request):
+    """JSON chunk of gallery images for the lazy-loading gallery (?cursor=...&event=...)"""
+    queryset = Gallery.objects.select_related('event')
+    event_id = request.GET.get('event', '')
+    if event_id.isdigit():
+        queryset = queryset.filter(event_id=event_id)
+    page = KeysetPaginator(queryset, 12, GALLERY_ORDERING).get_page(request.GET.get('cursor'))
+    return chunk_response(page, serialize_gallery_item)
+
+SEARCH_RESULT_TYPES = {
+    'event': ('Veranstaltung', 'fa-calendar', 'description', 'date'),
+    'news': ('Nachricht', 'fa-newspaper', 'content', 'published_date'),
+    'document': ('Dokument', 'fa-file-alt', 'description', 'created_at'),
+}
+
+
+def search(request):
+    """Site search over events, news and documents (ranked via the search index)"""
+    query = request.GET.get('q', '').strip()[:200]
+    results = []
+    if query:
+        for key, obj, score in site_search(query):
+            label, icon, text_field, date_field = SEARCH_RESULT_TYPES[key]
+            results.append({
+                'type': key,
+                'label': label,
+                'icon': icon,
+                'title': obj.title,
+                'excerpt': Truncator(getattr(obj, text_field)).words(30),
+                'date': getattr(obj, date_field),
+                'url': obj.get_absolute_url(),
+                'score': score,
+            })
+
+    context = {
+        'query': query,
+        'results': results,
+    }
+    return render(request, 'main/search.html', context)
+
+
+def album_list(request):
+    """Photo albums of all events, from the precomputed EventAlbum table"""
+    albums = EventAlbum.objects.select_related('event', 'cover')
+    page_obj = paginate(request, albums, 12, ALBUM_ORDERING)
+
+    context = {
+        'page_obj': page_obj,
+        'albums': page_obj,
+    }
+    return render(request, 'main/album_list.html', context)
+
+
+def album_detail(request, event_id):
+    """Photos of one event, shown like the gallery"""
+    album = get_object_or_404(EventAlbum.objects.select_related('event'), event_id=event_id)
+    page_obj = paginate(request, Gallery.objects.filter(event_id=event_id), 12, GALLERY_ORDERING)
+
+    context = {
+        'album': album,
+        'page_obj': page_obj,
+        'gallery_items': page_obj,
+    }
+    return render(request, 'main/gallery.html', context)
+
 def contact(request):
     """Contact page view with ModelForm (honeypot + PRG pattern)"""
     if request.method == 'POST':
@@ -445,34 +602,98 @@ def privacy(request):
     return render(request, 'main/privacy.html')
 
 
-def herunterladen(request):
-    """Download page view - renamed from documents"""
-    category = request.GET.get('category', '')
-    
+def public_documents(category='', query=''):
+    """
+    Public documents, optionally filtered by category and a search query.
+    The query is answered by the search index, which includes the extracted
+    file contents (DocumentText) - no file is opened per request.
+    """
     documents_list = Document.objects.filter(is_public=True)
-    
     if category:
         documents_list = documents_list.filter(category=category)
+    if query:
+        ids = [object_id for _, object_id, _ in search_ids(query, keys=['document'])]
+        documents_list = documents_list.filter(pk__in=ids)
+    return documents_list
+
+
+def herunterladen(request):
+    """Download page view - renamed from documents"""
+    category = request.GET.get('category', '')
+    query = request.GET.get('q', '').strip()
     
-    documents_list = documents_list.order_by('-is_featured', '-created_at')
+    documents_list = public_documents(category, query)
     
     # Get categories for filter
     categories = Document.CATEGORY_CHOICES
     
     # Pagination
-    paginator = Paginator(documents_list, 12)  # 12 documents per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, documents_list, 12, DOCUMENT_ORDERING)  # 12 documents per page
+    
+    attach_previews(page_obj)
+    
+    # Filters to keep in pagination links ("category=...&q=...&")
+    filters = urlencode({key: value for key, value in (('category', category), ('q', query)) if value})
     
     context = {
         'page_obj': page_obj,
         'documents': page_obj,
         'categories': categories,
         'selected_category': category,
+        'query': query,
+        'filter_query': f'{filters}&' if filters else '',
     }
     return render(request, 'main/herunterladen.html', context)
 
 
+def serialize_document(document):
+    return {
+        'id': document.pk,
+        'title': document.title,
+        'description': document.description,
+        'category': document.category,
+        'category_display': document.get_category_display(),
+        'file_extension': document.file_extension,
+        'file_size': document.formatted_file_size,
+        'is_featured': document.is_featured,
+        'download_count': document.download_count,
+        'page_count': document.preview.page_count if document.preview else None,
+        'thumbnail': document.preview.thumbnail.url if document.preview and document.preview.thumbnail else None,
+        'url': document.get_absolute_url(),
+        'download_url': document.get_download_url(),
+    }
+
+
+def herunterladen_chunk(request):
+    """JSON chunk of public documents for infinite scrolling (?cursor=...&category=...&q=...)"""
+    documents_list = public_documents(request.GET.get('category', ''), request.GET.get('q', '').strip())
+    page = KeysetPaginator(documents_list, 12, DOCUMENT_ORDERING).get_page(request.GET.get('cursor'))
+    attach_previews(page)
+    return chunk_response(page, serialize_document)
+
+
+def get_certificate_search_limiter():
+    return FailureLimiter(
+        'certificate_search',
+        max_failures=getattr(settings, 'CERTIFICATE_SEARCH_MAX_FAILURES', 5),
+        window=getattr(settings, 'CERTIFICATE_SEARCH_BLOCK_SECONDS', 900),
+    )
+
+
+def find_certificate(first_name, last_name, participant_number):
+    """
+    Look up a certificate by its unique participant number, then compare the
+    names in Python (case, umlaut spelling and extra spaces are ignored).
+    """
+    certificate = Certificate.objects.filter(participant_number=participant_number).first()
+    if certificate is None:
+        return None
+    if (make_search_key(certificate.first_name) != make_search_key(first_name)
+            or make_search_key(certificate.last_name) != make_search_key(last_name)):
+        return None
+    return certificate
+
+
 def certificate_search(request):
     """Certificate search view"""
     if request.method == 'POST':
@@ -484,51 +705,75 @@ def certificate_search(request):
             messages.error(request, 'Bitte füllen Sie alle Felder aus.')
             return render(request, 'main/certificate_search.html')
         
-        try:
-            certificate = Certificate.objects.get(
-                first_name__iexact=first_name,
-                last_name__iexact=last_name,
-                participant_number=participant_number
-            )
-            return redirect('certificate_download', pk=certificate.pk)
-        except Certificate.DoesNotExist:
-            messages.error(request, 'Kein Zertifikat mit diesen Daten gefunden. Bitte überprüfen Sie Ihre Eingaben.')
+        # Refuse guessing participant numbers before touching the database
+        limiter = get_certificate_search_limiter()
+        if limiter.is_blocked(request):
+            messages.error(request, 'Zu viele fehlgeschlagene Versuche. Bitte versuchen Sie es später erneut.')
+            return render(request, 'main/certificate_search.html', status=429)
+        
+        certificate = find_certificate(first_name, last_name, participant_number)
+        if certificate:
+            return redirect(certificate.get_download_url())
+        
+        limiter.record_failure(request)
+        messages.error(request, 'Kein Zertifikat mit diesen Daten gefunden. Bitte überprüfen Sie Ihre Eingaben.')
     
     return render(request, 'main/certificate_search.html')
 
 
-def certificate_download(request, pk):
-    """Certificate download view"""
-    certificate = get_object_or_404(Certificate, pk=pk)
-    
+def certificate_download(request, token):
+    """
+    Certificate download via the signed, time-limited URL from the search.
+    With CERTIFICATE_ACCEL_REDIRECT_PREFIX set, nginx serves the file itself.
+    """
+    max_age = settings.CERTIFICATE_DOWNLOAD_MAX_AGE
     try:
-        response = HttpResponse(certificate.certificate_file.read(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{certificate.full_name}_Zertifikat.pdf"'
-        return response
-    except FileNotFoundError:
+        pk = signing.loads(token, salt=Certificate.DOWNLOAD_SALT, max_age=max_age)
+    except signing.SignatureExpired:
+        messages.error(request, 'Der Download-Link ist abgelaufen. Bitte suchen Sie Ihr Zertifikat erneut.')
+        return redirect('certificate_search')
+    except signing.BadSignature:
         raise Http404("Zertifikat nicht gefunden")
 
+    certificate = get_object_or_404(Certificate, pk=pk)
+    filename = f"{certificate.full_name}_Zertifikat.pdf"
+
+    accel_prefix = settings.CERTIFICATE_ACCEL_REDIRECT_PREFIX
+    if accel_prefix:
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(certificate.certificate_file.name)
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    else:
+        try:
+            response = FileResponse(certificate.certificate_file.open('rb'), as_attachment=True,
+                                    filename=filename, content_type='application/pdf')
+        except FileNotFoundError:
+            raise Http404("Zertifikat nicht gefunden")
+
+    # Personal document: browser cache only, for as long as the link is valid
+    patch_cache_control(response, private=True, max_age=max_age)
+    return response
+
+
+def count_downloads(document_ids):
+    """Increment download_count of the documents in one UPDATE (no read, no race)"""
+    # Only a counter: no version bump (main/versions.py), caches need not be rebuilt per download
+    Document.objects.filter(pk__in=document_ids).update(download_count=F('download_count') + 1)
+
 
 def document_download(request, pk):
     """Document download view - converts to PDF and serves the file"""
     document = get_object_or_404(Document, pk=pk, is_public=True)
     
+    original_filename = os.path.basename(document.file.name)
     try:
-        # Get the file path
-        file_path = document.file.path
-        original_filename = os.path.basename(document.file.name)
-        
-        # Convert to PDF
-        pdf_buffer = DocumentConverter.convert_to_pdf(file_path, original_filename)
-        
-        # Create response
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{document.title}.pdf"'
-        response.write(pdf_buffer.getvalue())
+        # Converted once per file content, then served from storage
+        pdf_name = get_converted_pdf(document)
+        response = FileResponse(document.file.storage.open(pdf_name, 'rb'), as_attachment=True,
+                                filename=f'{document.title}.pdf', content_type='application/pdf')
         
         # Increment download count
-        document.download_count += 1
-        document.save(update_fields=['download_count'])
+        count_downloads([document.pk])
         
         return response
         
@@ -544,8 +789,7 @@ def document_download(request, pk):
                 response['Content-Disposition'] = f'attachment; filename="{original_filename}"'
                 
                 # Increment download count
-                document.download_count += 1
-                document.save(update_fields=['download_count'])
+                count_downloads([document.pk])
                 
                 return response
         except Exception as file_error:
@@ -553,6 +797,49 @@ def document_download(request, pk):
             raise Http404("Document file not found")
 
 
+def bundle_entries(documents):
+    """
+    (archive name, opener) per document for stream_zip: the PDF version if it
+    has been converted already, else the original file - a bundle never
+    waits for conversions.
+    """
+    used = set()
+    for document in documents:
+        storage = document.file.storage
+        name = cached_pdf_name(document)
+        extension = '.pdf' if name else document.file_extension
+        name = name or document.file.name
+        title = document.title.replace('/', '-').replace('\\', '-').strip() or f'Dokument {document.pk}'
+        yield unique_name(f'{title}{extension}', used), lambda name=name, storage=storage: storage.open(name, 'rb')
+
+
+def document_bundle(request):
+    """
+    ZIP of the selected documents (?id=1&id=2) or of all documents matching
+    ?category=...&q=..., streamed while it is written (entries stored, not
+    compressed), so neither the archive nor a file is held in memory.
+    """
+    ids = [value for value in request.GET.getlist('id') if value.isdigit()]
+    category = request.GET.get('category', '')
+    if ids:
+        documents_list = Document.objects.filter(is_public=True, pk__in=ids)
+    else:
+        documents_list = public_documents(category, request.GET.get('q', '').strip())
+    max_files = getattr(settings, 'DOCUMENT_BUNDLE_MAX_FILES', 100)
+    documents = list(documents_list.order_by(*DOCUMENT_ORDERING)[:max_files])
+    if not documents:
+        raise Http404("Keine Dokumente gefunden")
+
+    count_downloads([document.pk for document in documents])
+
+    filename = 'Dokumente.zip'
+    if category and not ids:
+        filename = f'Dokumente_{dict(Document.CATEGORY_CHOICES).get(category, category)}.zip'
+    response = StreamingHttpResponse(stream_zip(bundle_entries(documents)), content_type='application/zip')
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
 def document_view(request, pk):
     """Document detail view (optional - for viewing document info before download)"""
     document = get_object_or_404(Document, pk=pk, is_public=True)
@@ -563,6 +850,8 @@ def document_view(request, pk):
         is_public=True
     ).exclude(pk=pk)[:3]
     
+    attach_previews([document])
+    
     context = {
         'document': document,
         'related_documents': related_documents,
@@ -0,0 +1,103 @@
+"""
+Background process pool for CPU-heavy work (image processing, PDF rendering).
+
+Jobs are plain functions that must not touch the database: they receive
+storage names/paths and return a result. The optional callback runs back in
+the web process and is the place to write results to the database.
+
+Set WORKER_POOL_SIZE = 0 in settings to run jobs inline (e.g. on hosts that
+do not allow forking, and in tests).
+"""
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKER_POOL_SIZE = 2
+
+_pool = None
+
+
+def get_pool_size():
+    return getattr(settings, 'WORKER_POOL_SIZE', DEFAULT_WORKER_POOL_SIZE)
+
+
+def get_pool():
+    """Lazily create the pool, so every gunicorn worker forks its own"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=get_pool_size())
+    return _pool
+
+
+def _reset_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+
+
+def _run_callback(callback, result, error):
+    try:
+        callback(result, error)
+    except Exception as e:
+        logger.error('Worker callback %s failed: %s', getattr(callback, '__name__', callback), str(e))
+
+
+def submit(fn, *args, callback=None):
+    """
+    Run fn(*args) in the background pool.
+    callback(result, error) is called with either the return value or the exception.
+    """
+    if not get_pool_size():
+        try:
+            result, error = fn(*args), None
+        except Exception as e:
+            result, error = None, e
+        if callback:
+            _run_callback(callback, result, error)
+        return None
+
+    submitting_thread = threading.get_ident()
+
+    def done(future):
+        error = future.exception()
+        result = None if error else future.result()
+        if callback:
+            _run_callback(callback, result, error)
+        # Done callbacks normally run in the pool's management thread, which
+        # gets its own database connection - don't leak it.
+        if threading.get_ident() != submitting_thread:
+            connection.close()
+
+    try:
+        future = get_pool().submit(fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed by the OOM killer) - start a fresh pool
+        logger.warning('Worker pool was broken, restarting it')
+        _reset_pool()
+        future = get_pool().submit(fn, *args)
+
+    future.add_done_callback(done)
+    return future
+
+
+def map_jobs(fn, args_list, chunksize=1):
+    """
+    Run fn(args) for every item of args_list in the pool and wait for all
+    results (in order). Exceptions of a job are raised here.
+    """
+    if not get_pool_size():
+        return [fn(args) for args in args_list]
+
+    try:
+        return list(get_pool().map(fn, args_list, chunksize=chunksize))
+    except BrokenProcessPool:
+        logger.warning('Worker pool was broken, restarting it')
+        _reset_pool()
+        raise
@@ -0,0 +1,74 @@
+"""
+ZIP archives generated while they are sent.
+
+zipfile can write to a non-seekable stream (it then appends a data descriptor
+after each entry), so entries are written into a small buffer that is emptied
+after every chunk - memory stays at one chunk, whatever the archive size.
+Entries are stored, not deflated: the files are mostly PDFs/Office files,
+which are compressed already.
+"""
+import io
+import time
+import zipfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only file object whose content is taken out by the generator"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def unique_name(name, used):
+    """name, or 'name (2).ext' etc. if it is already in used (the set is updated)"""
+    base, dot, extension = name.rpartition('.')
+    if not dot:
+        base, extension = name, ''
+    candidate, number = name, 1
+    while candidate.lower() in used:
+        number += 1
+        candidate = f'{base} ({number}){dot}{extension}'
+    used.add(candidate.lower())
+    return candidate
+
+
+def stream_zip(entries):
+    """
+    Yield the bytes of a ZIP archive of entries: (arcname, open_file) pairs,
+    open_file() returns a binary file object. Entries that cannot be opened
+    are skipped.
+    """
+    buffer = _StreamBuffer()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for arcname, open_file in entries:
+            try:
+                source = open_file()
+            except (FileNotFoundError, OSError):
+                continue
+            info = zipfile.ZipInfo(arcname, date_time=date_time)
+            info.compress_type = zipfile.ZIP_STORED
+            with source, archive.open(info, 'w') as target:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    yield buffer.take()
+            yield buffer.take()
+    # Central directory
+    yield buffer.take()
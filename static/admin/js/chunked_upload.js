@@ -0,0 +1,185 @@
+/**
+ * Resumable Chunked Uploads for Django Admin (see main/uploads.py)
+ * File inputs with data-chunked-upload="<endpoint>" are sent in chunks when
+ * the form is submitted; the form then carries "<name>_upload" = upload id
+ * instead of the file. An interrupted upload resumes from the last stored
+ * offset, also after a page reload (the upload URL is kept in localStorage).
+ */
+
+(function() {
+    'use strict';
+
+    const DEFAULT_CHUNK_SIZE = 5 * 1024 * 1024; // 5 MB
+    const MAX_RETRIES = 5;
+
+    function csrfToken(form) {
+        const input = form.querySelector('input[name="csrfmiddlewaretoken"]');
+        return input ? input.value : '';
+    }
+
+    function storageKey(endpoint, file) {
+        return ['chunked-upload', endpoint, file.name, file.size, file.lastModified].join(':');
+    }
+
+    // tus metadata values are base64 of UTF-8
+    function encodeMetadata(value) {
+        return btoa(unescape(encodeURIComponent(value)));
+    }
+
+    function tusRequest(method, url, token, headers, body) {
+        return fetch(url, {
+            method: method,
+            credentials: 'same-origin',
+            headers: Object.assign({'Tus-Resumable': '1.0.0', 'X-CSRFToken': token}, headers),
+            body: body,
+        });
+    }
+
+    async function currentOffset(url, token) {
+        try {
+            const response = await tusRequest('HEAD', url, token, {});
+            return response.ok ? parseInt(response.headers.get('Upload-Offset'), 10) : null;
+        } catch (error) {
+            return null;
+        }
+    }
+
+    function sleep(ms) {
+        return new Promise(function(resolve) { setTimeout(resolve, ms); });
+    }
+
+    async function uploadFile(endpoint, file, token, chunkSize, onProgress) {
+        const key = storageKey(endpoint, file);
+        let url = localStorage.getItem(key);
+        let offset = url ? await currentOffset(url, token) : null;
+
+        if (offset === null) {
+            const response = await tusRequest('POST', endpoint, token, {
+                'Upload-Length': String(file.size),
+                'Upload-Metadata': 'filename ' + encodeMetadata(file.name),
+            });
+            if (response.status !== 201) {
+                throw new Error(`Upload von "${file.name}" konnte nicht gestartet werden (HTTP ${response.status}).`);
+            }
+            url = response.headers.get('Location');
+            localStorage.setItem(key, url);
+            offset = 0;
+        }
+
+        let failures = 0;
+        while (offset < file.size) {
+            onProgress(offset / file.size);
+            try {
+                const response = await tusRequest('PATCH', url, token, {
+                    'Content-Type': 'application/offset+octet-stream',
+                    'Upload-Offset': String(offset),
+                }, file.slice(offset, offset + chunkSize));
+                // 409: the server has a different offset, continue from there
+                if (response.status !== 204 && response.status !== 409) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                offset = parseInt(response.headers.get('Upload-Offset'), 10);
+                failures = 0;
+            } catch (error) {
+                failures += 1;
+                if (failures > MAX_RETRIES) {
+                    throw new Error(`Upload von "${file.name}" abgebrochen (${error.message}). Erneut speichern setzt ihn fort.`);
+                }
+                await sleep(1000 * failures);
+                const serverOffset = await currentOffset(url, token);
+                if (serverOffset !== null) {
+                    offset = serverOffset;
+                }
+            }
+        }
+        onProgress(1);
+        // The key stays until the form is sent: a retry finds the upload complete
+        return url.replace(/\/$/, '').split('/').pop();
+    }
+
+    function progressElement(input) {
+        let progress = input.parentElement.querySelector('.chunked-upload-progress');
+        if (!progress) {
+            progress = document.createElement('div');
+            progress.className = 'chunked-upload-progress help';
+            input.parentElement.appendChild(progress);
+        }
+        return progress;
+    }
+
+    function addHiddenInput(form, name, value) {
+        const hidden = document.createElement('input');
+        hidden.type = 'hidden';
+        hidden.name = name;
+        hidden.value = value;
+        form.appendChild(hidden);
+    }
+
+    async function uploadAndSubmit(form, inputs, submitter) {
+        const token = csrfToken(form);
+        const keys = [];
+        for (const input of inputs) {
+            const endpoint = input.dataset.chunkedUpload;
+            const chunkSize = parseInt(input.dataset.chunkSize, 10) || DEFAULT_CHUNK_SIZE;
+            const progress = progressElement(input);
+            const files = Array.from(input.files);
+            const uploadIds = [];
+            for (let i = 0; i < files.length; i++) {
+                const label = files.length > 1 ? `Datei ${i + 1}/${files.length}: ` : '';
+                const uploadId = await uploadFile(endpoint, files[i], token, chunkSize, function(fraction) {
+                    progress.textContent = `⏳ ${label}${files[i].name} wird hochgeladen… ${Math.floor(fraction * 100)} %`;
+                });
+                uploadIds.push(uploadId);
+                keys.push(storageKey(endpoint, files[i]));
+            }
+            uploadIds.forEach(function(uploadId) {
+                addHiddenInput(form, input.name + '_upload', uploadId);
+            });
+            progress.textContent = '✅ Hochgeladen, wird gespeichert…';
+            // The files are on the server already, do not send them again
+            input.disabled = true;
+        }
+        // form.submit() does not send the clicked button ("Sichern und weiter bearbeiten" etc.)
+        if (submitter && submitter.name) {
+            addHiddenInput(form, submitter.name, submitter.value);
+        }
+        keys.forEach(function(key) { localStorage.removeItem(key); });
+        form.submit();
+    }
+
+    function initChunkedUploads() {
+        document.querySelectorAll('form').forEach(function(form) {
+            const inputs = form.querySelectorAll('input[type="file"][data-chunked-upload]');
+            if (!inputs.length) {
+                return;
+            }
+            let uploading = false;
+            form.addEventListener('submit', function(event) {
+                if (event.defaultPrevented) {
+                    return;
+                }
+                const pending = Array.from(inputs).filter(function(input) {
+                    return !input.disabled && input.files && input.files.length;
+                });
+                if (!pending.length) {
+                    return;
+                }
+                event.preventDefault();
+                if (uploading) {
+                    return;
+                }
+                uploading = true;
+                uploadAndSubmit(form, pending, event.submitter).catch(function(error) {
+                    uploading = false;
+                    alert('⚠️ ' + error.message);
+                });
+            });
+        });
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initChunkedUploads);
+    } else {
+        initChunkedUploads();
+    }
+})();
@@ -48,6 +48,12 @@
     
     // Validate file size
     function validateFileSize(input) {
+        // Sent in chunks by chunked_upload.js, the request size limit does not apply
+        if (input.dataset.chunkedUpload) {
+            clearError(input);
+            return true;
+        }
+        
         if (!input.files || input.files.length === 0) {
             clearError(input);
             return true;
@@ -102,6 +108,10 @@
                 validateFileSize(this);
             });
             
+            if (input.dataset.chunkedUpload) {
+                return;
+            }
+            
             // Add visual indicator
             const helpText = input.parentElement.querySelector('.help');
             if (helpText) {
@@ -112,6 +112,12 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // Gallery: load further images from the JSON chunk API while scrolling
+    const galleryGrid = document.querySelector('#galleryGrid[data-chunk-url]');
+    if (galleryGrid) {
+        initLazyGallery(galleryGrid);
+    }
+
     // Hero Gallery Carousel with Random Transition Effects
     const heroCarousel = document.querySelector('#heroGalleryCarousel');
     if (heroCarousel) {
@@ -186,6 +192,129 @@ function validateEmail(email) {
     return re.test(email);
 }
 
+function initLazyGallery(grid) {
+    let cursor = grid.dataset.nextCursor;
+    if (!cursor || !('IntersectionObserver' in window)) {
+        return; // Nothing more to load, or keep the "Weitere anzeigen" link
+    }
+
+    const pagination = document.getElementById('galleryPagination');
+    if (pagination) {
+        pagination.style.display = 'none';
+    }
+
+    const sentinel = document.createElement('div');
+    sentinel.className = 'gallery-sentinel text-center py-4';
+    grid.after(sentinel);
+
+    let loading = false;
+    const sizes = '(min-width: 992px) 25vw, (min-width: 768px) 33vw, 50vw';
+
+    function buildItem(item, index) {
+        const col = document.createElement('div');
+        col.className = 'col-lg-3 col-md-4 col-6 mb-4';
+        const wrapper = document.createElement('div');
+        wrapper.className = 'position-relative';
+
+        const picture = document.createElement('picture');
+        if (item.srcset.webp) {
+            const source = document.createElement('source');
+            source.type = 'image/webp';
+            source.srcset = item.srcset.webp;
+            source.sizes = sizes;
+            picture.appendChild(source);
+        }
+
+        const img = document.createElement('img');
+        img.src = item.thumbnail;
+        if (item.srcset.jpeg) {
+            img.srcset = item.srcset.jpeg;
+            img.sizes = sizes;
+        }
+        if (item.width && item.height) {
+            // Reserve the space before the image arrives
+            img.width = item.width;
+            img.height = item.height;
+        }
+        img.alt = item.title;
+        img.loading = 'lazy';
+        img.decoding = 'async';
+        img.className = 'gallery-img';
+        img.dataset.bsToggle = 'modal';
+        img.dataset.bsTarget = '#lightboxModal';
+        img.dataset.index = index;
+        img.dataset.src = item.image;
+        img.dataset.title = item.title;
+        picture.appendChild(img);
+
+        const caption = document.createElement('div');
+        caption.className = 'position-absolute bottom-0 start-0 end-0 bg-dark bg-opacity-75 text-white p-2';
+        const title = document.createElement('small');
+        title.textContent = item.title;
+        caption.appendChild(title);
+
+        wrapper.appendChild(picture);
+        wrapper.appendChild(caption);
+        col.appendChild(wrapper);
+        return col;
+    }
+
+    function stop() {
+        observer.disconnect();
+        sentinel.remove();
+    }
+
+    function loadMore() {
+        if (loading || !cursor) {
+            return;
+        }
+        loading = true;
+        sentinel.innerHTML = '<i class="fas fa-spinner fa-spin text-muted"></i>';
+
+        const url = new URL(grid.dataset.chunkUrl, window.location.href);
+        url.searchParams.set('cursor', cursor);
+        fetch(url, {credentials: 'same-origin'})
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(response.statusText);
+                }
+                return response.json();
+            })
+            .then(data => {
+                let index = grid.querySelectorAll('.gallery-img').length;
+                const fragment = document.createDocumentFragment();
+                data.items.forEach(item => fragment.appendChild(buildItem(item, index++)));
+                grid.appendChild(fragment);
+                grid.dispatchEvent(new CustomEvent('gallery:loaded'));
+
+                cursor = data.next_cursor;
+                sentinel.innerHTML = '';
+                loading = false;
+                if (!data.has_next) {
+                    stop();
+                }
+            })
+            .catch(() => {
+                // Fall back to the regular page links, continuing after the loaded images
+                stop();
+                if (pagination) {
+                    const nextLink = pagination.querySelector('a[rel="next"]');
+                    if (nextLink) {
+                        nextLink.href = `?cursor=${encodeURIComponent(cursor)}`;
+                    }
+                    pagination.style.display = '';
+                }
+            });
+    }
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadMore();
+        }
+    }, {rootMargin: '800px 0px'});
+    observer.observe(sentinel);
+}
+
 function openLightbox(src, alt) {
     // Create lightbox modal
     const lightbox = document.createElement('div');
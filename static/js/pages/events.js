@@ -0,0 +1,342 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Create dynamic tooltip element
+    const tooltip = document.createElement('div');
+    tooltip.className = 'event-tooltip';
+    document.body.appendChild(tooltip);
+
+    // Initialize Bootstrap tooltips for all elements with title attribute
+    const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
+    const tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
+        return new bootstrap.Tooltip(tooltipTriggerEl, {
+            placement: 'top',
+            trigger: 'hover focus',
+            delay: { show: 300, hide: 100 }
+        });
+    });
+
+    // Detect bottom row days for smart positioning
+    const calendarGrid = document.querySelector('.calendar-grid');
+    const calendarDays = document.querySelectorAll('.calendar-day');
+    const totalDays = calendarDays.length;
+    const daysPerWeek = 7;
+    const headerRows = 1; // Day headers
+    
+    // Mark bottom row days
+    calendarDays.forEach((day, index) => {
+        // Calculate which row this day is in (excluding header)
+        const dayIndex = index - daysPerWeek; // Subtract header row
+        if (dayIndex >= 0) {
+            const rowNumber = Math.floor(dayIndex / daysPerWeek);
+            const totalRows = Math.ceil((totalDays - daysPerWeek) / daysPerWeek);
+            
+            // If it's the last two rows, use smart positioning
+            if (rowNumber >= totalRows - 2) {
+                day.classList.add('bottom-row');
+            }
+        }
+    });
+    
+    // Enhanced hover preview functionality with smart positioning and improved UX
+    calendarDays.forEach(day => {
+        const preview = day.querySelector('.event-preview');
+        if (preview) {
+            let hoverTimeout;
+            let hideTimeout;
+            let isHovering = false;
+            let isPreviewHovering = false;
+            
+            day.addEventListener('mouseenter', function() {
+                isHovering = true;
+                clearTimeout(hoverTimeout);
+                clearTimeout(hideTimeout);
+                hoverTimeout = setTimeout(() => {
+                    if (isHovering || isPreviewHovering) {
+                        showPreview();
+                    }
+                }, 100);
+            });
+            
+            day.addEventListener('mouseleave', function() {
+                isHovering = false;
+                clearTimeout(hoverTimeout);
+                
+                // For top row days, use longer delay
+                const rect = day.getBoundingClientRect();
+                const isTopRow = rect.top < 200; // Days in top part of calendar
+                const delayTime = isTopRow ? 800 : 300; // Much longer delay for top rows
+                
+                console.log('Mouse leaving day, isTopRow:', isTopRow, 'delay:', delayTime);
+                
+                // Add delay before hiding to allow mouse movement to preview
+                hideTimeout = setTimeout(() => {
+                    console.log('Timeout triggered, isHovering:', isHovering, 'isPreviewHovering:', isPreviewHovering);
+                    if (!isHovering && !isPreviewHovering) {
+                        hidePreview();
+                    }
+                }, delayTime);
+            });
+
+            // Keep preview visible when hovering over the preview itself
+            preview.addEventListener('mouseenter', function() {
+                isPreviewHovering = true;
+                clearTimeout(hideTimeout);
+            });
+
+            preview.addEventListener('mouseleave', function() {
+                isPreviewHovering = false;
+                
+                // For top row days, use longer delay even when leaving preview
+                const rect = day.getBoundingClientRect();
+                const isTopRow = rect.top < 200;
+                const delayTime = isTopRow ? 500 : 150; // Longer delay for top rows
+                
+                console.log('Mouse leaving preview, isTopRow:', isTopRow, 'delay:', delayTime);
+                
+                // Shorter delay when leaving preview
+                hideTimeout = setTimeout(() => {
+                    console.log('Preview timeout triggered, isHovering:', isHovering, 'isPreviewHovering:', isPreviewHovering);
+                    if (!isHovering && !isPreviewHovering) {
+                        hidePreview();
+                    }
+                }, delayTime);
+            });
+            
+            function showPreview() {
+                // Calculate position for fixed positioning
+                const rect = day.getBoundingClientRect();
+                const scrollTop = window.pageYOffset || document.documentElement.scrollTop;
+                const scrollLeft = window.pageXOffset || document.documentElement.scrollLeft;
+                
+                const viewportHeight = window.innerHeight;
+                const spaceBelow = viewportHeight - rect.bottom;
+                const spaceAbove = rect.top;
+                const previewHeight = 290; // Estimated preview height
+                
+                // Debug logging for troubleshooting
+                console.log('Day position:', {
+                    top: rect.top, 
+                    bottom: rect.bottom, 
+                    spaceAbove, 
+                    spaceBelow, 
+                    viewportHeight,
+                    previewHeight
+                });
+                
+                let top, left;
+                
+                // Improved positioning logic - prevent viewport overflow
+                if (spaceBelow < previewHeight && spaceAbove > previewHeight) {
+                    // Position above - but ensure it doesn't go above viewport
+                    top = Math.max(20, rect.top + scrollTop - previewHeight); // Minimum 20px from top
+                    day.classList.add('bottom-row');
+                    console.log('Positioning above, calculated top:', top);
+                } else if (spaceAbove < 100) {
+                    // If very close to top, force position below
+                    top = rect.bottom + scrollTop + 5;
+                    day.classList.remove('bottom-row');
+                    console.log('Close to top, positioning below, calculated top:', top);
+                } else {
+                    // Position below - with smaller gap
+                    top = rect.bottom + scrollTop + 5;
+                    day.classList.remove('bottom-row');
+                    console.log('Default positioning below, calculated top:', top);
+                }
+                
+                // For very bottom rows, force positioning above but within viewport
+                const calendarBottom = document.querySelector('.calendar-grid').getBoundingClientRect().bottom;
+                if (rect.bottom > calendarBottom - 150) {
+                    top = Math.max(20, rect.top + scrollTop - previewHeight);
+                    day.classList.add('bottom-row');
+                    console.log('Bottom row adjustment, new top:', top);
+                }
+                
+                // Ensure preview doesn't go below viewport
+                const maxTop = scrollTop + viewportHeight - previewHeight - 20;
+                if (top > maxTop) {
+                    top = maxTop;
+                    console.log('Viewport bottom adjustment, new top:', top);
+                }
+                
+                // Center horizontally relative to the day
+                left = rect.left + scrollLeft - ((320 - rect.width) / 2);
+                
+                // Ensure preview stays within viewport horizontally
+                if (left < 10) left = 10;
+                if (left + 320 > window.innerWidth - 10) {
+                    left = window.innerWidth - 330;
+                }
+                
+                // Apply positioning
+                preview.style.position = 'fixed';
+                preview.style.top = (top - scrollTop) + 'px';
+                preview.style.left = left + 'px';
+                preview.style.width = '300px';
+                preview.style.opacity = '1';
+                preview.style.visibility = 'visible';
+                preview.style.transform = 'translateY(0)';
+                preview.style.zIndex = '99999'; // Maximum z-index
+                
+                // Create invisible bridge area for better mouse movement
+                createInvisibleBridge(day, preview, rect);
+            }
+            
+            function createInvisibleBridge(day, preview, dayRect) {
+                // Remove any existing bridge
+                const existingBridge = document.querySelector('.hover-bridge');
+                if (existingBridge) {
+                    existingBridge.remove();
+                }
+                
+                // Wait for preview to be positioned, then create bridge
+                setTimeout(() => {
+                    const bridge = document.createElement('div');
+                    bridge.className = 'hover-bridge';
+                    bridge.style.cssText = `
+                        position: fixed;
+                        background: ${isTopRow ? 'rgba(255, 0, 0, 0.1)' : 'rgba(0, 255, 0, 0.1)'};
+                        pointer-events: auto;
+                        z-index: 99998;
+                        opacity: 0.3;
+                        border: 2px solid ${isTopRow ? 'red' : 'green'};
+                    `;
+                    
+                    // Get actual preview position after it's been positioned
+                    const previewRect = preview.getBoundingClientRect();
+                    
+                    // For top rows, make bridge much larger
+                    const dayRect = day.getBoundingClientRect();
+                    const isTopRow = dayRect.top < 200;
+                    const padding = isTopRow ? 30 : 10; // Much larger padding for top rows
+                    
+                    console.log('Creating bridge, isTopRow:', isTopRow, 'padding:', padding);
+                    
+                    // Ensure bridge doesn't go outside viewport
+                    const bridgeLeft = Math.max(0, Math.min(dayRect.left, previewRect.left) - padding);
+                    const bridgeTop = Math.max(0, Math.min(dayRect.top, previewRect.top) - padding);
+                    const bridgeRight = Math.min(window.innerWidth, Math.max(dayRect.right, previewRect.right) + padding);
+                    const bridgeBottom = Math.min(window.innerHeight, Math.max(dayRect.bottom, previewRect.bottom) + padding);
+                    
+                    const bridgeWidth = bridgeRight - bridgeLeft;
+                    const bridgeHeight = bridgeBottom - bridgeTop;
+                    
+                    bridge.style.left = bridgeLeft + 'px';
+                    bridge.style.top = bridgeTop + 'px';
+                    bridge.style.width = bridgeWidth + 'px';
+                    bridge.style.height = bridgeHeight + 'px';
+                    
+                    // Add bridge event listeners
+                    bridge.addEventListener('mouseenter', () => {
+                        isHovering = true;
+                        isPreviewHovering = true;
+                        clearTimeout(hideTimeout);
+                    });
+                    
+                    bridge.addEventListener('mouseleave', () => {
+                        isHovering = false;
+                        isPreviewHovering = false;
+                        hideTimeout = setTimeout(() => {
+                            if (!isHovering && !isPreviewHovering) {
+                                hidePreview();
+                                bridge.remove();
+                            }
+                        }, 150);
+                    });
+                    
+                    document.body.appendChild(bridge);
+                }, 50); // Small delay to ensure preview is positioned
+            }
+            
+            function hidePreview() {
+                preview.style.opacity = '0';
+                preview.style.visibility = 'hidden';
+                preview.style.transform = 'translateY(-10px)';
+                
+                // Remove bridge
+                const bridge = document.querySelector('.hover-bridge');
+                if (bridge) {
+                    bridge.remove();
+                }
+                
+                setTimeout(() => {
+                    if (preview.style.opacity === '0') {
+                        preview.style.position = 'absolute';
+                    }
+                }, 300);
+            }
+        }
+    });
+
+    // Dynamic tooltip for event dots and bars
+    function showTooltip(e, text) {
+        tooltip.textContent = text;
+        tooltip.style.opacity = '1';
+        updateTooltipPosition(e);
+    }
+
+    function hideTooltip() {
+        tooltip.style.opacity = '0';
+    }
+
+    function updateTooltipPosition(e) {
+        const x = e.clientX;
+        const y = e.clientY;
+        const tooltipRect = tooltip.getBoundingClientRect();
+        const windowWidth = window.innerWidth;
+        const windowHeight = window.innerHeight;
+
+        // Position tooltip
+        let left = x + 10;
+        let top = y - tooltipRect.height - 10;
+
+        // Adjust if tooltip goes off screen
+        if (left + tooltipRect.width > windowWidth) {
+            left = x - tooltipRect.width - 10;
+        }
+        if (top < 0) {
+            top = y + 20;
+        }
+        if (top + tooltipRect.height > windowHeight) {
+            top = windowHeight - tooltipRect.height - 10;
+        }
+
+        tooltip.style.left = left + 'px';
+        tooltip.style.top = top + 'px';
+    }
+
+    // Add dynamic tooltip to event elements
+    const eventElements = document.querySelectorAll('.event-dot, .event-bar-segment');
+    eventElements.forEach(element => {
+        element.addEventListener('mouseenter', function(e) {
+            const title = this.getAttribute('title');
+            if (title) {
+                showTooltip(e, title);
+            }
+        });
+
+        element.addEventListener('mousemove', function(e) {
+            if (tooltip.style.opacity === '1') {
+                updateTooltipPosition(e);
+            }
+        });
+
+        element.addEventListener('mouseleave', function() {
+            hideTooltip();
+        });
+    });
+
+    // Debug: Log events data
+    console.log('Calendar events loaded with smart positioning');
+    const eventDots = document.querySelectorAll('.event-dot');
+    console.log(`Found ${eventDots.length} event dots`);
+    
+    // Fallback for missing tooltips
+    const allEventElements = document.querySelectorAll('.event-dot, .event-bar-segment');
+    allEventElements.forEach(element => {
+        if (!element.getAttribute('title')) {
+            const day = element.closest('.calendar-day');
+            const dayNumber = day.querySelector('.day-number')?.textContent;
+            const monthName = calendarGrid.dataset.monthName;
+            element.setAttribute('title', `Veranstaltung am ${dayNumber}. ${monthName}`);
+        }
+    });
+});
@@ -0,0 +1,71 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const galleryGrid = document.getElementById('galleryGrid');
+    const lightboxImage = document.getElementById('lightboxImage');
+    const lightboxTitle = document.getElementById('lightboxTitle');
+    const lightboxCurrent = document.getElementById('lightboxCurrent');
+    const lightboxTotal = document.getElementById('lightboxTotal');
+    const lightboxPrev = document.getElementById('lightboxPrev');
+    const lightboxNext = document.getElementById('lightboxNext');
+    
+    if (!galleryGrid) {
+        return;
+    }
+    
+    let currentIndex = 0;
+    let images = [];
+    
+    // Collect all images data (again after more images were loaded on scroll)
+    function collectImages() {
+        images = Array.from(galleryGrid.querySelectorAll('.gallery-img')).map(img => ({
+            src: img.dataset.src,
+            title: img.dataset.title
+        }));
+        lightboxTotal.textContent = images.length;
+    }
+    collectImages();
+    galleryGrid.addEventListener('gallery:loaded', collectImages);
+    
+    // Delegated, so lazily appended images open the lightbox too
+    galleryGrid.addEventListener('click', function(e) {
+        const img = e.target.closest('.gallery-img');
+        if (img) {
+            currentIndex = parseInt(img.dataset.index, 10);
+            updateLightbox();
+        }
+    });
+    
+    function updateLightbox() {
+        if (images.length > 0) {
+            lightboxImage.src = images[currentIndex].src;
+            lightboxImage.alt = images[currentIndex].title;
+            lightboxTitle.textContent = images[currentIndex].title;
+            lightboxCurrent.textContent = currentIndex + 1;
+        }
+    }
+    
+    // Previous button
+    lightboxPrev.addEventListener('click', function() {
+        currentIndex = (currentIndex - 1 + images.length) % images.length;
+        updateLightbox();
+    });
+    
+    // Next button
+    lightboxNext.addEventListener('click', function() {
+        currentIndex = (currentIndex + 1) % images.length;
+        updateLightbox();
+    });
+    
+    // Keyboard navigation
+    document.addEventListener('keydown', function(e) {
+        const modal = document.getElementById('lightboxModal');
+        if (modal.classList.contains('show')) {
+            if (e.key === 'ArrowLeft') {
+                lightboxPrev.click();
+            } else if (e.key === 'ArrowRight') {
+                lightboxNext.click();
+            } else if (e.key === 'Escape') {
+                bootstrap.Modal.getInstance(modal).hide();
+            }
+        }
+    });
+});
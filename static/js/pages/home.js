@@ -0,0 +1,81 @@
+// Announcement pop-up (templates/main/home.html), configured by data attributes
+let countdownInterval;
+let audioElement;
+
+function showAnnouncement() {
+    const modal = document.getElementById('announcementModal');
+    if (!modal) {
+        return;
+    }
+
+    // Check if user already closed this announcement (cookie)
+    const cookieName = 'announcement_closed_' + modal.dataset.announcementId;
+
+    if (document.cookie.includes(cookieName + '=true')) {
+        return; // Don't show if already closed
+    }
+
+    modal.style.display = 'flex';
+
+    // Play background music if exists
+    audioElement = document.getElementById('announcementAudio');
+    if (audioElement) {
+        audioElement.volume = 0.3;
+        audioElement.play().catch(e => console.log('Audio autoplay blocked'));
+    }
+
+    // Start countdown timer
+    let timeLeft = parseInt(modal.dataset.autoCloseSeconds || '0', 10);
+    if (timeLeft > 0) {
+        const countdownElement = document.getElementById('countdown');
+
+        countdownInterval = setInterval(() => {
+            timeLeft--;
+            countdownElement.textContent = timeLeft;
+
+            if (timeLeft <= 0) {
+                closeAnnouncement();
+            }
+        }, 1000);
+    }
+}
+
+function closeAnnouncement() {
+    const modal = document.getElementById('announcementModal');
+    if (!modal) {
+        return;
+    }
+    modal.style.animation = 'fadeOut 0.3s ease-out';
+
+    // Stop audio
+    if (audioElement) {
+        audioElement.pause();
+    }
+
+    // Clear countdown
+    if (countdownInterval) {
+        clearInterval(countdownInterval);
+    }
+
+    setTimeout(() => {
+        modal.style.display = 'none';
+    }, 300);
+
+    // Set cookie to not show again (expires in 24 hours)
+    const cookieName = 'announcement_closed_' + modal.dataset.announcementId;
+    const expires = new Date();
+    expires.setTime(expires.getTime() + (24 * 60 * 60 * 1000));
+    document.cookie = cookieName + '=true; expires=' + expires.toUTCString() + '; path=/';
+}
+
+// Show announcement when page loads
+window.addEventListener('load', () => {
+    setTimeout(showAnnouncement, 500);
+});
+
+// Close on ESC key
+document.addEventListener('keydown', (e) => {
+    if (e.key === 'Escape') {
+        closeAnnouncement();
+    }
+});
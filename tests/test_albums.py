@@ -0,0 +1,116 @@
+"""
+Event photo album tests for Lesezirkel application
+"""
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core import serializers
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from main.models import Event, EventAlbum, Gallery
+
+from .test_images import make_image
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_DERIVATIVE_WIDTHS=[320], IMAGE_DERIVATIVE_FORMATS=['jpeg'])
+class EventAlbumTest(TestCase):
+    """Test cases for the precomputed per-event albums"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.event = Event.objects.create(
+            title="Sommerlesung",
+            description="Lesung im Park",
+            date=timezone.now() - timedelta(days=3),
+            location="Schlossgarten",
+        )
+        self.other_event = Event.objects.create(
+            title="Herbstfest",
+            description="Fest",
+            date=timezone.now() - timedelta(days=1),
+            location="Rathaus",
+        )
+
+    def test_album_follows_photos(self):
+        """Test that count, cover and date range are maintained on save and delete"""
+        first = Gallery.objects.create(title="Foto 1", event=self.event)
+        second = Gallery.objects.create(title="Foto 2", event=self.event)
+        Gallery.objects.create(title="Ohne Veranstaltung")
+
+        album = EventAlbum.objects.get(event=self.event)
+        self.assertEqual(album.photo_count, 2)
+        self.assertEqual(album.cover, first)
+        self.assertEqual(album.first_photo_at, first.created_at)
+        self.assertEqual(album.last_photo_at, second.created_at)
+        self.assertEqual(EventAlbum.objects.count(), 1)
+
+        first.delete()
+        album.refresh_from_db()
+        self.assertEqual(album.photo_count, 1)
+        self.assertEqual(album.cover, second)
+
+        second.delete()
+        self.assertFalse(EventAlbum.objects.filter(event=self.event).exists())
+
+    def test_moving_photo_updates_both_albums(self):
+        """Test that changing the event of a photo updates the old and the new album"""
+        Gallery.objects.create(title="Foto 1", event=self.event)
+        photo = Gallery.objects.create(title="Foto 2", event=self.event)
+
+        photo.event = self.other_event
+        photo.save()
+
+        self.assertEqual(EventAlbum.objects.get(event=self.event).photo_count, 1)
+        self.assertEqual(EventAlbum.objects.get(event=self.other_event).photo_count, 1)
+
+    def test_loaddata_keeps_albums(self):
+        """Test that raw saves (loaddata) leave the albums alone"""
+        photo = Gallery.objects.create(title="Foto 1", event=self.event)
+        Gallery.objects.create(title="Foto 2", event=self.event)
+        data = serializers.serialize('json', [photo])
+        album = EventAlbum.objects.get(event=self.event)
+        album.photo_count = 7
+        album.save()
+
+        for obj in serializers.deserialize('json', data):
+            obj.save()
+
+        self.assertEqual(EventAlbum.objects.get(event=self.event).photo_count, 7)
+
+    def test_album_list_view(self):
+        """Test that the album index renders every album in a single query"""
+        for event in (self.event, self.other_event):
+            Gallery.objects.create(title="Foto", event=event)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('album_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Sommerlesung")
+        self.assertContains(response, "Herbstfest")
+        self.assertContains(response, reverse('album_detail', args=[self.event.pk]))
+
+    def test_album_detail_view(self):
+        """Test that an album shows only the photos of its event"""
+        Gallery.objects.create(title="Lesung Foto", event=self.event, image=make_image(size=(400, 300)))
+        Gallery.objects.create(title="Fest Foto", event=self.other_event, image=make_image(size=(400, 300)))
+
+        response = self.client.get(reverse('album_detail', args=[self.event.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item.title for item in response.context['gallery_items']], ["Lesung Foto"])
+        self.assertContains(response, f'?event={self.event.pk}')
+
+        data = self.client.get(reverse('gallery_chunk'), {'event': self.event.pk}).json()
+        self.assertEqual([entry['title'] for entry in data['items']], ["Lesung Foto"])
+
+    def test_album_detail_without_photos(self):
+        response = self.client.get(reverse('album_detail', args=[self.event.pk]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,109 @@
+"""
+Asset pipeline tests for Lesezirkel application
+"""
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from main.assets import critical_css, load_manifest, minify_css, minify_js
+
+TEMP_BUILD_DIR = tempfile.mkdtemp()
+
+
+class MinifyTest(TestCase):
+    """Test cases for the CSS/JS minifiers"""
+
+    def test_minify_css(self):
+        css = """
+        /* Kopfbereich */
+        .hero, .hero-title > span {
+            background: url('data:image/svg+xml,<svg fill="white"> </svg>');
+            margin: 0 auto ;
+        }
+        .card :hover { color: red; }
+        """
+        self.assertEqual(
+            minify_css(css),
+            """.hero,.hero-title>span{background:url('data:image/svg+xml,<svg fill="white"> </svg>');margin:0 auto}"""
+            """.card :hover{color:red}""",
+        )
+
+    def test_minify_js_keeps_strings_regex_and_lines(self):
+        js = """
+        // Kommentar
+        function validateEmail(email) {
+            const re = /^[^\\s@]+@[^\\s@]+$/;   /* Block */
+            const url = 'https://example.com//pfad';
+            return re.test(email) && total / count > 1
+        }
+        """
+        self.assertEqual(
+            minify_js(js),
+            "function validateEmail(email) {\n"
+            "const re = /^[^\\s@]+@[^\\s@]+$/;\n"
+            "const url = 'https://example.com//pfad';\n"
+            "return re.test(email) && total / count > 1\n"
+            "}",
+        )
+
+    def test_critical_css(self):
+        css = minify_css("""
+        :root { --blau: #1e3a8a; }
+        .navbar { animation: einblenden 1s; }
+        .footer-links { color: gray; }
+        @media (max-width: 768px) { .navbar { padding: 0; } .footer-links { display: none; } }
+        @keyframes einblenden { from { opacity: 0; } to { opacity: 1; } }
+        @keyframes unbenutzt { from { opacity: 1; } }
+        """)
+        critical = critical_css(css, '<nav class="navbar {% if scrolled %}scrolled{% endif %}"></nav>')
+        self.assertIn(':root{--blau:#1e3a8a}', critical)
+        self.assertIn('@media (max-width:768px){.navbar{padding:0}}', critical)
+        self.assertIn('@keyframes einblenden', critical)
+        self.assertNotIn('footer-links', critical)
+        self.assertNotIn('unbenutzt', critical)
+
+
+@override_settings(ASSET_BUILD_DIR=TEMP_BUILD_DIR)
+class BuildAssetsTest(TestCase):
+    """Test cases for the build_assets command and the page asset tags"""
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_BUILD_DIR, ignore_errors=True)
+        os.makedirs(TEMP_BUILD_DIR)
+        load_manifest.cache_clear()
+
+    def test_source_files_without_build(self):
+        response = self.client.get(reverse('events'))
+        self.assertContains(response, '/static/css/style.css?v=')
+        self.assertContains(response, '/static/css/pages/events.css?v=')
+        self.assertContains(response, '/static/js/pages/events.js?v=')
+        self.assertNotContains(response, '<style>')
+
+    def test_build_and_inline_critical_css(self):
+        out = StringIO()
+        call_command('build_assets', stdout=out)
+        self.assertIn('Bundle(s) nach', out.getvalue())
+        with open(os.path.join(TEMP_BUILD_DIR, 'assets.json')) as f:
+            pages = json.load(f)['pages']
+        self.assertEqual(pages['main/events.html']['css'], 'build/css/events.css')
+        self.assertEqual(pages['main/about.html']['js'], 'build/js/site.js')
+        self.assertIn('.calendar-container', pages['main/events.html']['critical'])
+        self.assertNotIn('.calendar-container', pages['main/about.html']['critical'])
+        with open(os.path.join(TEMP_BUILD_DIR, 'css', 'events.css')) as f:
+            self.assertNotIn('\n', f.read())
+
+        response = self.client.get(reverse('events'))
+        self.assertContains(response, '<style>:root{')
+        self.assertContains(response, 'rel="preload" href="/static/build/css/events.css"')
+        self.assertContains(response, '<script src="/static/build/js/events.js"></script>')
+        self.assertNotContains(response, 'css/style.css')
+
+        # Templates outside the build get the site bundle
+        response = self.client.get(reverse('about'))
+        self.assertContains(response, 'href="/static/build/css/site.css"')
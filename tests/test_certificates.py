@@ -0,0 +1,246 @@
+"""
+Certificate tests for Lesezirkel application
+"""
+import importlib
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from datetime import date, datetime
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from main.certificates import build_certificate_zip, generate_certificates
+from main.models import Certificate, Event, EventRegistration
+from main.ratelimit import FailureLimiter
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, CERTIFICATE_SEARCH_MAX_FAILURES=3)
+class CertificateSearchTest(TestCase):
+    """Test cases for the public certificate lookup"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        caches['counters'].clear()
+        self.certificate = Certificate(
+            first_name="Jürgen",
+            last_name="Müller-Lüdenscheidt",
+            participant_number="LZ-2024-001",
+            event_title="Schreibwerkstatt",
+            completion_date=date(2024, 5, 1),
+        )
+        self.certificate.certificate_file.save('zertifikat.pdf', ContentFile(b'%PDF-1.4'), save=False)
+        self.certificate.save()
+        self.url = reverse('certificate_search')
+
+    def search(self, first_name="Jürgen", last_name="Müller-Lüdenscheidt", number="LZ-2024-001", **extra):
+        return self.client.post(self.url, {
+            'first_name': first_name,
+            'last_name': last_name,
+            'participant_number': number,
+        }, **extra)
+
+    def test_found_with_normalized_names(self):
+        for first_name, last_name in [("Jürgen", "Müller-Lüdenscheidt"),
+                                      ("JUERGEN", "mueller ludenscheidt"),
+                                      ("  jürgen ", "Müller-Lüdenscheidt")]:
+            response = self.search(first_name, last_name)
+            self.assertEqual(response.status_code, 302)
+            self.assertTrue(response.url.startswith('/zertifikat/'))
+            self.assertNotIn(f'/{self.certificate.pk}/', response.url)
+
+    def test_wrong_name_is_rejected(self):
+        response = self.search(first_name="Anna")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Kein Zertifikat mit diesen Daten gefunden")
+
+    def test_lookup_uses_single_query(self):
+        with self.assertNumQueries(1):
+            self.search(number="LZ-0000-000")
+
+    def test_failures_are_limited_per_ip(self):
+        for _ in range(3):
+            self.assertEqual(self.search(number="LZ-9999-999").status_code, 200)
+
+        # Blocked even for correct data, without a database query
+        with self.assertNumQueries(0):
+            response = self.search()
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, "Zu viele fehlgeschlagene Versuche", status_code=429)
+
+        # Other clients are not affected
+        response = self.search(REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_REAL_IP')
+    def test_failures_are_limited_per_ip_behind_proxy(self):
+        for _ in range(3):
+            self.search(number="LZ-9999-999", REMOTE_ADDR='127.0.0.1', HTTP_X_REAL_IP='203.0.113.5')
+        self.assertEqual(self.search(REMOTE_ADDR='127.0.0.1', HTTP_X_REAL_IP='203.0.113.5').status_code, 429)
+        self.assertEqual(self.search(REMOTE_ADDR='127.0.0.1', HTTP_X_REAL_IP='203.0.113.6').status_code, 302)
+
+    def test_block_lasts_the_whole_window(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        limiter = FailureLimiter('test', max_failures=3, window=900)
+        request = RequestFactory().post(self.url)
+        with override_settings(CACHES={**settings.CACHES, 'counters': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }}):
+            for _ in range(3):
+                limiter.record_failure(request)
+            # Past the default timeout of 300 seconds, within the window
+            with mock.patch('django.core.cache.backends.filebased.time.time', return_value=time.time() + 600):
+                self.assertTrue(limiter.is_blocked(request))
+            with mock.patch('django.core.cache.backends.filebased.time.time', return_value=time.time() + 1000):
+                self.assertFalse(limiter.is_blocked(request))
+
+    @mock.patch.dict(os.environ, {'DJANGO_SECRET_KEY': 'test'})
+    def test_production_uses_nginx_header(self):
+        os.environ.pop('CLIENT_IP_HEADER', None)
+        production = importlib.import_module('lesezirkel_osnabrueck.settings_production')
+        self.assertEqual(production.CLIENT_IP_HEADER, 'HTTP_X_REAL_IP')
+        # Limiter counters are not culled with the page cache
+        self.assertNotEqual(production.CACHES['counters']['LOCATION'], production.CACHES['default']['LOCATION'])
+        self.assertGreater(production.CACHES['default']['OPTIONS']['MAX_ENTRIES'], 300)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, CERTIFICATE_DOWNLOAD_MAX_AGE=600)
+class CertificateDownloadTest(TestCase):
+    """Test cases for the signed certificate download URLs"""
+
+    def setUp(self):
+        self.certificate = Certificate(
+            first_name="Anna", last_name="Schmidt", participant_number="LZ-2024-002",
+            event_title="Schreibwerkstatt", completion_date=date(2024, 5, 1),
+        )
+        self.certificate.certificate_file.save('anna.pdf', ContentFile(b'%PDF-1.4 anna'), save=False)
+        self.certificate.save()
+
+    def test_signed_url_serves_file(self):
+        response = self.client.get(self.certificate.get_download_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 anna')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('max-age=600', response['Cache-Control'])
+
+    def test_tampered_or_plain_pk_is_rejected(self):
+        url = self.certificate.get_download_url()
+        self.assertEqual(self.client.get(url.replace('/download/', 'x/download/')).status_code, 404)
+        self.assertEqual(self.client.get(f'/zertifikat/{self.certificate.pk}/download/').status_code, 404)
+
+    def test_expired_url(self):
+        url = self.certificate.get_download_url()
+        with override_settings(CERTIFICATE_DOWNLOAD_MAX_AGE=-1):
+            response = self.client.get(url)
+        self.assertRedirects(response, reverse('certificate_search'))
+
+    @override_settings(CERTIFICATE_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_x_accel_redirect(self):
+        response = self.client.get(self.certificate.get_download_url())
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.certificate.certificate_file.name)
+        self.assertEqual(response.content, b'')
+        self.assertIn('attachment', response['Content-Disposition'])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, WORKER_POOL_SIZE=0)
+class CertificateGenerationTest(TestCase):
+    """Test cases for the bulk certificate generation of an event"""
+
+    def setUp(self):
+        self.event = Event.objects.create(
+            title="Schreibwerkstatt",
+            description="Test",
+            date=timezone.make_aware(datetime(2024, 5, 1, 18, 0)),
+            location="Osnabrück",
+        )
+        for first_name, last_name, confirmed in [("Jürgen", "Müller", True), ("Anna", "Schmidt", True),
+                                                 ("Max", "Offen", False)]:
+            EventRegistration.objects.create(event=self.event, first_name=first_name, last_name=last_name,
+                                             email=f"{first_name.lower()}@example.com", is_confirmed=confirmed)
+
+    def test_generates_numbered_pdfs(self):
+        created, existing = generate_certificates(self.event)
+
+        self.assertEqual(existing, [])
+        prefix = f"LZ-2024-{self.event.pk:04d}-"
+        self.assertEqual([c.participant_number for c in created], [prefix + "001", prefix + "002"])
+        certificate = Certificate.objects.get(participant_number=prefix + "001")
+        self.assertEqual((certificate.last_name, certificate.completion_date), ("Müller", date(2024, 5, 1)))
+        self.assertEqual(certificate.search_key, certificate.build_search_key())
+        with certificate.certificate_file.open('rb') as f:
+            self.assertTrue(f.read().startswith(b'%PDF'))
+
+    def test_existing_certificates_are_skipped(self):
+        generate_certificates(self.event)
+        EventRegistration.objects.create(event=self.event, first_name="Neu", last_name="Zugang",
+                                         email="neu@example.com", is_confirmed=True)
+
+        created, existing = generate_certificates(self.event)
+        self.assertEqual([c.last_name for c in created], ["Zugang"])
+        self.assertEqual(created[0].participant_number, f"LZ-2024-{self.event.pk:04d}-003")
+        self.assertEqual(len(existing), 2)
+        self.assertEqual(Certificate.objects.count(), 3)
+
+    def test_same_title_in_later_event(self):
+        created, _ = generate_certificates(self.event)
+        self.assertEqual({c.event for c in created}, {self.event})
+        later = Event.objects.create(
+            title="Schreibwerkstatt",
+            description="Test",
+            date=timezone.make_aware(datetime(2025, 5, 1, 18, 0)),
+            location="Osnabrück",
+        )
+        EventRegistration.objects.create(event=later, first_name="Jürgen", last_name="Müller",
+                                         email="juergen@example.com", is_confirmed=True)
+
+        created, existing = generate_certificates(later)
+        self.assertEqual(existing, [])
+        self.assertEqual(created[0].participant_number, f"LZ-2025-{later.pk:04d}-001")
+        self.assertEqual(created[0].completion_date, date(2025, 5, 1))
+        self.assertEqual(Certificate.objects.filter(last_name="Müller").count(), 2)
+
+    def test_legacy_certificates_without_event(self):
+        Certificate.objects.create(first_name="Jürgen", last_name="Müller", participant_number="ALT-001",
+                                   event_title="Schreibwerkstatt", completion_date=date(2024, 5, 1))
+        # Same title, other date: another event
+        Certificate.objects.create(first_name="Anna", last_name="Schmidt", participant_number="ALT-002",
+                                   event_title="Schreibwerkstatt", completion_date=date(2023, 5, 1))
+
+        created, existing = generate_certificates(self.event)
+        self.assertEqual([c.participant_number for c in existing], ["ALT-001"])
+        self.assertEqual([c.last_name for c in created], ["Schmidt"])
+
+    def test_zip_archive(self):
+        created, _ = generate_certificates(self.event)
+        # Read back from storage as well as from the freshly rendered PDFs
+        certificates = [created[0], Certificate.objects.get(pk=created[1].pk)]
+        with zipfile.ZipFile(build_certificate_zip(certificates)) as zf:
+            names = zf.namelist()
+            self.assertEqual(len(names), 2)
+            self.assertTrue(all(zf.read(name).startswith(b'%PDF') for name in names))
+
+    def test_admin_action(self):
+        User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpass123')
+        self.client.login(username='admin', password='adminpass123')
+        response = self.client.post(reverse('admin:main_event_changelist'), {
+            'action': 'generate_event_certificates',
+            '_selected_action': [self.event.pk],
+        })
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertEqual(Certificate.objects.count(), 2)
@@ -0,0 +1,523 @@
+"""
+Document conversion tests for Lesezirkel application
+"""
+import os
+import runpy
+import shutil
+import tempfile
+import time
+import zipfile
+from io import BytesIO, StringIO
+
+import PyPDF2
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from docx import Document as DocxDocument
+from docx.shared import Inches
+from openpyxl import Workbook
+from PIL import Image as PILImage
+from reportlab.pdfgen import canvas
+
+from main.conversion import (
+    ConversionBusy, ConversionError, _get_sandbox_slots, backends_for, convert_file, converted_pdf_name, error_pdf,
+    get_backend, register_backend, run_sandboxed,
+)
+from main.document_utils import DocumentConverter
+from main.models import Document, DocumentPreview, DocumentText
+from main.search import search
+from main.text_extraction import extract_text
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+FAKE_SOFFICE = """#!/bin/sh
+# Test stand-in for LibreOffice: writes a minimal PDF into --outdir
+while [ $# -gt 0 ]; do
+    case "$1" in --outdir) outdir="$2"; shift;; *) source="$1";; esac
+    shift
+done
+grep -q slow "$source" && sleep 5
+printf '%%PDF-1.4 soffice' > "$outdir/$(basename "${source%.*}").pdf"
+"""
+
+
+def pdf_text(buffer):
+    reader = PyPDF2.PdfReader(buffer)
+    return '\n'.join(page.extract_text() for page in reader.pages)
+
+
+class DocxConversionTest(SimpleTestCase):
+    """Test cases for the DOCX to PDF conversion"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def save(self, doc, name='test.docx'):
+        path = os.path.join(self.directory, name)
+        doc.save(path)
+        return path
+
+    def test_headings_tables_and_images(self):
+        image = BytesIO()
+        PILImage.new('RGB', (200, 100), 'red').save(image, 'PNG')
+        image.seek(0)
+
+        doc = DocxDocument()
+        doc.add_heading('Jahresbericht', 1)
+        doc.add_paragraph('Text mit <Sonderzeichen> & Umlauten: äöü')
+        table = doc.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = 'Datum'
+        table.cell(0, 1).text = 'Titel'
+        table.cell(1, 0).text = '01.05.2024'
+        table.cell(1, 1).text = 'Lesung'
+        doc.add_picture(image, width=Inches(2))
+
+        buffer = DocumentConverter.convert_to_pdf(self.save(doc), 'bericht.docx')
+        text = pdf_text(buffer)
+        self.assertIn('Jahresbericht', text)
+        self.assertIn('<Sonderzeichen> & Umlauten', text)
+        self.assertIn('01.05.2024', text)
+        self.assertNotIn('Conversion Error', text)
+
+        buffer.seek(0)
+        page = PyPDF2.PdfReader(buffer).pages[0]
+        self.assertTrue(page['/Resources'].get('/XObject'))
+
+    def test_long_document(self):
+        doc = DocxDocument()
+        for number in range(300):
+            doc.add_paragraph(f'Absatz {number}')
+
+        text = pdf_text(DocumentConverter.convert_to_pdf(self.save(doc), 'lang.docx'))
+        self.assertIn('Absatz 0', text)
+        self.assertIn('Absatz 299', text)
+
+    def test_broken_file_gives_error_pdf(self):
+        path = os.path.join(self.directory, 'kaputt.docx')
+        with open(path, 'wb') as f:
+            f.write(b'kein docx')
+
+        self.assertIn('Conversion Error', pdf_text(DocumentConverter.convert_to_pdf(path, 'kaputt.docx')))
+
+    def test_benchmark_command(self):
+        doc = DocxDocument()
+        doc.add_paragraph('Kurz')
+        self.save(doc, 'kurz.docx')
+
+        out = StringIO()
+        call_command('benchmark_document_conversion', corpus=self.directory, repeat=1, stdout=out)
+        self.assertIn('kurz.docx', out.getvalue())
+        self.assertIn('Gesamt: 1 Datei(en)', out.getvalue())
+
+
+class SpreadsheetConversionTest(SimpleTestCase):
+    """Test cases for the streaming XLSX to PDF conversion"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def workbook(self, sheets=1, rows=10, columns=3):
+        wb = Workbook()
+        wb.remove(wb.active)
+        for sheet in range(sheets):
+            ws = wb.create_sheet(f'Blatt {sheet + 1}')
+            ws.append([f'Spalte {column}' for column in range(columns)])
+            for row in range(rows):
+                ws.append([f'Z{row}S{column}' for column in range(columns)])
+        path = os.path.join(self.directory, 'tabelle.xlsx')
+        wb.save(path)
+        return path
+
+    def test_rows_become_tables(self):
+        text = pdf_text(DocumentConverter.convert_to_pdf(self.workbook(), 'tabelle.xlsx'))
+        self.assertIn('Sheet: Blatt 1', text)
+        self.assertIn('Spalte 0', text)
+        self.assertIn('Z9S2', text)
+        self.assertNotIn('shown', text)
+
+    @override_settings(SPREADSHEET_MAX_ROWS=5, SPREADSHEET_MAX_COLUMNS=2, SPREADSHEET_MAX_SHEETS=1)
+    def test_limits_with_notices(self):
+        text = pdf_text(DocumentConverter.convert_to_pdf(self.workbook(sheets=2, columns=3), 'tabelle.xlsx'))
+        self.assertIn('Z3S1', text)
+        self.assertNotIn('Z4S0', text)
+        self.assertNotIn('Z0S2', text)
+        self.assertNotIn('Blatt 2', text)
+        self.assertIn('Only the first 5 rows are shown.', text)
+        self.assertIn('Only the first 2 columns are shown.', text)
+        self.assertIn('1 more sheet(s) not shown', text)
+
+
+def allocate(megabytes):
+    return len(bytearray(megabytes * 1024 * 1024))
+
+
+def spin():
+    while True:
+        pass
+
+
+def sleep(seconds):
+    import time
+    time.sleep(seconds)
+
+
+@register_backend('failing')
+class FailingBackend:
+    def is_available(self):
+        return True
+
+    def convert(self, path, filename, deadline):
+        raise ConversionError('kaputt')
+
+
+class ConverterBackendTest(SimpleTestCase):
+    """Test cases for the converter backend registry and the LibreOffice backend"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.soffice = os.path.join(self.directory, 'fake-soffice')
+        with open(self.soffice, 'w') as f:
+            f.write(FAKE_SOFFICE)
+        os.chmod(self.soffice, 0o755)
+
+    def source(self, name):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(os.path.splitext(name)[0])
+        return path
+
+    @override_settings(SOFFICE_BINARY='does-not-exist', DOCUMENT_CONVERTER_BACKENDS={'.doc': ['soffice', 'reportlab']})
+    def test_unavailable_backend_is_skipped(self):
+        self.assertEqual(backends_for('.doc'), [get_backend('reportlab')])
+        self.assertEqual(backends_for('.docx'), [get_backend('reportlab')])
+
+    def test_soffice_backend(self):
+        with override_settings(SOFFICE_BINARY=self.soffice, DOCUMENT_CONVERTER_BACKENDS={'.doc': ['soffice']}):
+            self.assertEqual(convert_file(self.source('brief.doc'), 'brief.doc'), b'%PDF-1.4 soffice')
+
+    def test_timeout_falls_back_to_next_backend(self):
+        with override_settings(SOFFICE_BINARY=self.soffice, SOFFICE_TIMEOUT=1,
+                               DOCUMENT_CONVERTER_BACKENDS={'.doc': ['soffice']}):
+            with self.assertRaisesMessage(ConversionError, 'timed out'):
+                convert_file(self.source('slow.doc'), 'slow.doc')
+
+        with override_settings(SOFFICE_BINARY=self.soffice, SOFFICE_TIMEOUT=1,
+                               DOCUMENT_CONVERTER_BACKENDS={'.txt': ['soffice', 'reportlab']}):
+            pdf = convert_file(self.source('slow.txt'), 'slow.txt')
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertNotIn(b'soffice', pdf)
+
+    def test_fallback_only_within_time_budget(self):
+        with override_settings(SOFFICE_BINARY=self.soffice, SOFFICE_TIMEOUT=1, CONVERSION_TIMEOUT=1,
+                               CONVERSION_TIME_BUDGET=1.5,
+                               DOCUMENT_CONVERTER_BACKENDS={'.txt': ['soffice', 'reportlab']}):
+            start = time.monotonic()
+            # No full run of the built-in converter fits after the LibreOffice timeout
+            with self.assertRaises(ConversionBusy):
+                convert_file(self.source('slow.txt'), 'slow.txt')
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test_budget_below_gunicorn_timeout(self):
+        gunicorn_timeout = runpy.run_path(os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'))['timeout']
+        self.assertLessEqual(settings.SOFFICE_TIMEOUT + settings.CONVERSION_TIMEOUT, settings.CONVERSION_TIME_BUDGET)
+        self.assertLess(settings.CONVERSION_TIME_BUDGET, gunicorn_timeout)
+
+
+@override_settings(CONVERSION_MEMORY_LIMIT=64 * 1024 * 1024, CONVERSION_CPU_LIMIT=1, CONVERSION_TIMEOUT=5)
+class SandboxTest(SimpleTestCase):
+    """Test cases for the resource-limited conversion processes"""
+
+    def test_result_is_returned(self):
+        self.assertEqual(run_sandboxed(allocate, 16), 16 * 1024 * 1024)
+
+    def test_memory_limit(self):
+        with self.assertRaisesMessage(ConversionError, 'MemoryError'):
+            run_sandboxed(allocate, 256)
+
+    def test_cpu_limit(self):
+        with self.assertRaisesMessage(ConversionError, 'died'):
+            run_sandboxed(spin)
+
+    @override_settings(CONVERSION_TIMEOUT=1)
+    def test_wall_clock_timeout(self):
+        with self.assertRaisesMessage(ConversionError, 'timed out'):
+            run_sandboxed(sleep, 10)
+
+    @override_settings(CONVERSION_TIMEOUT=1, CONVERSION_TIME_BUDGET=2)
+    def test_slot_wait_and_run_share_the_budget(self):
+        slots = _get_sandbox_slots()
+        held = 0
+        while slots.acquire(blocking=False):
+            held += 1
+        try:
+            start = time.monotonic()
+            with self.assertRaises(ConversionBusy):
+                run_sandboxed(sleep, 0)
+            # Waited only while a full run of one second still fitted into the two
+            self.assertLess(time.monotonic() - start, 1.5)
+        finally:
+            for _ in range(held):
+                slots.release()
+
+        with override_settings(CONVERSION_TIME_BUDGET=0.5):
+            with self.assertRaises(ConversionBusy):
+                run_sandboxed(sleep, 0)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, WORKER_POOL_SIZE=0)
+class ConvertedPdfTest(TestCase):
+    """Test cases for the stored PDF versions of documents"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_download_is_converted_once(self):
+        document = Document(title="Protokoll")
+        document.file.save('protokoll.txt', ContentFile(b'Erste Sitzung'), save=False)
+        document.save()
+        self.assertEqual(len(document.file_hash), 64)
+
+        response = self.client.get(reverse('document_download', args=[document.pk]))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('Erste Sitzung', pdf_text(BytesIO(b''.join(response.streaming_content))))
+        name = converted_pdf_name(document)
+        self.assertTrue(document.file.storage.exists(name))
+
+        # Served from the store: the stored PDF is returned unchanged
+        with document.file.storage.open(name, 'wb') as f:
+            f.write(b'%PDF-1.4 cached')
+        response = self.client.get(reverse('document_download', args=[document.pk]))
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 cached')
+
+    def test_hash_follows_file(self):
+        document = Document(title="Satzung")
+        document.file.save('satzung.txt', ContentFile(b'Fassung 1'), save=False)
+        document.save()
+        first = document.file_hash
+
+        # As assigned by the admin form
+        document.file = SimpleUploadedFile('satzung.txt', b'Fassung 2')
+        document.save()
+        self.assertNotEqual(document.file_hash, first)
+
+    @override_settings(DOCUMENT_CONVERTER_BACKENDS={'.docx': ['failing']})
+    def test_failed_conversion_stores_error_pdf(self):
+        document = Document(title="Kaputt")
+        document.file.save('kaputt.docx', ContentFile(b'kein docx'), save=False)
+        document.save()
+
+        response = self.client.get(reverse('document_download', args=[document.pk]))
+        self.assertEqual(b''.join(response.streaming_content), error_pdf())
+        self.assertTrue(document.file.storage.exists(converted_pdf_name(document)))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, WORKER_POOL_SIZE=0)
+class DocumentTextTest(TestCase):
+    """Test cases for the text extraction and the document search on /herunterladen/"""
+
+    def upload(self, title, name, content, **kwargs):
+        document = Document(title=title, **kwargs)
+        document.file = SimpleUploadedFile(name, content)
+        # Text extraction starts after the commit
+        with self.captureOnCommitCallbacks(execute=True):
+            document.save()
+        return document
+
+    def docx_bytes(self, text):
+        doc = DocxDocument()
+        doc.add_paragraph('Einleitung')
+        table = doc.add_table(rows=1, cols=1)
+        table.cell(0, 0).text = text
+        buffer = BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
+
+    def test_extracted_text_is_searchable(self):
+        document = self.upload("Protokoll", 'protokoll.docx', self.docx_bytes('Kassenprüfung ohne Beanstandung'))
+        self.assertIn('Kassenprüfung', DocumentText.objects.get(document=document).text)
+        self.assertEqual([obj for _, obj, _ in search("Kassenpruefung")], [document])
+
+        response = self.client.get(reverse('herunterladen'), {'q': 'Beanstandungen'})
+        self.assertEqual(list(response.context['documents']), [document])
+        response = self.client.get(reverse('herunterladen'), {'q': 'Beanstandung', 'category': 'forms'})
+        self.assertEqual(list(response.context['documents']), [])
+        response = self.client.get(reverse('herunterladen_chunk'), {'q': 'Beanstandung'})
+        self.assertEqual([item['id'] for item in response.json()['items']], [document.pk])
+
+    def test_text_follows_file(self):
+        document = self.upload("Notiz", 'notiz.txt', b'Sommerlesung')
+        self.assertEqual(len(search("Sommerlesung")), 1)
+
+        # Counter updates neither extract nor index again
+        with self.assertNumQueries(2):
+            Document.objects.get(pk=document.pk).save(update_fields=['download_count'])
+
+        document.file = SimpleUploadedFile('notiz.txt', b'Winterlesung')
+        with self.captureOnCommitCallbacks(execute=True):
+            document.save()
+        self.assertEqual(search("Sommerlesung"), [])
+        self.assertEqual(len(search("Winterlesung")), 1)
+
+    def test_extract_text_formats(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        wb = Workbook()
+        wb.active.append(['Mitgliedsbeitrag', 24])
+        wb.save(os.path.join(directory, 'beitraege.xlsx'))
+        with open(os.path.join(directory, 'bild.png'), 'wb') as f:
+            f.write(b'png')
+
+        self.assertIn('Mitgliedsbeitrag 24', extract_text(os.path.join(directory, 'beitraege.xlsx'), 'beitraege.xlsx'))
+        self.assertEqual(extract_text(os.path.join(directory, 'bild.png'), 'bild.png'), '')
+
+    def test_extraction_waits_for_commit(self):
+        document = Document(title="Notiz")
+        document.file = SimpleUploadedFile('notiz.txt', b'Adventslesung')
+        with self.captureOnCommitCallbacks() as callbacks:
+            document.save()
+        self.assertFalse(DocumentText.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(DocumentText.objects.get(document=document).text, 'Adventslesung')
+
+    def test_backfill_command(self):
+        document = self.upload("Notiz", 'notiz.txt', b'Herbstlesung')
+        DocumentText.objects.all().delete()
+
+        out = StringIO()
+        call_command('extract_document_texts', stdout=out)
+        self.assertIn('1 Dokument(e)', out.getvalue())
+        self.assertEqual(DocumentText.objects.get(document=document).text, 'Herbstlesung')
+
+
+def pdf_bytes(pages):
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, invariant=1)
+    for number in range(pages):
+        pdf.drawString(72, 720, f'Seite {number + 1} der Satzung')
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, WORKER_POOL_SIZE=0, PDF_RASTERIZER_BINARY='does-not-exist')
+class DocumentPreviewTest(TestCase):
+    """Test cases for page counts and first-page thumbnails"""
+
+    def upload(self, title, name, content):
+        document = Document(title=title, description="Beschreibung")
+        document.file = SimpleUploadedFile(name, content)
+        with self.captureOnCommitCallbacks(execute=True):
+            document.save()
+        return document
+
+    def test_pdf_preview(self):
+        document = self.upload("Satzung", 'satzung.pdf', pdf_bytes(3))
+        preview = DocumentPreview.objects.get(file_hash=document.file_hash)
+        self.assertEqual(preview.page_count, 3)
+        with preview.thumbnail.open('rb') as f:
+            with PILImage.open(f) as img:
+                self.assertEqual(img.format, 'JPEG')
+                self.assertEqual(img.size, (300, preview.height))
+
+        response = self.client.get(reverse('document_detail', args=[document.pk]))
+        self.assertContains(response, '3 Seiten')
+        self.assertContains(response, preview.thumbnail.url)
+        response = self.client.get(reverse('herunterladen'))
+        self.assertContains(response, preview.thumbnail.url)
+
+    def test_office_file_is_converted_once(self):
+        document = self.upload("Notiz", 'notiz.txt', b'Kurze Notiz')
+        self.assertEqual(DocumentPreview.objects.get(file_hash=document.file_hash).page_count, 1)
+        # The PDF from the preview stage is reused for downloads
+        storage = document.file.storage
+        self.assertTrue(storage.exists(converted_pdf_name(document)))
+        # Saved through the storage: a name linked to its blob
+        self.assertEqual(os.stat(storage.path(converted_pdf_name(document))).st_nlink, 2)
+
+    def test_preview_waits_for_commit(self):
+        document = Document(title="Satzung")
+        document.file = SimpleUploadedFile('satzung.pdf', pdf_bytes(1))
+        with self.captureOnCommitCallbacks() as callbacks:
+            document.save()
+        self.assertFalse(DocumentPreview.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(DocumentPreview.objects.get(file_hash=document.file_hash).page_count, 1)
+
+    def test_equal_files_share_a_preview(self):
+        first = self.upload("Satzung", 'satzung.pdf', pdf_bytes(2))
+        copy = self.upload("Satzung (Kopie)", 'satzung_kopie.pdf', pdf_bytes(2))
+        self.assertEqual(first.file_hash, copy.file_hash)
+        self.assertEqual(DocumentPreview.objects.count(), 1)
+
+    def test_backfill_command(self):
+        document = self.upload("Satzung", 'satzung.pdf', pdf_bytes(1))
+        DocumentPreview.objects.all().delete()
+
+        out = StringIO()
+        call_command('generate_document_previews', stdout=out)
+        self.assertIn('1 Vorschau(en)', out.getvalue())
+        self.assertTrue(DocumentPreview.objects.filter(file_hash=document.file_hash).exists())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, WORKER_POOL_SIZE=0, PDF_RASTERIZER_BINARY='does-not-exist')
+class DocumentBundleTest(TestCase):
+    """Test cases for the ZIP download of several documents"""
+
+    def upload(self, title, name, content, **kwargs):
+        document = Document(title=title, **kwargs)
+        document.file = SimpleUploadedFile(name, content)
+        with self.captureOnCommitCallbacks(execute=True):
+            document.save()
+        return document
+
+    def get_zip(self, params):
+        response = self.client.get(reverse('document_bundle'), params)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+
+    def test_selected_documents(self):
+        satzung = self.upload("Satzung", 'satzung.pdf', pdf_bytes(1))
+        notiz = self.upload("Notiz", 'notiz.txt', b'Kurze Notiz')
+        kopie = self.upload("Notiz", 'notiz_2.pdf', pdf_bytes(2))
+        self.upload("Entwurf", 'entwurf.pdf', pdf_bytes(1), is_public=False)
+
+        ids = [satzung.pk, notiz.pk, kopie.pk] + list(Document.objects.filter(is_public=False).values_list('pk', flat=True))
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('document_bundle'), {'id': ids})
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+
+        self.assertEqual(sorted(archive.namelist()), ['Notiz (2).pdf', 'Notiz.pdf', 'Satzung.pdf'])
+        self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist()))
+        self.assertEqual(archive.read('Satzung.pdf'), pdf_bytes(1))
+        # Newest first; the text file was converted by the preview stage already
+        self.assertEqual(archive.read('Notiz.pdf'), pdf_bytes(2))
+        self.assertIn('Kurze Notiz', pdf_text(BytesIO(archive.read('Notiz (2).pdf'))))
+        self.assertEqual(Document.objects.get(pk=satzung.pk).download_count, 1)
+        self.assertEqual(Document.objects.filter(is_public=False).get().download_count, 0)
+
+    def test_category_uses_originals_without_pdf(self):
+        notiz = self.upload("Notiz", 'notiz.txt', b'Kurze Notiz', category='forms')
+        self.upload("Satzung", 'satzung.pdf', pdf_bytes(1), category='general')
+        notiz.file.storage.delete(converted_pdf_name(notiz))
+
+        archive = self.get_zip({'category': 'forms'})
+        self.assertEqual(archive.namelist(), ['Notiz.txt'])
+        self.assertEqual(archive.read('Notiz.txt'), b'Kurze Notiz')
+        # Nothing is converted while the bundle is written
+        self.assertFalse(notiz.file.storage.exists(converted_pdf_name(notiz)))
+
+    def test_no_documents(self):
+        response = self.client.get(reverse('document_bundle'), {'id': ['999']})
+        self.assertEqual(response.status_code, 404)
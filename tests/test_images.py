@@ -0,0 +1,275 @@
+"""
+Image derivative tests for Lesezirkel application
+"""
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from main.image_utils import ORIENTATION_TAG, derivative_name, get_derivatives, is_derivative_name
+from main.models import Event, Gallery, GalleryUploadBatch, TeamMember
+from main.storage import ContentAddressedStorage
+from main.versions import get_version
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name='foto.jpg', size=(1200, 800), fmt='JPEG', color=(200, 50, 50)):
+    """Create an in-memory uploaded image"""
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{fmt.lower()}')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    IMAGE_DERIVATIVE_WIDTHS=[320, 640, 2000],
+    IMAGE_DERIVATIVE_FORMATS=['webp', 'jpeg'],
+)
+class ImageDerivativeTest(TestCase):
+    """Test cases for responsive image derivatives"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_derivative_name(self):
+        """Test derivative naming scheme"""
+        self.assertEqual(derivative_name('gallery/foto.jpg', 640, 'webp'), 'gallery/foto_640w.webp')
+        self.assertEqual(derivative_name('gallery/foto.png', 320, 'jpeg'), 'gallery/foto_320w.jpg')
+        self.assertTrue(is_derivative_name('gallery/foto_640w.webp'))
+        self.assertFalse(is_derivative_name('gallery/foto.jpg'))
+        self.assertFalse(is_derivative_name('gallery/sommer_2024.jpg'))
+
+    def test_derivatives_created_on_upload(self):
+        """Test that derivatives are generated after saving, without upscaling"""
+        item = Gallery.objects.create(title='Sommerfest', image=make_image())
+        derivatives = get_derivatives(item.image)
+
+        self.assertEqual([w for w, _ in derivatives['webp']], [320, 640])
+        self.assertEqual([w for w, _ in derivatives['jpeg']], [320, 640])
+
+        storage = item.image.storage
+        with storage.open(derivative_name(item.image.name, 640, 'webp')) as f:
+            with Image.open(f) as img:
+                self.assertEqual(img.size, (640, 427))
+                self.assertEqual(img.format, 'WEBP')
+
+    def test_derivatives_are_cached_per_model_version(self):
+        """Test that repeated lookups do not ask the storage again until the model changes"""
+        item = Gallery.objects.create(title='Sommerfest', image=make_image())
+        storage = item.image.storage
+        expected = get_derivatives(item.image)
+
+        with mock.patch.object(ContentAddressedStorage, 'exists', side_effect=AssertionError('storage.exists')):
+            self.assertEqual(get_derivatives(item.image), expected)
+
+        # Removed outside the signals: still cached until the version changes
+        storage.delete(derivative_name(item.image.name, 320, 'webp'))
+        self.assertEqual(get_derivatives(item.image), expected)
+        version = get_version(Gallery)
+        call_command('generate_image_derivatives', '--model', 'Gallery', stdout=StringIO())
+        self.assertGreater(get_version(Gallery), version)
+
+        storage.delete(derivative_name(item.image.name, 320, 'webp'))
+        item.title = 'Sommerfest 2024'
+        item.save()
+        # Regenerated on save, the new version reads the storage again
+        with mock.patch.object(ContentAddressedStorage, 'exists', wraps=storage.exists) as exists:
+            get_derivatives(item.image)
+        self.assertEqual(exists.call_count, 6)
+
+    def test_gallery_without_image(self):
+        """Test that saving without image does not fail"""
+        item = Gallery.objects.create(title='Ohne Bild')
+        self.assertEqual(get_derivatives(item.image), {})
+
+    def test_responsive_image_tag(self):
+        """Test that the template tag renders a picture element with srcset"""
+        item = Gallery.objects.create(title='Sommerfest', image=make_image())
+        html = Template(
+            '{% load image_tags %}{% responsive_image item.image alt=item.title class="gallery-img" %}'
+        ).render(Context({'item': item}))
+
+        self.assertIn('<picture>', html)
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('_320w.webp 320w', html)
+        self.assertIn('_640w.jpg 640w', html)
+        self.assertIn('class="gallery-img"', html)
+        self.assertIn('alt="Sommerfest"', html)
+
+    def test_backfill_command(self):
+        """Test that the management command regenerates missing derivatives"""
+        item = Gallery.objects.create(title='Sommerfest', image=make_image())
+        storage = item.image.storage
+        missing = derivative_name(item.image.name, 320, 'webp')
+        storage.delete(missing)
+        self.assertFalse(storage.exists(missing))
+
+        call_command('generate_image_derivatives', '--model', 'Gallery', stdout=StringIO())
+        self.assertTrue(storage.exists(missing))
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    IMAGE_DERIVATIVE_WIDTHS=[320],
+    IMAGE_DERIVATIVE_FORMATS=['jpeg'],
+    WORKER_POOL_SIZE=0,
+)
+class GalleryBulkUploadTest(TestCase):
+    """Test cases for the gallery bulk upload with background processing"""
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='adminpass123'
+        )
+        self.client.login(username='admin', password='adminpass123')
+
+    def test_bulk_upload_creates_items_and_reports_failures(self):
+        """Test that valid images are created and broken files are reported"""
+        rotated = BytesIO()
+        exif = Image.Exif()
+        exif[ORIENTATION_TAG] = 6
+        Image.new('RGB', (1200, 800)).save(rotated, 'JPEG', exif=exif)
+
+        files = [
+            make_image('sommer_fest.jpg'),
+            SimpleUploadedFile('gedreht.jpg', rotated.getvalue(), content_type='image/jpeg'),
+            SimpleUploadedFile('kaputt.jpg', b'not an image', content_type='image/jpeg'),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin:gallery_bulk_upload'), {'images': files})
+
+        batch = GalleryUploadBatch.objects.get()
+        self.assertRedirects(response, reverse('admin:gallery_bulk_upload_progress', args=[batch.pk]))
+        self.assertEqual(Gallery.objects.count(), 2)
+        self.assertTrue(Gallery.objects.filter(title='Sommer Fest').exists())
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.total, 3)
+        self.assertEqual(batch.processed, 3)
+        self.assertEqual(batch.failed, 1)
+        self.assertTrue(batch.is_finished)
+        self.assertIn('kaputt.jpg', batch.errors)
+
+        # EXIF orientation was applied in the background job
+        item = Gallery.objects.get(title='Gedreht')
+        with item.image.open('rb') as f:
+            with Image.open(f) as img:
+                self.assertEqual(img.size, (800, 1200))
+        self.assertEqual((item.width, item.height), (800, 1200))
+        self.assertIn('jpeg', get_derivatives(item.image))
+
+    def test_bulk_upload_status(self):
+        """Test the JSON progress endpoint"""
+        batch = GalleryUploadBatch.objects.create(total=4, processed=2, failed=1, errors='x.jpg: kaputt\n')
+        response = self.client.get(reverse('admin:gallery_bulk_upload_status', args=[batch.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['percent'], 50)
+        self.assertFalse(data['finished'])
+        self.assertEqual(data['errors'], ['x.jpg: kaputt'])
+
+        response = self.client.get(reverse('admin:gallery_bulk_upload_progress', args=[batch.pk]))
+        self.assertContains(response, 'x.jpg: kaputt')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    IMAGE_UPLOAD_MAX_SIDE=1000,
+    IMAGE_UPLOAD_LIMITS={'TeamMember': {'max_side': 300}},
+    IMAGE_DERIVATIVE_WIDTHS=[320],
+)
+class ImageNormalizationTest(TestCase):
+    """Test cases for upload-time image normalization"""
+
+    def test_upload_is_rotated_stripped_and_capped(self):
+        """Test that EXIF rotation is applied, metadata removed and size capped"""
+        buffer = BytesIO()
+        exif = Image.Exif()
+        exif[ORIENTATION_TAG] = 6
+        exif[0x010F] = 'Phone Maker'  # Make
+        Image.new('RGB', (3000, 2000), (10, 120, 200)).save(buffer, 'JPEG', exif=exif, quality=95)
+        upload = SimpleUploadedFile('handy.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+        item = Gallery.objects.create(title='Handyfoto', image=upload)
+
+        with item.image.open('rb') as f:
+            with Image.open(f) as img:
+                self.assertEqual(img.size, (667, 1000))
+                self.assertEqual(len(img.getexif()), 0)
+        self.assertEqual((item.width, item.height), (667, 1000))
+        self.assertLess(item.image.size, len(buffer.getvalue()))
+
+    def test_per_model_limits(self):
+        """Test that per model limits from settings are used"""
+        member = TeamMember.objects.create(name='Anna', position='Vorstand', image=make_image('anna.jpg'))
+        with member.image.open('rb') as f:
+            with Image.open(f) as img:
+                self.assertEqual(max(img.size), 300)
+
+    def test_unsupported_format_is_converted(self):
+        """Test that formats other than JPEG/PNG/WebP are stored as JPEG"""
+        item = Gallery.objects.create(title='Scan', image=make_image('scan.bmp', size=(400, 300), fmt='BMP'))
+        self.assertTrue(item.image.name.endswith('.jpg'))
+
+    def test_small_clean_image_is_kept(self):
+        """Test that already optimized images are not re-encoded"""
+        buffer = BytesIO()
+        Image.effect_noise((200, 200), 60).convert('RGB').save(buffer, 'JPEG', quality=30, optimize=True)
+        original = buffer.getvalue()
+        upload = SimpleUploadedFile('klein.jpg', original, content_type='image/jpeg')
+        item = Gallery.objects.create(title='Klein', image=upload)
+        with item.image.open('rb') as f:
+            self.assertEqual(f.read(), original)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    IMAGE_DERIVATIVE_WIDTHS=[320, 640],
+    IMAGE_DERIVATIVE_FORMATS=['webp', 'jpeg'],
+)
+class GalleryChunkTest(TestCase):
+    """Test cases for the lazy-loading gallery JSON API"""
+
+    def test_chunk_contains_thumbnail_and_dimensions(self):
+        """Test that chunk items carry everything the client needs to render them"""
+        event = Event.objects.create(title='Lesefest', description='Test', date=timezone.now(), location='Osnabrück')
+        item = Gallery.objects.create(title='Lesefest', image=make_image(size=(1200, 800)), event=event)
+
+        data = self.client.get(reverse('gallery_chunk')).json()
+        entry = data['items'][0]
+        self.assertEqual(entry['id'], item.pk)
+        self.assertEqual((entry['width'], entry['height']), (1200, 800))
+        self.assertTrue(entry['thumbnail'].endswith('_640w.jpg'))
+        self.assertIn('_320w.webp 320w', entry['srcset']['webp'])
+        self.assertEqual(entry['image'], item.image.url)
+        self.assertEqual(entry['event'], {'id': event.pk, 'title': 'Lesefest'})
+        self.assertFalse(data['has_next'])
+
+    def test_gallery_page_continues_with_chunks(self):
+        """Test that the page hands its cursor to the lazy loader"""
+        for i in range(13):
+            Gallery.objects.create(title=f'Bild {i}', image=make_image(size=(200, 100)))
+
+        response = self.client.get(reverse('gallery'))
+        cursor = response.context['page_obj'].next_cursor
+        self.assertContains(response, f'data-next-cursor="{cursor}"')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="200" height="100"')
+
+        data = self.client.get(reverse('gallery_chunk'), {'cursor': cursor}).json()
+        self.assertEqual([entry['title'] for entry in data['items']], ['Bild 0'])
@@ -0,0 +1,113 @@
+"""
+Keyset pagination tests for Lesezirkel application
+"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from main.models import Document, News
+from main.pagination import InvalidCursor, KeysetPaginator
+from main.views import DOCUMENT_ORDERING, NEWS_ORDERING
+
+
+class KeysetPaginatorTest(TestCase):
+    """Test cases for the cursor based paginator"""
+
+    def setUp(self):
+        now = timezone.now()
+        # Two news share a timestamp so the pk tie-breaker is exercised
+        for i in range(7):
+            News.objects.create(
+                title=f"News {i}",
+                content="Inhalt",
+                published_date=now - timedelta(hours=i // 2),
+            )
+
+    def test_pages_cover_all_rows_without_overlap(self):
+        """Following next_cursor visits every row exactly once, in order"""
+        paginator = KeysetPaginator(News.objects.all(), 3, NEWS_ORDERING)
+        seen = []
+        cursor = None
+        while True:
+            page = paginator.get_page(cursor)
+            seen.extend(item.pk for item in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        expected = list(News.objects.order_by(*NEWS_ORDERING).values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_round_trip(self):
+        """Cursors decode to the sort key of the encoded object"""
+        paginator = KeysetPaginator(News.objects.all(), 3, NEWS_ORDERING)
+        item = News.objects.first()
+        values = paginator.decode_cursor(paginator.encode_cursor(item))
+        self.assertEqual(values, [item.published_date, item.pk])
+
+    def test_invalid_cursor(self):
+        """Broken cursors raise on decode and fall back to the first page"""
+        paginator = KeysetPaginator(News.objects.all(), 3, NEWS_ORDERING)
+        with self.assertRaises(InvalidCursor):
+            paginator.decode_cursor('kaputt')
+
+        page = paginator.get_page('kaputt')
+        self.assertFalse(page.has_previous)
+        self.assertEqual(
+            [item.pk for item in page],
+            [item.pk for item in paginator.get_page()],
+        )
+
+    def test_boolean_ordering(self):
+        """Featured documents come first, across page boundaries"""
+        for i in range(5):
+            Document.objects.create(title=f"Dokument {i}", is_featured=(i == 3))
+        paginator = KeysetPaginator(Document.objects.all(), 2, DOCUMENT_ORDERING)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        titles = [doc.title for doc in first] + [doc.title for doc in second]
+        self.assertEqual(titles[0], "Dokument 3")
+        self.assertEqual(len(set(titles)), 4)
+
+
+class KeysetPaginationViewTest(TestCase):
+    """Test cases for the paginated list views and JSON chunks"""
+
+    def setUp(self):
+        now = timezone.now()
+        for i in range(12):
+            News.objects.create(title=f"News {i}", content="Inhalt", published_date=now - timedelta(days=i))
+
+    def test_news_cursor_navigation(self):
+        response = self.client.get(reverse('news'))
+        self.assertEqual(response.status_code, 200)
+        page = response.context['page_obj']
+        self.assertEqual(len(page), 9)
+        self.assertTrue(page.has_next)
+        self.assertContains(response, f'cursor={page.next_cursor}')
+
+        response = self.client.get(reverse('news'), {'cursor': page.next_cursor})
+        self.assertEqual(len(response.context['page_obj']), 3)
+        self.assertContains(response, "News 11")
+
+    def test_legacy_page_number(self):
+        """Old ?page=N links still work"""
+        response = self.client.get(reverse('news'), {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertContains(response, "News 11")
+
+    def test_news_chunk_json(self):
+        response = self.client.get(reverse('news_chunk'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['items']), 9)
+        self.assertTrue(data['has_next'])
+        self.assertEqual(data['items'][0]['title'], "News 0")
+
+        data = self.client.get(reverse('news_chunk'), {'cursor': data['next_cursor']}).json()
+        self.assertEqual(len(data['items']), 3)
+        self.assertFalse(data['has_next'])
+        self.assertIsNone(data['next_cursor'])
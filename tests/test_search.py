@@ -0,0 +1,220 @@
+"""
+Site search tests for Lesezirkel application
+"""
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import serializers
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from main.models import Certificate, Document, Event, EventRegistration, InvitationCode, News, SearchIndexEntry
+from main.search import analyze, fold, make_search_key, search, search_ids, search_key_filter
+
+
+class AnalyzerTest(TestCase):
+    """Test cases for normalization and stemming"""
+
+    def test_umlaut_folding(self):
+        self.assertEqual(fold("Bücherstraße"), "bucherstrasse")
+        self.assertEqual(fold("Buecherstrasse"), "bucherstrasse")
+        self.assertEqual(fold("Café"), "cafe")
+
+    def test_stemming_and_stopwords(self):
+        self.assertEqual(analyze("Die Lesungen der Bücher"), ["lesung", "buch"])
+        self.assertEqual(analyze("Lesung"), analyze("Lesungen"))
+        self.assertEqual(analyze("Osnabrück"), analyze("Osnabrueck"))
+
+
+class SearchIndexTest(TestCase):
+    """Test cases for the inverted index and ranking"""
+
+    def setUp(self):
+        self.event = Event.objects.create(
+            title="Lesung im Schlossgarten",
+            description="Wir lesen Gedichte über Frieden.",
+            date=timezone.now() + timedelta(days=7),
+            location="Osnabrück",
+        )
+        self.news = News.objects.create(
+            title="Rückblick",
+            content="Die Lesung über den Westfälischen Frieden war ein großer Erfolg.",
+        )
+
+    def test_index_follows_saves_and_deletes(self):
+        self.assertTrue(SearchIndexEntry.objects.filter(model='event', object_id=self.event.pk, term='lesung').exists())
+
+        self.event.title = "Konzert"
+        self.event.save()
+        self.assertFalse(SearchIndexEntry.objects.filter(model='event', object_id=self.event.pk, term='lesung').exists())
+
+        self.news.delete()
+        self.assertFalse(SearchIndexEntry.objects.filter(model='news').exists())
+
+    def test_loaddata_leaves_index_alone(self):
+        self.event.title = "Konzert"
+        data = serializers.serialize('json', [self.event])
+        for obj in serializers.deserialize('json', data):
+            obj.save()
+
+        terms = SearchIndexEntry.objects.filter(model='event', object_id=self.event.pk).values_list('term', flat=True)
+        self.assertIn('lesung', terms)
+        self.assertNotIn(analyze("Konzert")[0], terms)
+
+    def test_ranking_prefers_title_hits(self):
+        """Both contain 'Lesung', the event has it in the title"""
+        hits = search("Lesungen")
+        self.assertEqual([obj for _, obj, _ in hits], [self.event, self.news])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual([obj for _, obj, _ in search("Lesung Westfälischen")], [self.news])
+        self.assertEqual(search("Lesung Kochkurs"), [])
+        self.assertEqual(search("und der"), [])
+
+    def test_private_documents_are_hidden(self):
+        Document.objects.create(title="Satzung", description="Öffentliche Satzung", is_public=True)
+        hidden = Document.objects.create(title="Protokoll Satzung", is_public=False)
+
+        self.assertEqual(len(search("Satzung")), 1)
+        self.assertIn(('document', hidden.pk), [(key, pk) for key, pk, _ in search_ids("Satzung")])
+
+    def test_rebuild_command(self):
+        SearchIndexEntry.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('event: 1', out.getvalue())
+        self.assertEqual(len(search("Frieden")), 2)
+
+
+class SearchViewTest(TestCase):
+    """Test cases for /suche/ and the admin search"""
+
+    def setUp(self):
+        self.news = News.objects.create(title="Sommerfest", content="Mit Buchbasar und Musik.")
+
+    def test_search_page(self):
+        response = self.client.get(reverse('search'), {'q': 'Buchbasar'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Sommerfest")
+        self.assertContains(response, self.news.get_absolute_url())
+
+        response = self.client.get(reverse('search'), {'q': 'Weihnachtsmarkt'})
+        self.assertContains(response, "Keine Ergebnisse")
+
+    def test_empty_query(self):
+        response = self.client.get(reverse('search'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['results'], [])
+
+    def test_admin_search_uses_index(self):
+        """content is no longer in search_fields, but is found via the index"""
+        User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpass123')
+        self.client.login(username='admin', password='adminpass123')
+        News.objects.create(title="Andere Nachricht", content="Nichts")
+
+        response = self.client.get(reverse('admin:main_news_changelist'), {'q': 'Buchbasar'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.news])
+
+        response = self.client.get(reverse('admin:main_news_changelist'), {'q': 'Andere'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+class SearchKeyTest(TestCase):
+    """Test cases for the precomputed admin search keys of registrations and certificates"""
+
+    def setUp(self):
+        User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpass123')
+        self.client.login(username='admin', password='adminpass123')
+        self.event = Event.objects.create(
+            title="Lesekreis",
+            description="Test",
+            date=timezone.now() + timedelta(days=7),
+            location="Osnabrück",
+        )
+        self.code = InvitationCode.objects.create(event=self.event, code="GAST-2024")
+        self.registration = EventRegistration.objects.create(
+            event=self.event, first_name="Jürgen", last_name="Müller",
+            email="j.mueller@example.com", invitation_code=self.code,
+        )
+        EventRegistration.objects.create(
+            event=self.event, first_name="Anna", last_name="Schmidt", email="anna@example.com",
+        )
+
+    def test_search_key(self):
+        self.assertEqual(make_search_key("Müller", "Jürgen"), "muller jurgen")
+        self.assertEqual(self.registration.search_key, "muller jurgen j muller example com gast 2024 lesekreis")
+
+    def test_key_follows_invitation_code(self):
+        self.code.code = "VIP-1"
+        self.code.save()
+        self.registration.refresh_from_db()
+        self.assertTrue(self.registration.search_key.endswith("vip 1 lesekreis"))
+
+    def test_key_follows_event_title(self):
+        self.event.title = "Schreibwerkstatt"
+        self.event.save()
+        self.registration.refresh_from_db()
+        self.assertTrue(self.registration.search_key.endswith("gast 2024 schreibwerkstatt"))
+
+    def test_registration_admin_search(self):
+        url = reverse('admin:main_eventregistration_changelist')
+        for term in ("Müller", "mueller", "jürg", "gast-2024", "MUELLER Jurgen"):
+            response = self.client.get(url, {'q': term})
+            self.assertEqual(list(response.context['cl'].result_list), [self.registration], term)
+
+        response = self.client.get(url, {'q': 'example'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+        response = self.client.get(url, {'q': 'Lesekreis'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+        response = self.client.get(url, {'q': 'ller'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_key_prefix_uses_index(self):
+        queryset = EventRegistration.objects.filter(search_key_filter("Müller jürg"))
+        self.assertEqual(list(queryset), [self.registration])
+        if connection.vendor == 'sqlite':
+            plan = queryset.explain()
+            self.assertIn('USING INDEX main_eventregistration_search_key_', plan)
+            self.assertNotIn('SCAN main_eventregistration', plan)
+
+    def test_key_prefix_without_binary_collation(self):
+        # The range bound relies on SQLite's binary collation, other backends use LIKE 'token%'
+        with mock.patch('main.search.connection') as fake_connection:
+            fake_connection.vendor = 'postgresql'
+            condition = search_key_filter("Müller")
+        self.assertEqual(condition, Q(search_key__startswith='muller'))
+
+    def test_scan_only_without_prefix_hits(self):
+        model_admin = admin.site._registry[EventRegistration]
+        queryset = EventRegistration.objects.all()
+        EventRegistration.objects.create(
+            event=self.event, first_name="Müller", last_name="Anders", email="anders@example.com",
+        )
+        # Keys starting with the term: the first name "Müller" is not scanned for
+        with CaptureQueriesContext(connection) as queries:
+            results, _ = model_admin.get_search_results(None, queryset, 'muller')
+            self.assertEqual(list(results), [self.registration])
+        self.assertFalse(any('LIKE' in query['sql'] for query in queries))
+
+        with CaptureQueriesContext(connection) as queries:
+            results, _ = model_admin.get_search_results(None, queryset, 'anna')
+            self.assertEqual(results.count(), 1)
+        self.assertIn('LIKE', queries[-1]['sql'])
+
+    def test_certificate_admin_search(self):
+        certificate = Certificate.objects.create(
+            first_name="Özlem", last_name="Yılmaz", participant_number="LZ-0042",
+            event_title="Schreibwerkstatt", completion_date=date(2024, 5, 1),
+        )
+        url = reverse('admin:main_certificate_changelist')
+        for term in ("ozlem", "Yilmaz", "lz-0042", "schreibwerk"):
+            response = self.client.get(url, {'q': term})
+            self.assertEqual(list(response.context['cl'].result_list), [certificate], term)
@@ -0,0 +1,191 @@
+"""
+Content-addressed media storage tests for Lesezirkel application
+"""
+import errno
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from main.conversion import converted_pdf_name
+from main.image_utils import derivative_name
+from main.models import Document, Event, Gallery, News
+from main.storage import ContentAddressedStorage
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def blob_count(storage):
+    return sum(len(files) for _, _, files in os.walk(storage.blob_root))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    """Test cases for deduplicated media files"""
+
+    def setUp(self):
+        self.storage = ContentAddressedStorage()
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        os.makedirs(TEMP_MEDIA_ROOT)
+
+    def test_duplicates_share_one_blob(self):
+        first = self.storage.save('events/sommerfest.jpg', ContentFile(b'gleiches Foto'))
+        second = self.storage.save('gallery/sommerfest.jpg', ContentFile(b'gleiches Foto'))
+        third = self.storage.save('events/sommerfest.jpg', ContentFile(b'anderes Foto'))
+
+        self.assertEqual((first, second), ('events/sommerfest.jpg', 'gallery/sommerfest.jpg'))
+        self.assertNotEqual(third, first)
+        self.assertTrue(os.path.samefile(self.storage.path(first), self.storage.path(second)))
+        self.assertEqual(self.storage.content_key(first), self.storage.content_key(second))
+        self.assertEqual(self.storage.references(first), 2)
+        self.assertEqual(self.storage.references(third), 1)
+        self.assertEqual(blob_count(self.storage), 2)
+        with self.storage.open(third) as f:
+            self.assertEqual(f.read(), b'anderes Foto')
+
+    def test_blob_goes_with_last_name(self):
+        first = self.storage.save('news/plakat.pdf', ContentFile(b'Plakat'))
+        second = self.storage.save('documents/plakat.pdf', ContentFile(b'Plakat'))
+
+        self.storage.delete(first)
+        self.assertFalse(self.storage.exists(first))
+        with self.storage.open(second) as f:
+            self.assertEqual(f.read(), b'Plakat')
+        self.assertEqual(blob_count(self.storage), 1)
+
+        self.storage.delete(second)
+        self.assertEqual(blob_count(self.storage), 0)
+
+    def test_plain_copy_without_hard_links(self):
+        with mock.patch('main.storage.os.link', side_effect=OSError(errno.EPERM, 'Operation not permitted')):
+            name = self.storage.save('documents/ohne-link.txt', ContentFile(b'Inhalt'))
+        self.assertEqual(name, 'documents/ohne-link.txt')
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'Inhalt')
+        self.assertEqual(blob_count(self.storage), 0)
+
+    def test_temporary_upload_is_moved(self):
+        upload = TemporaryUploadedFile('gross.bin', 'application/octet-stream', 6, None)
+        upload.write(b'Inhalt')
+        upload.seek(0)
+        temp_path = upload.temporary_file_path()
+
+        name = self.storage.save('documents/gross.bin', upload)
+        upload.close()
+        self.assertFalse(os.path.exists(temp_path))
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'Inhalt')
+
+    def test_deduplicate_existing_files(self):
+        for name in ('events/alt.jpg', 'gallery/alt.jpg', 'news/anders.jpg'):
+            os.makedirs(os.path.dirname(self.storage.path(name)), exist_ok=True)
+            with open(self.storage.path(name), 'wb') as f:
+                f.write(b'anders' if name.startswith('news') else b'altes Foto')
+
+        out = StringIO()
+        call_command('deduplicate_media', '--dry-run', stdout=out)
+        self.assertIn('3 Datei(en) noch nicht dedupliziert', out.getvalue())
+
+        out = StringIO()
+        call_command('deduplicate_media', stdout=out)
+        self.assertIn('3 Datei(en) verknüpft, davon 1 Duplikat(e)', out.getvalue())
+        self.assertTrue(os.path.samefile(self.storage.path('events/alt.jpg'), self.storage.path('gallery/alt.jpg')))
+        self.assertEqual(blob_count(self.storage), 2)
+
+    def test_home_skips_same_photo_under_other_name(self):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30), (200, 50, 50)).save(buffer, 'PNG')
+        photo = buffer.getvalue()
+        event = Event.objects.create(title="Sommerfest", description="Fest", location="Osnabrück",
+                                     date=timezone.now() + timedelta(days=3))
+        event.image.save('sommerfest.png', ContentFile(photo))
+        news = News.objects.create(title="Rückblick", content="Bericht")
+        news.image.save('rueckblick.png', ContentFile(photo))
+        self.assertNotEqual(event.image.name, news.image.name)
+
+        response = self.client.get(reverse('home'))
+        self.assertEqual([item['type'] for item in response.context['hero_gallery']], ['event'])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, WORKER_POOL_SIZE=0, IMAGE_DERIVATIVE_WIDTHS=[320],
+                   PDF_RASTERIZER_BINARY='does-not-exist')
+class OrphanedMediaTest(TestCase):
+    """Test cases for the orphaned media garbage collector"""
+
+    def setUp(self):
+        self.storage = default_storage
+        buffer = BytesIO()
+        Image.new('RGB', (400, 300), (20, 120, 200)).save(buffer, 'JPEG')
+        self.photo = buffer.getvalue()
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        os.makedirs(TEMP_MEDIA_ROOT)
+
+    def collect(self, *args):
+        out = StringIO()
+        call_command('collect_orphaned_media', '--min-age', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_unreferenced_files_are_deleted(self):
+        item = Gallery.objects.create(title="Sommerfest", image=SimpleUploadedFile('sommerfest.jpg', self.photo))
+        with self.captureOnCommitCallbacks(execute=True):
+            document = Document.objects.create(title="Notiz", file=SimpleUploadedFile('notiz.txt', b'Kurze Notiz'))
+        kept = {item.image.name, document.file.name, converted_pdf_name(document), derivative_name(item.image.name, 320, 'webp')}
+        self.assertTrue(all(self.storage.exists(name) for name in kept))
+
+        # Replaced photo with its derivative, stale conversion, blob without names
+        old = Gallery.objects.create(title="Alt", image=SimpleUploadedFile('alt.jpg', self.photo[:-10] + b'\xff\xd9'))
+        orphans = {old.image.name, derivative_name(old.image.name, 320, 'webp'), derivative_name(old.image.name, 320, 'jpeg'),
+                   'converted/deadbeef.pdf'}
+        Gallery.objects.filter(pk=old.pk).delete()
+        self.storage.save('converted/deadbeef.pdf', ContentFile(b'%PDF alt'))
+        lost = self.storage.save('team/weg.txt', ContentFile(b'nur noch der Blob'))
+        os.remove(self.storage.path(lost))
+
+        output = self.collect('--dry-run')
+        for name in orphans:
+            self.assertIn(name, output)
+        self.assertIn('5 verwaiste Datei(en)', output)
+        self.assertTrue(all(self.storage.exists(name) for name in orphans))
+
+        self.assertIn('5 verwaiste Datei(en) gelöscht', self.collect())
+        # Every remaining blob still has a name
+        for directory, _, filenames in os.walk(self.storage.blob_root):
+            for filename in filenames:
+                self.assertGreater(os.stat(os.path.join(directory, filename)).st_nlink, 1)
+        self.assertFalse(any(self.storage.exists(name) for name in orphans))
+        self.assertTrue(all(self.storage.exists(name) for name in kept))
+        self.assertIn('0 verwaiste Datei(en)', self.collect('--dry-run'))
+
+    def test_recent_files_are_kept(self):
+        self.storage.save('gallery/upload.jpg', ContentFile(self.photo))
+        out = StringIO()
+        call_command('collect_orphaned_media', stdout=out)
+        self.assertIn('0 verwaiste Datei(en)', out.getvalue())
+        self.assertTrue(self.storage.exists('gallery/upload.jpg'))
+
+    def test_hidden_files_are_kept(self):
+        for name in ('.gitkeep', 'gallery/.htaccess', '.well-known/security.txt'):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write('bleibt')
+
+        self.assertIn('0 verwaiste Datei(en)', self.collect())
+        self.assertTrue(os.path.exists(os.path.join(TEMP_MEDIA_ROOT, '.gitkeep')))
+        self.assertTrue(os.path.exists(os.path.join(TEMP_MEDIA_ROOT, 'gallery', '.htaccess')))
+        self.assertTrue(os.path.exists(os.path.join(TEMP_MEDIA_ROOT, '.well-known', 'security.txt')))
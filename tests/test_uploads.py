@@ -0,0 +1,134 @@
+"""
+Resumable chunked admin upload tests for Lesezirkel application
+"""
+import base64
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from main.models import ChunkedUpload, Document, Gallery, GalleryUploadBatch
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+TEMP_UPLOAD_DIR = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, CHUNKED_UPLOAD_DIR=TEMP_UPLOAD_DIR, CHUNKED_UPLOAD_CHUNK_SIZE=8,
+                   WORKER_POOL_SIZE=0, PDF_RASTERIZER_BINARY='does-not-exist')
+class ChunkedUploadTest(TestCase):
+    """Test cases for the tus-like upload endpoint and attaching uploads in admin forms"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_UPLOAD_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'adminpass123')
+        self.client.force_login(self.admin_user)
+
+    def start(self, endpoint, filename, size):
+        response = self.client.post(endpoint, headers={
+            'Upload-Length': str(size),
+            'Upload-Metadata': 'filename ' + base64.b64encode(filename.encode()).decode(),
+        })
+        self.assertEqual(response.status_code, 201)
+        return response['Location']
+
+    def patch(self, url, offset, data):
+        return self.client.generic('PATCH', url, data, content_type='application/offset+octet-stream',
+                                   headers={'Upload-Offset': str(offset)})
+
+    def upload(self, endpoint, filename, content, chunk_size=8):
+        url = self.start(endpoint, filename, len(content))
+        for offset in range(0, len(content), chunk_size):
+            response = self.patch(url, offset, content[offset:offset + chunk_size])
+            self.assertEqual(response.status_code, 204)
+        return url.rstrip('/').rsplit('/', 1)[1]
+
+    def test_resume_after_interruption(self):
+        content = b'Jahresbericht 2024 mit Anhang'
+        url = self.start(reverse('admin:main_document_upload'), 'jahresbericht.txt', len(content))
+
+        response = self.patch(url, 0, content[:8])
+        self.assertEqual(response['Upload-Offset'], '8')
+        # A chunk sent again for the wrong offset is refused with the right one
+        response = self.patch(url, 0, content[:8])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '8')
+        # Chunks larger than CHUNKED_UPLOAD_CHUNK_SIZE are refused
+        self.assertEqual(self.patch(url, 8, content[8:20]).status_code, 413)
+
+        response = self.client.head(url)
+        self.assertEqual((response['Upload-Offset'], response['Upload-Length']), ('8', str(len(content))))
+        for offset in range(8, len(content), 8):
+            self.patch(url, offset, content[offset:offset + 8])
+
+        upload = ChunkedUpload.objects.get()
+        self.assertTrue(upload.is_complete)
+        with open(upload.path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+    def test_uploads_are_private(self):
+        url = self.start(reverse('admin:main_document_upload'), 'satzung.txt', 4)
+        other = User.objects.create_superuser('other', 'other@example.com', 'otherpass123')
+        self.client.force_login(other)
+        self.assertEqual(self.client.head(url).status_code, 404)
+        self.assertEqual(self.patch(url, 0, b'abcd').status_code, 404)
+
+    def test_document_admin_attaches_upload(self):
+        response = self.client.get(reverse('admin:main_document_add'))
+        self.assertContains(response, 'data-chunked-upload="%s"' % reverse('admin:main_document_upload'))
+        self.assertContains(response, 'admin/js/chunked_upload.js')
+
+        content = b'Protokoll der Mitgliederversammlung'
+        upload_id = self.upload(reverse('admin:main_document_upload'), 'protokoll.txt', content)
+        upload = ChunkedUpload.objects.get()
+
+        response = self.client.post(reverse('admin:main_document_add'), {
+            'title': 'Protokoll', 'category': 'reports', 'is_public': 'on', 'file_upload': upload_id,
+        })
+        self.assertEqual(response.status_code, 302)
+
+        document = Document.objects.get()
+        self.assertTrue(document.file.name.startswith('documents/protokoll'))
+        with document.file.open('rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(len(document.file_hash), 64)
+        # Moved into storage, nothing left behind
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertFalse(os.path.exists(upload.path))
+
+    def test_incomplete_upload_is_rejected(self):
+        url = self.start(reverse('admin:main_document_upload'), 'protokoll.txt', 20)
+        self.patch(url, 0, b'Protokol')
+
+        response = self.client.post(reverse('admin:main_document_add'), {
+            'title': 'Protokoll', 'category': 'reports', 'file_upload': url.rstrip('/').rsplit('/', 1)[1],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Der Upload ist unvollständig')
+        self.assertFalse(Document.objects.exists())
+
+    def test_gallery_bulk_upload(self):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30), (200, 50, 50)).save(buffer, 'JPEG')
+        upload_id = self.upload(reverse('admin:main_gallery_upload'), 'sommer_fest.jpg', buffer.getvalue(),
+                                chunk_size=8)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin:gallery_bulk_upload'), {'images_upload': [upload_id]})
+
+        batch = GalleryUploadBatch.objects.get()
+        self.assertRedirects(response, reverse('admin:gallery_bulk_upload_progress', args=[batch.pk]))
+        item = Gallery.objects.get()
+        self.assertEqual(item.title, 'Sommer Fest')
+        self.assertEqual((item.width, item.height), (40, 30))
+        self.assertEqual(batch.total, 1)
+        self.assertFalse(ChunkedUpload.objects.exists())
@@ -1,14 +1,26 @@
 """
 Admin interface tests for Lesezirkel application
 """
-from django.test import TestCase, Client
+from django.conf import settings
+from django.template import Context, Template
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
 from django.urls import reverse
 from django.utils import timezone
 from django.http import HttpResponse
 from datetime import timedelta
 import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
 from main.models import Event, EventRegistration, News, TeamMember, Contact, Gallery
+from main.templatetags.calendar_tags import static_with_version
+from main.versions import bump_version, get_version
 
 
 class AdminInterfaceTest(TestCase):
@@ -1641,3 +1653,114 @@ class CalendarViewsTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('month_days', response.context)
         self.assertIn('events_by_day', response.context)
+
+
+class StaticVersionTest(TestCase):
+    """Test cases for the static_with_version template tag"""
+
+    def test_version_is_content_hash(self):
+        url = static_with_version('css/style.css')
+        self.assertRegex(url, r'^/static/css/style\.css\?v=[0-9a-f]{12}$')
+        # Stable across requests, so browsers can keep the file
+        self.assertEqual(static_with_version('css/style.css'), url)
+        self.assertNotEqual(static_with_version('js/main.js').split('?v=')[1], url.split('?v=')[1])
+
+    def test_manifest_storage_uses_hashed_name(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        with open(os.path.join(static_root, 'staticfiles.json'), 'w') as f:
+            json.dump({'version': '1.1', 'paths': {'css/style.css': 'css/style.4f1c2a9b.css'}, 'hash': ''}, f)
+        storages = {
+            'default': {'BACKEND': 'main.storage.ContentAddressedStorage'},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'},
+        }
+        with override_settings(STATIC_ROOT=static_root, STORAGES=storages):
+            self.assertEqual(static_with_version('css/style.css'), '/static/css/style.4f1c2a9b.css')
+
+
+class FragmentCacheTest(TestCase):
+    """Test cases for the template fragments keyed by model versions"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_calendar_grid_follows_event_version(self):
+        event = Event.objects.create(title="Lesung", description="Abend", location="Osnabrück",
+                                     date=timezone.now())
+        self.assertContains(self.client.get(reverse('events')), 'Lesung')
+
+        # Bypasses the signals: the cached fragments stay
+        Event.objects.filter(pk=event.pk).update(title="Vortrag")
+        response = self.client.get(reverse('events'))
+        self.assertContains(response, 'Lesung')
+        self.assertNotContains(response, 'Vortrag')
+
+        event.title = "Vortrag"
+        event.save()
+        response = self.client.get(reverse('events'))
+        self.assertContains(response, 'Vortrag')
+        self.assertNotContains(response, 'Lesung')
+
+    def test_team_list_follows_team_version(self):
+        member = TeamMember.objects.create(name="Anna Muster", position="Vorsitzende")
+        self.assertContains(self.client.get(reverse('about')), 'Anna Muster')
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse('about'))
+
+        member.delete()
+        self.assertNotContains(self.client.get(reverse('about')), 'Anna Muster')
+
+    def test_missing_version_starts_high(self):
+        first = get_version(Event)
+        self.assertEqual(get_version('Event'), first)
+        bump_version('main.Event')
+        self.assertEqual(get_version(Event), first + 1)
+
+        caches['counters'].clear()
+        self.assertGreater(get_version(Event), first + 1)
+
+    def test_bumped_version_does_not_expire(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        with override_settings(CACHES={**settings.CACHES, 'counters': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }}):
+            first = get_version(Event)
+            bump_version(Event)
+            # Past the default timeout of 300 seconds
+            with mock.patch('django.core.cache.backends.filebased.time.time', return_value=time.time() + 3600):
+                self.assertEqual(get_version(Event), first + 1)
+
+    def test_every_main_model_is_versioned(self):
+        before = get_version(Contact)
+        Contact.objects.create(name="Max", email="max@example.com", subject="Frage", message="Hallo")
+        self.assertGreater(get_version(Contact), before)
+
+        before = get_version('SearchIndexEntry')
+        News.objects.create(title="Indiziert", content="Suchbegriffe")
+        self.assertEqual(get_version('SearchIndexEntry'), before)
+
+    def test_model_version_tag(self):
+        rendered = Template("{% load cache_tags %}{% model_version 'News' 'main.Gallery' %}").render(Context())
+        self.assertEqual(rendered, f'{get_version(News)}.{get_version(Gallery)}')
+
+    def test_chunk_etag_follows_news_version(self):
+        news = News.objects.create(title="Neu", content="Text")
+        response = self.client.get(reverse('news_chunk'))
+        etag = response['ETag']
+        self.assertEqual(self.client.get(reverse('news_chunk'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        news.title = "Geändert"
+        news.save()
+        response = self.client.get(reverse('news_chunk'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command('benchmark_page_rendering', sample=3, repeat=1, stdout=out)
+        self.assertIn('events', out.getvalue())
+        # Sample data is rolled back
+        self.assertFalse(Event.objects.exists())